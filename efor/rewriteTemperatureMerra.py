@@ -5,133 +5,107 @@ Created on Sun May 24 12:47:45 2020
 @author: julia
 """
 from netCDF4 import Dataset
-from datetime import date, timedelta
+from datetime import timedelta
 import datetime
+import multiprocessing
 import numpy as np
-import datetime
+import os
 import time as stopWatch
-import seaborn as sns; sns.set()
-import matplotlib.pyplot as plt
 import sys
 
-#inputs to method should be year then region either wecc or .....
-
-
-#shapeFinderFilePath = 'MERRA2_400.tavg1_2d_slv_Nx.20160101.nc4.nc4'
-#temporary fix for finding correct lat long lengths
-shapeFinderFilePath = '../../scratch/mtcraig_root/mtcraig1/shared_data/merraData/resource/%s/raw/MERRA2_400.tavg1_2d_slv_Nx.20170101.nc4.nc4' % (sys.argv[2])
+#inputs to method should be year(s) then region either wecc or .....
+#   python rewriteTemperatureMerra.py 2016 wecc
+#   python rewriteTemperatureMerra.py 2016 2017 2018 wecc
 
-shapeData = Dataset(shapeFinderFilePath)
+baseWord = '../../scratch/mtcraig_root/mtcraig1/shared_data/merraData/resource/%s/raw/MERRA2_400.tavg1_2d_slv_Nx.'
 
-print("Shape of data: %s" % (str(shapeData.variables["T2M"].shape)))
-print("Lat: %s " % (shapeData.variables["T2M"].shape[1]))
-print("Lon: %s " % (shapeData.variables["T2M"].shape[2]))
+#processes reading daily files (HDF5 is not thread-safe, so reads are split across processes rather than threads)
+numWorkers = int(os.environ.get("SLURM_CPUS_PER_TASK", 1))
 
-#once assigned don't change this variable important for writing to the same shape for bounds
-latLength = shapeData.variables["T2M"].shape[1]
-lonLength = shapeData.variables["T2M"].shape[2]
+def getDailyFiles(year, region):
+    '''
+    daily MERRA files of a year in order, skipping leap days so that there are 365 (8760 hours)
+    '''
+    dailyFiles = []
+    current_date = datetime.date(year, 1, 1)
+    end_date = datetime.date(year, 12, 31)
+    delta = timedelta(days=1)
+    while current_date <= end_date:
+        #checking for leap day then skipping it
+        if not (current_date.month == 2 and current_date.day == 29):
+            dailyFiles.append(baseWord % (region) + current_date.strftime("%Y%m%d") + ".nc4.nc4")
+        current_date += delta
+    return dailyFiles
 
-def rewriteData(data1, variableTag):
-    data = np.zeros((24,latLength,lonLength))
-    timeValueIndex = -1
-    latIndex = 0
-    longIndex = 0
-    for time in data1.variables[variableTag]:
-        timeValueIndex += 1
-        latIndex = 0
-        for lat in time:
-            longIndex = 0
-            for long in lat:
-                data[timeValueIndex][latIndex][longIndex] = long    
-                longIndex += 1
-            latIndex += 1
-    return data
+def readDay(filename, variableTag="T2M"):
+    '''
+    read the 24 hourly slices of one daily file as a whole array
+    '''
+    netCDF = Dataset(filename)
+    dayData = np.array(netCDF.variables[variableTag][:])
+    netCDF.close()
+    return dayData
 
-def main(year):
+def main(year, region):
     '''
-    args: 
-    
+    args:
+
     year, for which year you are extracting the temperature data
-    
-    can only do 1 year increments for now
-    '''
-    
-    
-    #shapeFinderFilePath = "../../scratch/mtcraig_root/mtcraig1/shared_data/merraData/resource/wecc/raw/MERRA2_400.tavg1_2d_slv_Nx."
-    ''''
-    shapeFinderFilePath = "MERRA2_400.tavg1_2d_slv_Nx.20160101.nc4.nc4"
-    #tester = "MERRA2_400.tavg1_2d_slv_Nx.20160108.nc4.nc4"
-    shapeData = Dataset(shapeFinderFilePath)
-    test = np.array(shapeData.variables["T2M"][:][:][:]).T
-    hourData2 = test[15,15]
-    plt.plot(hourData2[0:24])
-    plt.show()
-    ax = sns.heatmap(shapeData.variables["T2M"][0])
-    plt.show()
-    
-        
-    tester2 = "temperatureDataset2016.nc"    
-    currentInUse = np.array(Dataset(tester2)["T2M"][:][:][:]).T
-    hourData = currentInUse[15,15]
-    plt.plot(hourData[0:24])
-    plt.show()
-    ax = sns.heatmap((Dataset(tester2)["T2M"][0]))
-    plt.show()
+
+    region, folder of the raw MERRA data, e.g. wecc
     '''
-    
-    baseWord = "../../scratch/mtcraig_root/mtcraig1/shared_data/merraData/resource/%s/raw/MERRA2_400.tavg1_2d_slv_Nx." % (sys.argv[2])
-    fileName = "temperatureDataset%s.nc" % (year)#change for new year or month!!!
-    #start date for dataset, may need to change
-    start_date = datetime.date(year, 1, 1)
-
-    checkpoint = datetime.date(year, 6, 1)
-    #end date for dataset,may need to change
-    end_date = datetime.date(year, 12, 31)
-    #end_date = datetime.date(year, 1, 1)
-    print("Started reading!")
-    delta = timedelta(days=1)
-    current_date = start_date
 
+    fileName = "temperatureDataset%s.nc" % (year)
+    dailyFiles = getDailyFiles(year, region)
+
+    #once assigned don't change these variables important for writing to the same shape for bounds
+    shapeData = Dataset(dailyFiles[0])
+    latLength = shapeData.variables["T2M"].shape[1]
+    lonLength = shapeData.variables["T2M"].shape[2]
+    shapeData.close()
+
+    print("Running year: %s" % (year))
+    print("Lat: %s " % (latLength))
+    print("Lon: %s " % (lonLength))
 
     #calculating extracting data length time
     start_timeRewrite = stopWatch.time()
 
+    tempDataset = np.zeros((len(dailyFiles)*24,latLength,lonLength))
 
-
-    while current_date <= end_date:
-        if current_date == checkpoint:
-            print("made it half way")
-            print(datetime.datetime.now())
-        #checking for leap day then incremanting to the next day (skipping it) if it is a leap day
-        if(current_date.year % 4 == 0 and current_date.month == 2 and current_date.day == 29):
-            current_date += delta
-        date = current_date.strftime("%Y%m%d")
-        filename = baseWord + date + ".nc4.nc4"
-        netCDF = Dataset(filename)
-        #netCDF = Dataset('MERRA2_400.tavg1_2d_slv_Nx.20160101.nc4.nc4')
-        if current_date == start_date:
-            tempDataset = rewriteData(netCDF,"T2M")
-        else:
-            tempDataset = np.concatenate((tempDataset,rewriteData(netCDF,"T2M")),axis=0)
-        current_date += delta
+    #copy each day directly into the preallocated year
+    if numWorkers > 1:
+        with multiprocessing.Pool(numWorkers) as pool:
+            for day, dayData in enumerate(pool.imap(readDay, dailyFiles, chunksize=8)):
+                tempDataset[day*24:(day+1)*24] = dayData
+    else:
+        for day, filename in enumerate(dailyFiles):
+            tempDataset[day*24:(day+1)*24] = readDay(filename)
 
     print(tempDataset.shape)
-    print("made it to creating new netcdf!")
     print(np.max(tempDataset))
 
     newNetCDF = Dataset(fileName, 'w')
     newNetCDF.createDimension('hour',8760)
-    #newNetCDF.createDimension('hour',24)
-
     newNetCDF.createDimension('lat', latLength)
     newNetCDF.createDimension('long',lonLength)
-    varT2M = newNetCDF.createVariable("T2M",'double', ('hour','lat','long'))
 
-    varT2M[:,:,:] = tempDataset[:][:][:]
+    #compressed, chunked by latitude row so that each grid cell's year is read together
+    varT2M = newNetCDF.createVariable("T2M",'double', ('hour','lat','long'), zlib=True, complevel=4,
+                                        chunksizes=(8760,1,lonLength))
+    varT2M[:,:,:] = tempDataset
+    newNetCDF.close()
+
     print("Done!!")
     #Runtime for program
     rewriteTimeLength = (stopWatch.time() - start_timeRewrite)
     print("It took " + str(round(rewriteTimeLength,2))  + " seconds to rewrite older datasets!")#time to rewrite datsets and write to new file
 
-print("Running year: %s" % (sys.argv[1]))
-main(int(sys.argv[1]))
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python rewriteTemperatureMerra.py year [year ...] region")
+        sys.exit(1)
+
+    region = sys.argv[-1]
+    for year in sys.argv[1:-1]:
+        main(int(year), region)
@@ -22,6 +22,29 @@ simulation["region"] = ["PACE"] # identify the nerc region or balancing authorit
 simulation["iterations"] = 10000 # number of iterations for monte carlo simulation
 simulation["target reliability"] = 2.4 # loss-of-load-hours per year (2.4 is standard)
 simulation["shift load"] = 0 # +/- hours
+simulation["memory budget"] = 1e9 # bytes of scratch memory each worker uses when sampling outages (8GB/cpu on batch nodes)
+simulation["engine"] = "monte carlo" # "monte carlo" or "copt" (approximate capacity outage probability tables, storage-free systems only)
+simulation["copt step"] = 5 # MW, unit sizes are rounded to this increment by the copt engine
+simulation["copt efor bins"] = 20 # temperature bins per season that hours are grouped into by their fleet forced outage rate
+simulation["common random numbers"] = False # draw outages from seeded per-unit streams so every search trial sees identical outages
+simulation["random seed"] = 0 # seed for common random numbers
+simulation["risk screening"] = False # only sample hours where load can exceed a conservative bound on available capacity
+simulation["risk screening headroom"] = 5000 # MW, additional load screened hours must cover (at least the largest added capacity)
+simulation["risk screening sigma"] = 6 # standard deviations of outages included in the screening bound
+simulation["adaptive iterations"] = False # sample iterations in batches until the LOLH confidence interval is within tolerance or excludes the target
+simulation["lolh tolerance"] = 0.1 # LOLH/year, half-width of the 95% confidence interval to stop sampling
+simulation["adaptive batch size"] = 500 # iterations per batch (large enough to observe loss-of-load events)
+simulation["adaptive min events"] = 10 # loss-of-load hours observed before the confidence interval can stop sampling
+simulation["importance sampling"] = False # sample fleet outages at biased forced outage rates and weight loss-of-load by likelihood ratios
+simulation["importance sampling shift"] = 3.0 # standard deviations each hour's expected outage is shifted by tilting forced outage rates
+simulation["importance sampling min events"] = 30 # effective loss-of-load events below which the fleet is resampled without importance sampling
+simulation["storage kernel"] = "numba" # "numba" or "numpy" storage dispatch kernel, numpy if numba is not installed
+simulation["capacity dtype"] = "float64" # "float64", "float32", or "int32" (0.1 MW steps) storage of hourly capacity matrices
+simulation["workers"] = int(os.environ.get("SLURM_CPUS_PER_TASK", 1)) # processes sharing each Monte Carlo sample (outage sampling and storage dispatch)
+simulation["elcc solver"] = "direct" # "direct" (exact elcc from sorted loss-of-load margins, storage-free systems) or "bisection"
+simulation["supplemental search"] = "root" # "root" (bracketing and Illinois method) or "increment" (50 MW units) supplemental capacity search when removing generators
+simulation["sweep"] = False # find the elcc of every site in the sweep file (or capacity factor grid) with one base system
+simulation["sweep stride"] = 2 # grid cells between swept sites when there is no sweep file (2 is half resolution)
 simulation["debug"] = False # print all information flagged for debug
 
 ######## files ########
@@ -32,6 +55,8 @@ files["eia folder"] = "../eia8602018/"
 files["benchmark FORs file"] =  "../efor/Temperature_dependent_for_realtionships.xlsx"
 files["total interchange folder"] = "../total_interchange/"
 files["saved systems folder"] = "/scratch/mtcraig_root/mtcraig1/shared_data/elccJobs/savedSystems/"
+files["node cache directory"] = os.environ.get("ELCC_NODE_CACHE_DIRECTORY", "") # node-local copies of read-only inputs shared by concurrent jobs (e.g. /dev/shm/...), "" to read in place
+files["sweep file"] = "" # csv of generator parameters (e.g. latitude, longitude, nameplate), one row per swept site. "" sweeps the grid
 
 ########## System ########### 
 
@@ -1,9 +1,16 @@
 import csv
 from datetime import datetime, timedelta
 import datetime
+import atexit
+import hashlib
 import math
+import multiprocessing
+import multiprocessing.shared_memory
 import os
+import pickle
+import shutil
 import sys
+import time
 from os import path
 import numpy as np
 import pandas as pd
@@ -12,6 +19,14 @@ from numpy import random
 from numpy import genfromtxt
 import matplotlib
 import matplotlib.pyplot as plt
+try:
+    import numba
+except ImportError:
+    numba = None
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
 
 
 np.random.seed()
@@ -19,13 +34,144 @@ np.random.seed()
 # Globals
 DEBUG = False
 OUTPUT_DIRECTORY = ""
-
+MEMORY_BUDGET = 1e9 # bytes of scratch memory for outage sampling
+ENGINE = "monte carlo" # "monte carlo" or "copt"
+COPT_EFOR_BINS = 20 # temperature bins of forced outage rates per season in outage tables
+COMMON_RANDOM_NUMBERS = False # draw outages from seeded per-unit streams
+RANDOM_SEED = 0
+
+RANDOM_STREAM_TYPES = {"conventional" : 0, "solar" : 1, "wind" : 2, "storage" : 3}
+SUPPLEMENTAL_UNIT_ID = 1000000 # unit ids for supplemental and added generators, clear of existing fleet ids
+ADDED_UNIT_ID = 2000000
+
+RISK_SCREENING = False # only sample hours that can ever be at risk
+RISK_SCREENING_HEADROOM = 0 # MW of additional load the screened hours must cover (largest elcc search)
+RISK_SCREENING_SIGMA = 6 # standard deviations of outages included in the screening bound
+
+ADAPTIVE_ITERATIONS = False # sample iteration batches only until the LOLH estimate is precise enough
+LOLH_TOLERANCE = 0.1 # LOLH/year half-width of the confidence interval needed to stop sampling
+ADAPTIVE_BATCH_SIZE = 500 # iterations added per batch
+ADAPTIVE_MIN_EVENTS = 10 # loss-of-load hours observed before the confidence interval is trusted
+LOLH_Z_SCORE = 1.96 # 95% confidence interval
+
+IMPORTANCE_SAMPLING = False # sample fleet outages at biased rates and weight loss-of-load by likelihood ratios
+IMPORTANCE_SAMPLING_SHIFT = 3.0 # standard deviations the expected outage of the sampled generators is shifted each hour
+IMPORTANCE_SAMPLING_MIN_EVENTS = 30 # effective loss-of-load events below which importance sampling falls back to plain Monte Carlo
+IMPORTANCE_SAMPLING_MAX_EFOR = 0.5 # biased forced outage rates are capped here (unless already higher)
+
+SAMPLING_BYTES_PER_DRAW = 9 # one float64 uniform and one boolean outage flag
+
+STORAGE_KERNEL = "numpy" # "numba" or "numpy", per-hour storage policy
+WORKERS = 1 # processes sharing the iterations of outage sampling and storage dispatch
+
+CAPACITY_DTYPE = "float64" # "float64", "float32", or "int32" storage of fleet capacity matrices
+CAPACITY_SCALE = 10 # int32 capacity is stored in units of 1/CAPACITY_SCALE MW
+
+NODE_CACHE_DIRECTORY = "" # node-local directory (e.g. /dev/shm) for read-only inputs shared by the jobs of a node, "" to read in place
+NODE_CACHE_WAIT = 300 # seconds to wait for another job copying an input before reading it in place
+
+SWEEP_SYSTEM = dict() # base system shared with forked sweep workers
+WORKER_POOL = None # worker processes kept for the whole run (see get_worker_pool)
+WORKER_POOL_SETTINGS = None # settings of this module when the worker pool was forked
+
+ELCC_SOLVER = "direct" # "direct" (storage-free systems, bisection otherwise) or "bisection"
+SUPPLEMENTAL_SEARCH = "root" # "root" (bracketing and Illinois method) or "increment" (50 MW units, then bisection of the last unit)
+
+def jit_impl(function):
+# Compile with numba when installed. Without numba the NumPy kernels are used instead
+    if numba is None:
+        return function
+    return numba.njit(cache=True)(function)
+
+
+def get_node_local_file(file):
+# Node-local copy of a read-only input, copied once per node so that concurrent jobs map the same pages. The file itself without a node cache
+    if NODE_CACHE_DIRECTORY == "" or not path.exists(file):
+        return file
+
+    node_file = path.join(NODE_CACHE_DIRECTORY, path.abspath(file).strip("/").replace("/","__"))
+    source_mtime = path.getmtime(file)
+    if path.exists(node_file) and path.getmtime(node_file) == source_mtime:
+        return node_file
+
+    # the first job on the node copies, the others wait for it (or take over the copy if it died)
+    os.makedirs(NODE_CACHE_DIRECTORY, exist_ok=True)
+    lock_file = node_file+".lock"
+    for _ in range(NODE_CACHE_WAIT+1):
+        if path.exists(node_file) and path.getmtime(node_file) == source_mtime:
+            return node_file
+        if acquire_node_lock(lock_file, node_file):
+            break
+        time.sleep(1)
+    else:
+        return file
+
+    # copy to a file of this job and move it into place, so other jobs never see a partial copy
+    try:
+        shutil.copy2(file, node_file+"."+str(os.getpid()))
+        os.replace(node_file+"."+str(os.getpid()), node_file)
+    finally:
+        remove_file_impl(lock_file)
+
+    return node_file
+
+def acquire_node_lock(lock_file, node_file):
+# Create a lock file holding this job's process id. False while another job holds the lock. A lock is stale, and is removed
+# with its partial copy, once its process has died or it is older than NODE_CACHE_WAIT. Jobs breaking the same stale lock at 
+# once may both copy, which is harmless since each copy is moved into place whole
+    try:
+        lock = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        lock_pid = get_lock_pid(lock_file)
+        try:
+            lock_age = time.time() - path.getmtime(lock_file)
+        except FileNotFoundError:
+            return False
+
+        if not (lock_pid is not None and not is_process_alive(lock_pid)) and lock_age <= NODE_CACHE_WAIT:
+            return False
+
+        print("Removing stale node cache lock :",lock_file)
+        remove_file_impl(lock_file)
+        if lock_pid is not None:
+            remove_file_impl(node_file+"."+str(lock_pid))
+        return False
+
+    os.write(lock, str(os.getpid()).encode())
+    os.close(lock)
+    return True
+
+def get_lock_pid(lock_file):
+# Process id written in a lock file. None if it cannot be read (e.g. the lock was just created)
+    try:
+        with open(lock_file) as lock:
+            return int(lock.read())
+    except (OSError, ValueError):
+        return None
+
+def is_process_alive(pid):
+# Whether a process with this id runs on this node
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def remove_file_impl(file):
+# Remove a file that may already be gone
+    try:
+        os.remove(file)
+    except FileNotFoundError:
+        pass
 
 def get_powGen(solar_cf_file, wind_cf_file):
     
     """ Retrieve all necessary information from powGen netCDF files: RE capacity factors and corresponding lat/lons
     
-    Capacity factors are in matrix of shape(lats, lon, 8760 hrs) for 1 year
+    Capacity factors are in matrix of shape(lats, lon, 8760 hrs) for 1 year. They are read lazily, only for the 
+    grid cells of generators (see `get_cf_cells`)
 
     ...
 
@@ -48,17 +194,144 @@ def get_powGen(solar_cf_file, wind_cf_file):
     powGen_lons = np.array(solarPowGen.variables['lon'][:])
 
     cf = dict()
-    cf["solar"] = np.array(solarPowGen.variables['cf'][:]) 
-    cf["wind"] = np.array(windPowGen.variables['cf'][:])
+    cf["solar"] = {"file" : get_node_local_file(solar_cf_file), "cells" : dict()}
+    cf["wind"] = {"file" : get_node_local_file(wind_cf_file), "cells" : dict()}
 
     solarPowGen.close()
     windPowGen.close()
 
     return powGen_lats, powGen_lons, cf
 
+def get_cf_cells(cf, lat_idx, lon_idx):
+# Capacity factors of grid cells, of shape (8760 hrs, num cells). Cells of a lazily opened netCDF file are read once and cached
+    if not isinstance(cf, dict):
+        return cf[lat_idx, lon_idx, :].T
+
+    cells = list(zip(np.asarray(lat_idx).tolist(), np.asarray(lon_idx).tolist()))
+    missing_cells = sorted(set(cells).difference(cf["cells"]))
+
+    if len(missing_cells) != 0:
+        powGen = Dataset(cf["file"])
+
+        # one read per latitude row
+        for lat in sorted(set(cell[0] for cell in missing_cells)):
+            lons = [cell[1] for cell in missing_cells if cell[0] == lat]
+            row_cf = np.array(powGen.variables['cf'][lat,lons,:])
+            for lon, cell_cf in zip(lons, row_cf):
+                cf["cells"][(lat,lon)] = cell_cf
+
+        powGen.close()
+
+    if len(cells) == 0:
+        return np.zeros((8760,0))
+    return np.stack([cf["cells"][cell] for cell in cells], axis=1)
+
+def save_cache_impl(array_file, array, index_file, index):
+# Save a cached array and its index, writing then renaming so concurrent jobs never read a partial cache
+    os.makedirs(path.dirname(array_file), exist_ok=True)
+    np.save(array_file+"."+str(os.getpid())+".npy",array)
+    os.replace(array_file+"."+str(os.getpid())+".npy",array_file)
+    with open(index_file+"."+str(os.getpid()),"wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(index_file+"."+str(os.getpid()),index_file)
+
+def read_regional_load_impl(load_file):
+# Cleaned demand of a Tyler Ruggles demand file indexed by date_time, with (most) leap days removed
+
+    # Open file
+    regional_load = pd.read_csv(load_file,delimiter=',',usecols=["date_time","cleaned demand (MW)"],index_col="date_time")
+
+    # Remove leap days
+    leap_days=regional_load.index[regional_load.index.str.find("-02-29",0,10) != -1]
+    regional_load.drop(leap_days, inplace=True) 
+    return regional_load
+
+def get_regional_load_impl(regional_load, year):
+# Hourly load of one year from read_regional_load_impl
+
+        # two date_time formats from eia cleaned data
+    leap_days=regional_load.index[regional_load.index.str.find(str(year)+"0229",0,10) != -1]
+    regional_load = regional_load.drop(leap_days)
+
+    # Find Given Year
+    return np.array(regional_load["cleaned demand (MW)"][regional_load.index.str.find(str(year),0,10) != -1].values)
+
+def get_demand_cache_files(demand_folder):
+# Memory-mapped (region, year, hour) load array and its index, kept in a cache folder beside the demand files
+    return path.join(demand_folder,"cache","demand.npy"), path.join(demand_folder,"cache","demand_index.pkl")
+
+def cache_demand_folder(demand_folder):
+    """ Convert every demand file in a folder into one (region, year, hour) array of hourly load with leap days removed
+
+    Only complete years (8760 hours) are stored. `get_hourly_load` slices the array instead of parsing csv files.
+
+    ...
+
+    Args:
+    ----------
+    `demand_folder` (str): folder of Tyler Ruggles' cleaned demand files, one per balancing authority
+    """
+
+    regions = [demand_name[:-4] for demand_name in sorted(os.listdir(demand_folder)) 
+                if demand_name.endswith(".csv") and not demand_name.startswith("_")]
+
+    regional_loads = dict()
+    for region in regions:
+        print("Caching",path.join(demand_folder,region+".csv"))
+        sys.stdout.flush()
+        regional_loads[region] = read_regional_load_impl(path.join(demand_folder,region+".csv"))
+
+    years = np.unique(np.concatenate([regional_load.index.str[:4].values for regional_load in regional_loads.values()])).astype(int)
+
+    # incomplete years are left as nan
+    demand = np.full((len(regions),len(years),8760),np.nan)
+    for i, region in enumerate(regions):
+        for j, year in enumerate(years):
+            hourly_regional_load = get_regional_load_impl(regional_loads[region],year)
+            if hourly_regional_load.size == 8760:
+                demand[i,j] = hourly_regional_load
+
+    demand_index = dict()
+    demand_index["regions"] = regions
+    demand_index["years"] = years
+    demand_index["source mtimes"] = [path.getmtime(path.join(demand_folder,region+".csv")) for region in regions]
+
+    demand_file, demand_index_file = get_demand_cache_files(demand_folder)
+    save_cache_impl(demand_file, demand, demand_index_file, demand_index)
+
+def get_demand_cache(demand_folder):
+# Memory-mapped demand array and its index from cache_demand_folder, or None before caching
+    demand_file, demand_index_file = get_demand_cache_files(demand_folder)
+    if not (path.exists(demand_file) and path.exists(demand_index_file)):
+        return None
+
+    with open(demand_index_file,"rb") as f:
+        demand_cache = pickle.load(f)
+    demand_cache["demand"] = np.load(get_node_local_file(demand_file),mmap_mode="r")
+    return demand_cache
+
+def get_cached_regional_load(demand_cache, demand_folder, region, year):
+# Hourly load of a region and year from the demand cache, or None if not cached, incomplete, or stale
+    if demand_cache is None or not (region in demand_cache["regions"] and int(year) in demand_cache["years"]):
+        return None
+
+    i = demand_cache["regions"].index(region)
+    j = int(np.flatnonzero(demand_cache["years"] == int(year))[0])
+
+    load_file = path.join(demand_folder,region+".csv")
+    if path.exists(load_file) and path.getmtime(load_file) != demand_cache["source mtimes"][i]:
+        return None
+
+    hourly_regional_load = np.array(demand_cache["demand"][i,j])
+    if np.isnan(hourly_regional_load).any():
+        return None
+    return hourly_regional_load
+
 def get_hourly_load(year,regions, hrsShift=0):
     """ Retrieve hourly load vector from load file
 
+    Regions cached by `cache_demand_folder` are sliced from the cache, others are read from their csv files.
+
     ...
 
     Args:
@@ -70,27 +343,22 @@ def get_hourly_load(year,regions, hrsShift=0):
     `hrsShift` (int): optional parameter to shift load, default no shift
     """
     hourly_load = np.zeros(8760)
+    demand_cache = get_demand_cache("../demand/")
 
     for region in regions:
 
+        hourly_regional_load = get_cached_regional_load(demand_cache,"../demand/",region,year)
+        if hourly_regional_load is not None:
+            hourly_load += hourly_regional_load
+            continue
+
         load_file = "../demand/"+region+".csv"
         # error handling
         if not path.exists(load_file):
             error_message = "Invalid region or demand data unavailable. "+region
             raise RuntimeError(error_message)
 
-        # Open file
-        regional_load = pd.read_csv(load_file,delimiter=',',usecols=["date_time","cleaned demand (MW)"],index_col="date_time")
-
-        # Remove leap days
-        leap_days=regional_load.index[regional_load.index.str.find("-02-29",0,10) != -1]
-        regional_load.drop(leap_days, inplace=True) 
-            # two date_time formats from eia cleaned data
-        leap_days=regional_load.index[regional_load.index.str.find(str(year)+"0229",0,10) != -1]
-        regional_load.drop(leap_days, inplace=True)
-
-        # Find Given Year
-        hourly_regional_load = np.array(regional_load["cleaned demand (MW)"][regional_load.index.str.find(str(year),0,10) != -1].values)
+        hourly_regional_load = get_regional_load_impl(read_regional_load_impl(load_file),year)
         hourly_load += hourly_regional_load
 
     # Shift load
@@ -105,9 +373,114 @@ def get_hourly_load(year,regions, hrsShift=0):
     print('')
     return hourly_load
 
+def read_interchange_impl(interchange_file_path, regions=None):
+# Parse the cleaned total interchange file, for all regions or a subset of them
+    if regions is None:
+        return pd.read_csv(interchange_file_path,parse_dates= ['UTC time'])
+    return pd.read_csv(interchange_file_path,usecols= ['UTC time',*regions],parse_dates= ['UTC time'])
+
+def get_regional_interchange_impl(raw_TI_Data, region, year):
+# Hourly imports/exports of one region and year from read_interchange_impl, with nan as 0
+    raw_TI_Data = raw_TI_Data[['UTC time',region]].copy()
+
+    #selecting data for desired year, uses datetime format
+    filtered_TI_data = raw_TI_Data[(raw_TI_Data['UTC time'].dt.year == year)]
+    
+    #cleaning for CISO, data is shifted forward 1 hour before 2016-9-13
+    if ((region == "CISO") & (year == 2016)):
+        #gets out time period of error
+        ind = ((raw_TI_Data['UTC time'] >= pd.to_datetime('2016-01-01')) & (raw_TI_Data['UTC time'] <= pd.to_datetime('2016-09-13'))).values
+
+        #shifts time period back 1 hour
+        raw_TI_Data.loc[ind,region] = raw_TI_Data.loc[ 
+        ind, region].shift(-1).values
+
+        #selecting data for desired year, uses datetime format encoded in excel spreadsheet
+        filtered_TI_data = raw_TI_Data[
+            raw_TI_Data['UTC time'].dt.year == year
+        ]
+
+    #gets rid of any leap year day if applicable
+    filtered_TI_data = filtered_TI_data[~((filtered_TI_data['UTC time'].dt.month == 2) & (filtered_TI_data['UTC time'].dt.day == 29))]
+    
+    #converting nan values to 0
+    regional_interchange = np.array(filtered_TI_data[region].values, dtype=float)
+    regional_interchange[np.isnan(regional_interchange)] = 0
+    return regional_interchange
+
+def get_interchange_cache_files(interchange_folder):
+# (region, year, hour) interchange array and its index, kept in a cache folder beside WECC_TI.csv
+    return path.join(interchange_folder,"cache","interchange.npy"), path.join(interchange_folder,"cache","interchange_index.pkl")
+
+def cache_interchange_folder(interchange_folder):
+    """ Convert the total interchange file into one (region, year, hour) array with leap days removed and the CISO 2016 correction applied
+
+    Only complete years (8760 hours) are stored. `get_total_interchange` slices the array instead of parsing the csv file.
+
+    ...
+
+    Args:
+    ----------
+    `interchange_folder` (str): file path to folder containing total interchange data
+    """
+
+    interchange_file_path = interchange_folder + "WECC_TI.csv"
+    print("Caching",interchange_file_path)
+    sys.stdout.flush()
+
+    raw_TI_Data = read_interchange_impl(interchange_file_path)
+    regions = [region for region in raw_TI_Data.columns if region != 'UTC time']
+    years = np.unique(raw_TI_Data['UTC time'].dt.year.values).astype(int)
+
+    # incomplete years are left as nan
+    interchange = np.full((len(regions),len(years),8760),np.nan)
+    for i, region in enumerate(regions):
+        for j, year in enumerate(years):
+            regional_interchange = get_regional_interchange_impl(raw_TI_Data,region,year)
+            if regional_interchange.size == 8760:
+                interchange[i,j] = regional_interchange
+
+    interchange_index = dict()
+    interchange_index["regions"] = regions
+    interchange_index["years"] = years
+    interchange_index["source mtime"] = path.getmtime(interchange_file_path)
+
+    interchange_file, interchange_index_file = get_interchange_cache_files(interchange_folder)
+    save_cache_impl(interchange_file, interchange, interchange_index_file, interchange_index)
+
+def get_interchange_cache(interchange_folder):
+# Memory-mapped interchange array and its index from cache_interchange_folder, or None if not cached or stale
+    interchange_file, interchange_index_file = get_interchange_cache_files(interchange_folder)
+    if not (path.exists(interchange_file) and path.exists(interchange_index_file)):
+        return None
+
+    with open(interchange_index_file,"rb") as f:
+        interchange_cache = pickle.load(f)
+    interchange_file_path = interchange_folder + "WECC_TI.csv"
+    if path.exists(interchange_file_path) and path.getmtime(interchange_file_path) != interchange_cache["source mtime"]:
+        return None
+
+    interchange_cache["interchange"] = np.load(get_node_local_file(interchange_file),mmap_mode="r")
+    return interchange_cache
+
+def get_cached_regional_interchange(interchange_cache, region, year):
+# Hourly interchange of a region and year from the interchange cache, or None if not cached or incomplete
+    if interchange_cache is None or not (region in interchange_cache["regions"] and int(year) in interchange_cache["years"]):
+        return None
+
+    i = interchange_cache["regions"].index(region)
+    j = int(np.flatnonzero(interchange_cache["years"] == int(year))[0])
+
+    regional_interchange = np.array(interchange_cache["interchange"][i,j])
+    if np.isnan(regional_interchange).any():
+        return None
+    return regional_interchange
+
 def get_total_interchange(year,regions,interchange_folder, hrsShift=0):
     """ Retrieve all imports/exports for a region during a given year
 
+    Regions cached by `cache_interchange_folder` are sliced from the cache, the others are parsed from the csv file in one pass.
+
     ...
 
     Args:
@@ -121,42 +494,28 @@ def get_total_interchange(year,regions,interchange_folder, hrsShift=0):
     total_interchange = np.zeros(8760)
 
     interchange_file_path = interchange_folder + "WECC_TI.csv"
+    interchange_cache = get_interchange_cache(interchange_folder)
     
-    if not path.exists(interchange_file_path):
+    if not path.exists(interchange_file_path) and interchange_cache is None:
         error_message = "No interchange file found."
         raise RuntimeError(error_message)
 
+    regional_interchanges = dict()
     for region in regions:
-    
-        #loads in data from already cleaned total interchange data
-        raw_TI_Data = pd.read_csv(interchange_file_path,usecols= ['UTC time',region],parse_dates= ['UTC time'])
-
-        #selecting data for desired year, uses datetime format
-        filtered_TI_data = raw_TI_Data[(raw_TI_Data['UTC time'].dt.year == year)]
-        
-        #cleaning for CISO, data is shifted forward 1 hour before 2016-9-13
-        if ((region == "CISO") & (year == 2016)):
-            #converting panda datetime to readable python date time
-            datetime_array = raw_TI_Data['UTC time'].dt.to_pydatetime()
-
-            #gets out time period of error
-            ind = ((datetime_array >= pd.to_datetime('2016-01-01')) & (datetime_array <= pd.to_datetime('2016-09-13')))
+        regional_interchanges[region] = get_cached_regional_interchange(interchange_cache,region,year)
 
-            #shifts time period back 1 hour
-            raw_TI_Data.loc[ind,region] = raw_TI_Data.loc[ 
-            ind, region].shift(-1).values
-
-            #selecting data for desired year, uses datetime format encoded in excel spreadsheet
-            filtered_TI_data = raw_TI_Data[
-                raw_TI_Data['UTC time'].dt.year == year
-            ]
+    # loads in data from already cleaned total interchange data, once for all regions not in the cache
+    uncached_regions = [region for region in regions if regional_interchanges[region] is None]
+    if len(uncached_regions) != 0:
+        if not path.exists(interchange_file_path):
+            error_message = "No interchange file found."
+            raise RuntimeError(error_message)
+        raw_TI_Data = read_interchange_impl(interchange_file_path,uncached_regions)
+        for region in uncached_regions:
+            regional_interchanges[region] = get_regional_interchange_impl(raw_TI_Data,region,year)
 
-        #gets rid of any leap year day if applicable
-        filtered_TI_data = filtered_TI_data[~((filtered_TI_data['UTC time'].dt.month == 2) & (filtered_TI_data['UTC time'].dt.day == 29))]
-        
-        #converting nan values to 0
-        regional_interchange = filtered_TI_data[region].values
-        regional_interchange[np.isnan(regional_interchange)] = 0
+    for region in regions:
+        regional_interchange = regional_interchanges[region]
         
         if np.sum(regional_interchange) > 0:
             print(region+' '+str(year)+': Net Exporter')
@@ -190,6 +549,57 @@ def get_temperature_data(temperature_file):
     temperature_data = np.array(Dataset(temperature_file)["T2M"][:][:][:]).T
     return (temperature_data-273.15)
 
+def get_temperature_bins_impl(temperature_data, benchmark_fors):
+# Index of each temperature into the benchmark FOR table, of shape (lons, lats, 8760 hrs)
+
+    #rounding values to nearest 5 degree due to known for table being given in increments of 5 and rounding to known values
+    temperature_data = (5 * np.round(temperature_data/5))
+    temperature_data = (np.where(temperature_data > 35,35,temperature_data))
+    temperature_data = (np.where(temperature_data < -15,-15,temperature_data))
+
+    #finds index of where each rounded temperature would be inserted on temperature array(-15 -> 35)
+    return np.ascontiguousarray(np.searchsorted(benchmark_fors["Temperature"], temperature_data).astype(np.int8))
+
+def get_temperature_cache_files(temperature_file):
+# Temperature bins and their index, kept in a cache folder beside the temperature file
+    temperature_folder, temperature_name = path.split(temperature_file)
+    cache_file = path.join(temperature_folder, "cache", path.splitext(temperature_name)[0])
+    return cache_file+"_bins.npy", cache_file+"_bins.pkl"
+
+def get_temperature_bins(temperature_file, benchmark_fors):
+    """ Load hourly temperature bins (indices into the benchmark FOR table) for all the coordinates in desired region
+
+    Bins are int8 and computed once per temperature file, then memory-mapped from a cache beside it. Only the
+    grid cells of the fleet are read.
+
+    ...
+
+    Args:
+    ----------
+    `temperature_file` (str): file path to netCDF containing MERRA temperature data for entire region of interest (corresponding to powGen lats/lons)
+
+    `benchmark_fors` (dict): temperature-dependent FORs for different generator technologies from `get_benchmark_fors`
+    """
+
+    bins_file, bins_index_file = get_temperature_cache_files(temperature_file)
+
+    if path.exists(bins_file) and path.exists(bins_index_file):
+        with open(bins_index_file,"rb") as f:
+            bins_index = pickle.load(f)
+        current = not path.exists(temperature_file) or bins_index["source mtime"] == path.getmtime(temperature_file)
+        if current and np.array_equal(bins_index["temperatures"], benchmark_fors["Temperature"]):
+            return np.load(get_node_local_file(bins_file),mmap_mode="r")
+
+    temperature_bins = get_temperature_bins_impl(get_temperature_data(temperature_file), benchmark_fors)
+
+    bins_index = dict()
+    bins_index["source mtime"] = path.getmtime(temperature_file)
+    bins_index["temperatures"] = np.array(benchmark_fors["Temperature"])
+
+    save_cache_impl(bins_file, temperature_bins, bins_index_file, bins_index)
+
+    return temperature_bins
+
 def get_benchmark_fors(benchmark_FORs_file):
     """ Load in benchmark fors for temperature increments of 5 celsius from -15 to 35 for 6 different types of technology 
 
@@ -207,7 +617,165 @@ def get_benchmark_fors(benchmark_FORs_file):
         benchmark_fors_tech[tech] = forData[tech].values
     return benchmark_fors_tech
 
-def get_storage_fleet(eia_folder, region, year, round_trip_efficiency, efor, dispatch_strategy):
+def get_eia_file(eia_folder, table, year):
+# Form EIA-860 workbook for a schedule, e.g. "2___Plant" or "3_4_Energy_Storage"
+    return eia_folder+table+"_Y"+str(year)+".xlsx"
+
+def get_eia_cache_file(eia_file):
+# Columnar copy of a workbook, kept in a cache folder beside the workbooks
+    eia_folder, eia_name = path.split(eia_file)
+    return path.join(eia_folder, "cache", path.splitext(eia_name)[0]+".npz")
+
+def encode_column_impl(column):
+# Arrays of one workbook column that load without pickles. Numeric and date columns are kept as they are. Text and mixed columns 
+# are split into numbers, integers, and text, with the kind of each cell (0 float, 1 integer, 2 text, 3 missing) and the column dtype
+    values = column.to_numpy()
+    if values.dtype.kind in "biufM":
+        return {"values" : values}
+
+    kinds = np.full(values.size, 3, dtype=np.int8)
+    numbers = np.full(values.size, np.nan)
+    integers = np.zeros(values.size, dtype=np.int64)
+    text = np.full(values.size, "", dtype=object)
+
+    for i, value in enumerate(values):
+        if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, np.integer, float, np.floating)):
+            if value is not None and not (np.ndim(value) == 0 and pd.isna(value)):
+                kinds[i], text[i] = 2, str(value)
+        elif isinstance(value, (int, np.integer)):
+            kinds[i], integers[i] = 1, value
+        elif not np.isnan(value):
+            kinds[i], numbers[i] = 0, value
+
+    return {"kinds" : kinds, "numbers" : numbers, "integers" : integers, "text" : text.astype(str), "dtype" : np.array(str(column.dtype))}
+
+def decode_column_impl(arrays):
+# Workbook column from the arrays of encode_column_impl
+    if "values" in arrays:
+        return arrays["values"]
+
+    kinds = arrays["kinds"]
+    values = np.full(kinds.size, np.nan, dtype=object)
+    for kind, key in [(0, "numbers"), (1, "integers"), (2, "text")]:
+        cells = np.flatnonzero(kinds == kind)
+        values[cells] = arrays[key][cells].tolist()
+
+    dtype = str(arrays["dtype"])
+    return values if dtype == "object" else pd.array(values, dtype=dtype)
+
+def cache_eia_table(eia_file):
+# Parse a whole workbook once and save its columns to a compressed npz file, with the workbook's modification time
+    table = pd.read_excel(eia_file,skiprows=1)
+    cache_file = get_eia_cache_file(eia_file)
+    os.makedirs(path.dirname(cache_file), exist_ok=True)
+
+    arrays = {"columns" : np.array([str(column) for column in table.columns]), "source mtime" : np.array(path.getmtime(eia_file))}
+    for i, column in enumerate(table.columns):
+        for key, value in encode_column_impl(table[column]).items():
+            arrays[key+" "+str(i)] = value
+
+    # write then rename so concurrent jobs never read a partial cache
+    temporary_file = cache_file+"."+str(os.getpid())
+    with open(temporary_file, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(temporary_file, cache_file)
+    return table
+
+def read_eia_table(eia_folder, table, year, usecols):
+    """ Read columns of a Form EIA-860 schedule, from its cache when present and current
+
+    A cache is current when its recorded modification time matches the workbook, or when the workbook 
+    has been removed. Otherwise the workbook is parsed directly.
+
+    ...
+
+    Args:
+    ----------
+    `eia_folder` (string): file path to Form EIA-860 Folder
+
+    `table` (string): schedule file prefix, e.g. "2___Plant"
+
+    `year` (int): year of interest
+
+    `usecols` (list): columns to return
+    """
+
+    eia_file = get_eia_file(eia_folder, table, year)
+    cache_file = get_eia_cache_file(eia_file)
+
+    if path.exists(cache_file):
+        # only the arrays of the requested columns are read
+        with np.load(cache_file) as cache:
+            if not path.exists(eia_file) or cache["source mtime"] == path.getmtime(eia_file):
+                # keep workbook column order, as read_excel does
+                table = dict()
+                for i, column in enumerate(cache["columns"].tolist()):
+                    if column in usecols:
+                        table[column] = decode_column_impl({key.split(" ")[0] : cache[key] for key in cache.files 
+                                                            if key.endswith(" "+str(i)) and key != "source mtime"})
+                return pd.DataFrame(table)
+        if DEBUG:
+            print("Stale cache:",cache_file)
+
+    print("Reading",eia_file,"(run elcc_ingest.py to cache)")
+    return pd.read_excel(eia_file,skiprows=1,usecols=usecols)
+
+def cache_eia_folder(eia_folder):
+    """ Parse every workbook in a Form EIA-860 folder into the cache read by `read_eia_table`
+
+    ...
+
+    Args:
+    ----------
+    `eia_folder` (string): file path to Form EIA-860 Folder
+    """
+
+    for eia_name in sorted(os.listdir(eia_folder)):
+        if eia_name.endswith(".xlsx") and not eia_name.startswith("~$"):
+            print("Caching",path.join(eia_folder,eia_name))
+            sys.stdout.flush()
+            cache_eia_table(path.join(eia_folder,eia_name))
+
+def get_fleet_loader(eia_folder, regions, year):
+    """ Read the plant table once and index the plants of the region(s), to be shared by the storage, conventional, and renewable fleets
+
+    ...
+
+    Args:
+    ----------
+    `eia_folder` (string): file path to Form EIA-860 Folder
+
+    `regions` (list): list of NERC Regions or Balancing Authorities to include
+
+    `year` (int): year of interest
+    """
+
+    # Plant code -> latitude, longitude, NERC region, balancing authority
+    plants = read_eia_table(eia_folder,"2___Plant",year,["Plant Code","NERC Region","Latitude",
+                                                         "Longitude","Balancing Authority Code"])
+    plants = plants.set_index("Plant Code")
+
+    # Sort by NERC Region and Balancing Authority to filter correct plant codes
+    nerc_region_plant_codes = plants.index[plants["NERC Region"].isin(regions)].values
+    balancing_authority_plant_codes = plants.index[plants["Balancing Authority Code"].isin(regions)].values
+    
+    desired_plant_codes = np.concatenate((nerc_region_plant_codes, balancing_authority_plant_codes))
+
+    # Error Handling
+    if desired_plant_codes.size == 0:
+        error_message = "Invalid region(s): " + str(regions)
+        raise RuntimeError(error_message)
+
+    fleet_loader = dict()
+    fleet_loader["eia folder"] = eia_folder
+    fleet_loader["regions"] = regions
+    fleet_loader["year"] = year
+    fleet_loader["plants"] = plants
+    fleet_loader["desired plant codes"] = desired_plant_codes
+
+    return fleet_loader
+
+def get_storage_fleet(eia_folder, region, year, round_trip_efficiency, efor, dispatch_strategy, fleet_loader=None):
     """ Retrieve all active storage units
 
     ...
@@ -225,24 +793,17 @@ def get_storage_fleet(eia_folder, region, year, round_trip_efficiency, efor, dis
     `efor` (float): expected forced outage rate for storage units
 
     `dispatch strategy` (string): 'reliability' or 'arbitrage'... ARBITRAGE POORLY IMPLEMENTED
+
+    `fleet_loader` (dict): plants of the region(s) from `get_fleet_loader`, read here if not given
     """
 
-    # Open files
-    plants = pd.read_excel(eia_folder+"2___Plant_Y"+str(year)+".xlsx",skiprows=1,usecols=["Plant Code","NERC Region","Latitude",
-                                                                                "Longitude","Balancing Authority Code"])
-    all_storage_units = pd.read_excel(eia_folder+"3_4_Energy_Storage_Y"+str(year)+".xlsx",skiprows=1,\
-                                                    usecols=["Plant Code","Technology","Nameplate Energy Capacity (MWh)","Status",
-                                                            "Operating Year", "Maximum Charge Rate (MW)", "Maximum Discharge Rate (MW)"])
-    # Sort by NERC Region and Balancing Authority to filter correct plant codes
-    nerc_region_plant_codes = plants["Plant Code"][plants["NERC Region"].isin(region)].values
-    balancing_authority_plant_codes = plants["Plant Code"][plants["Balancing Authority Code"].isin(region)].values
-    
-    desired_plant_codes = np.concatenate((nerc_region_plant_codes, balancing_authority_plant_codes))   
+    if fleet_loader is None:
+        fleet_loader = get_fleet_loader(eia_folder, region, year)
+    desired_plant_codes = fleet_loader["desired plant codes"]
 
-    # Error Handling
-    if desired_plant_codes.size == 0:
-        error_message = "Invalid region(s): "+region
-        raise RuntimeError(error_message)
+    # Open files
+    all_storage_units = read_eia_table(eia_folder,"3_4_Energy_Storage",year,["Plant Code","Technology","Nameplate Energy Capacity (MWh)","Status",
+                                                                             "Operating Year", "Maximum Charge Rate (MW)", "Maximum Discharge Rate (MW)"])
 
     # filtering
     active_storage = all_storage_units[(all_storage_units["Plant Code"].isin(desired_plant_codes)) & (all_storage_units["Status"] == "OP")]
@@ -354,21 +915,61 @@ def get_hourly_storage_contribution(num_iterations, hourly_capacity, hourly_load
         
         `renewable profile` (ndarray): vector of hourly renewable profiles
     """
-    hourly_storage_contribution = np.zeros((8760,num_iterations))
-    
     # edge case
     if storage["num units"] == 0:
         return 0
 
+    # split iterations across worker processes, which read the capacity, load, and profile from shared memory
+    if WORKERS > 1 and num_iterations > 1:
+        shared_memory, inputs = share_inputs([hourly_capacity, hourly_load, renewable_profile])
+        tasks = [(inputs, first, last, storage, seed)
+                    for (first, last), seed in zip(get_iteration_chunks(num_iterations), get_worker_seeds())]
+        try:
+            return np.hstack(run_parallel_impl(dispatch_storage_worker, tasks))
+        finally:
+            release_shared_memory(shared_memory)
+
+    return dispatch_storage_impl(num_iterations, hourly_capacity, hourly_load, storage, renewable_profile)
+
+def dispatch_storage_worker(task):
+# Dispatch storage for one range of iterations in a worker process
+    inputs, first_iteration, last_iteration, storage, seed = task
+    np.random.seed(seed)
+
+    shared_memory, (hourly_capacity, hourly_load, renewable_profile) = attach_inputs(inputs)
+    try:
+        # storage dispatch adds to its own copy of the capacity
+        hourly_capacity = np.array(hourly_capacity[:,first_iteration:last_iteration])
+        return dispatch_storage_impl(   last_iteration-first_iteration, hourly_capacity, hourly_load, storage, renewable_profile, 
+                                        first_iteration)
+    finally:
+        del hourly_capacity, hourly_load, renewable_profile
+        release_shared_memory(shared_memory, unlink=False)
+
+def dispatch_storage_impl(num_iterations, hourly_capacity, hourly_load, storage, renewable_profile=None, first_iteration=0):
+# Dispatch storage in every iteration. first_iteration offsets common random number streams when iterations are split across workers
+    hourly_storage_contribution = np.zeros((hourly_load.size,num_iterations))
+
+    # reliability dispatch runs every iteration at once
+    if storage["dispatch strategy"] == "reliability":
+        reliability_strategy_batch(hourly_capacity,hourly_load,storage,hourly_storage_contribution,first_iteration)
+        return hourly_storage_contribution
+
+    # with common random numbers each unit draws its outages iteration by iteration from its own stream
+    streams = None
+    if COMMON_RANDOM_NUMBERS:
+        streams = [get_random_stream("storage", unit) for unit in range(storage["num units"])]
+        for stream in streams:
+            skip_draws_impl(stream, first_iteration*hourly_load.size)
+
     # dispatch in every iteration according to outages and available capacity
     for i in range(num_iterations):
 
-        if storage["dispatch strategy"] == "reliability":
-            reliability_strategy(hourly_capacity[:,i],hourly_load,storage,hourly_storage_contribution[:,i])
+        available = get_storage_availability(storage, streams, hourly_load.size)
 
-        elif storage["dispatch strategy"] == "arbitrage":
+        if storage["dispatch strategy"] == "arbitrage":
             net_load = hourly_load - renewable_profile
-            arbitrage_strategy(net_load,storage,hourly_storage_contribution[:,i])
+            arbitrage_strategy(net_load,storage,hourly_storage_contribution[:,i],available)
         
         else:
             error_message = "Invalid dispatch strategy: \""+storage["dispatch strategy"]+"\""
@@ -377,16 +978,35 @@ def get_hourly_storage_contribution(num_iterations, hourly_capacity, hourly_load
 
     return hourly_storage_contribution
 
-def arbitrage_strategy(net_load,storage,hourly_storage_contribution):
+def get_storage_availability(storage, streams, num_hours):
+# Sample hourly availability of each storage unit for one iteration. Of shape(hours, num units). None without common random numbers
+    if streams is None:
+        return None
+
+    return draw_uniform_impl((storage["num units"], num_hours), streams).T > storage["efor"]
+
+def get_daily_storage_availability(storage, num_iterations, day, first_iteration=0):
+# Sample availability of each storage unit for every iteration of one day. Of shape(iterations, 24 hrs, units). None without common random numbers
+    if not COMMON_RANDOM_NUMBERS:
+        return None
+    
+    streams = [get_random_stream("storage", unit, day) for unit in range(storage["num units"])]
+    for stream in streams:
+        skip_draws_impl(stream, first_iteration*24)
+    uniform = draw_uniform_impl((storage["num units"], num_iterations, 24), streams)
+    return np.moveaxis(uniform, 0, 2) > storage["efor"]
+
+def arbitrage_strategy(net_load,storage,hourly_storage_contribution,available=None):
 # BAD IMPLEMENTATION : emulate arbitrage for storage dispatch policy
-    for day in range(365):
+    for day in range(net_load.size//24):
         start = day*24
         end = (day+1)*24
-        arbitrage_dispatch(net_load[start:end],storage,hourly_storage_contribution[start:end])
+        arbitrage_dispatch(net_load[start:end],storage,hourly_storage_contribution[start:end],
+                            None if available is None else available[start:end])
     
     return 
 
-def arbitrage_dispatch(net_load, storage, hourly_storage_contribution):
+def arbitrage_dispatch(net_load, storage, hourly_storage_contribution, available=None):
 # BAD IMPLEMENTATION : shoddy arbitrage emulation with percentile-based peak shaving
     discharge_percentile = 75
     charge_percentile = 25
@@ -397,17 +1017,19 @@ def arbitrage_dispatch(net_load, storage, hourly_storage_contribution):
     for hour in range(24):
         if net_load[hour] > discharge_threshold:
             load_difference = net_load[hour] - discharge_threshold
-            hourly_storage_contribution[hour] = discharge_storage(load_difference, storage)
+            hourly_storage_contribution[hour] = discharge_storage(load_difference, storage,
+                                                                    None if available is None else available[hour])
         elif net_load[hour] < charge_threshold:
             load_difference = charge_threshold - net_load[hour]
-            hourly_storage_contribution[hour] = charge_storage(load_difference, storage)
+            hourly_storage_contribution[hour] = charge_storage(load_difference, storage,
+                                                                None if available is None else available[hour])
 
     return
 
-def reliability_strategy(hourly_capacity,hourly_load,storage,hourly_storage_contribution):
+def reliability_strategy(hourly_capacity,hourly_load,storage,hourly_storage_contribution,available=None):
 # Charge/Discharge storage to greedily maximize reliability    
     simulation_days = np.unique((np.argwhere(hourly_load > hourly_capacity)//24).flatten())
-    simulation_days = np.unique(np.minimum(np.maximum(simulation_days,0),364))
+    simulation_days = np.unique(np.minimum(np.maximum(simulation_days,0),hourly_load.size//24-1))
     
     # no risk days
     if len(simulation_days) != 0:
@@ -426,12 +1048,12 @@ def reliability_strategy(hourly_capacity,hourly_load,storage,hourly_storage_cont
             start = (day)*24 
             end = (day+1)*24
             reliability_dispatch(hourly_storage_contribution[start:end], hourly_load[start:end],
-                                hourly_capacity[start:end], storage)
+                                hourly_capacity[start:end], storage, None if available is None else available[start:end])
             day += 1
     
     return
 
-def reliability_dispatch(hourly_storage_contribution, hourly_load, hourly_capacity, storage):
+def reliability_dispatch(hourly_storage_contribution, hourly_load, hourly_capacity, storage, available=None):
 # Disharge when load exceeds capacity, charge otherwise
     floating_point_buffer = 1e-6 # 1 W buffer to avoid false loss-of-loads
 
@@ -440,16 +1062,245 @@ def reliability_dispatch(hourly_storage_contribution, hourly_load, hourly_capaci
         if hourly_load[hour] > hourly_capacity[hour]:
             unmet_load = hourly_load[hour] - hourly_capacity[hour] + floating_point_buffer
             # discharge storage
-            hourly_storage_contribution[hour] = discharge_storage(unmet_load, storage)
+            hourly_storage_contribution[hour] = discharge_storage(unmet_load, storage, None if available is None else available[hour])
         # charge if surplus
         else:
             additional_capacity = hourly_capacity[hour] - hourly_load[hour] - floating_point_buffer
             # charge storage
-            hourly_storage_contribution[hour] = charge_storage(additional_capacity, storage)
+            hourly_storage_contribution[hour] = charge_storage(additional_capacity, storage, None if available is None else available[hour])
+
+    return
+
+def reliability_strategy_batch(hourly_capacity, hourly_load, storage, hourly_storage_contribution, first_iteration=0):
+# Charge/Discharge storage to greedily maximize reliability in every iteration at once. Same policy as reliability_strategy
+    floating_point_buffer = 1e-6 # 1 W buffer to avoid false loss-of-loads
+    num_hours, num_iterations = hourly_capacity.shape
+    num_days = num_hours // 24
+
+    # state of every unit in every iteration (storage begins full)
+    extractable_energy = np.ones((num_iterations, storage["num units"]))*storage["max energy"]
+    energy = extractable_energy / storage["one way efficiency"]
+    full = np.ones(num_iterations, dtype=bool)
+
+    # risk days and whether another risk day follows, shape(days, iterations)
+    risk_days = np.any((hourly_load[:,np.newaxis] > hourly_capacity)[:num_days*24].reshape(num_days,24,num_iterations),axis=1)
+    later_risk_days = np.zeros(risk_days.shape, dtype=bool)
+    later_risk_days[:-1] = np.cumsum(risk_days[::-1],axis=0)[::-1][1:] > 0
+
+    active = np.zeros(num_iterations, dtype=bool)
+
+    for day in np.arange(num_days):
+
+        # simulate risk days, and following days until storage is charged or the next risk day
+        active = risk_days[day] | (active & ~full & later_risk_days[day])
+        full[risk_days[day]] = False
+
+        if not np.any(active):
+            continue
+
+        iterations = np.flatnonzero(active)
+        available = get_daily_storage_availability(storage, num_iterations, day, first_iteration)
+
+        for hour in range(day*24, (day+1)*24):
+            capacity = hourly_capacity[hour,iterations]
+            unmet = hourly_load[hour] > capacity
+            surplus = capacity - hourly_load[hour] - floating_point_buffer >= 0
+            hour_available = None if available is None else available[iterations,hour-day*24]
+
+            # discharge if load is not met
+            discharging = iterations[unmet]
+            if discharging.size != 0:
+                u = discharge_storage_batch(hourly_load[hour] - capacity[unmet] + floating_point_buffer,
+                                            extractable_energy[discharging] / storage["max discharge rate"], storage,
+                                            None if hour_available is None else hour_available[unmet])
+                extractable_energy[discharging] -= u
+                energy[discharging] = extractable_energy[discharging] / storage["one way efficiency"]
+                hourly_storage_contribution[hour,discharging] = np.sum(u,axis=1)
+
+            # charge if surplus
+            charging = iterations[~unmet & surplus]
+            if charging.size != 0:
+                u = charge_storage_batch(   capacity[~unmet & surplus] - hourly_load[hour] - floating_point_buffer,
+                                            extractable_energy[charging] / storage["max discharge rate"], storage,
+                                            None if hour_available is None else hour_available[~unmet & surplus])
+                energy[charging] -= u * storage["one way efficiency"]
+                extractable_energy[charging] = energy[charging] * storage["one way efficiency"]
+                hourly_storage_contribution[hour,charging] = np.sum(u,axis=1)
+
+            # set storage state
+            updated = np.concatenate((discharging, charging))
+            full[updated] = np.sum(extractable_energy[updated],axis=1) == np.sum(storage["max energy"])
 
     return
 
-def discharge_storage(unmet_load, storage):
+def solve_piecewise_linear_impl(breakpoints, slope_changes, target):
+# For each row, find the smallest t where a nondecreasing piecewise linear function (zero before the first breakpoint) reaches target, or its maximum
+    order = np.argsort(breakpoints,axis=1)
+    breakpoints = np.take_along_axis(breakpoints,order,axis=1)
+    slopes = np.cumsum(np.take_along_axis(slope_changes,order,axis=1),axis=1) # slope after each breakpoint
+
+    # function value at each breakpoint
+    values = np.zeros(breakpoints.shape)
+    values[:,1:] = np.cumsum(slopes[:,:-1]*np.diff(breakpoints,axis=1),axis=1)
+    target = np.minimum(target, values[:,-1])
+
+    # first breakpoint at or above target, then interpolate on the segment before it
+    segment = np.maximum(np.argmax(values >= target[:,np.newaxis],axis=1) - 1, 0)
+    rows = np.arange(breakpoints.shape[0])
+    segment_slope = slopes[rows,segment]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = breakpoints[rows,segment] + np.where(   segment_slope > 0, 
+                                                    (target - values[rows,segment]) / segment_slope, 0)
+
+    return t
+
+def discharge_storage_batch(unmet_load, time_to_discharge, storage, available=None):
+# Discharge every iteration at once according to the policy proposed by Evans et.al. Returns power of shape(iterations, units)
+    p = np.atleast_1d(storage["max discharge rate"])
+    x = time_to_discharge
+
+    if STORAGE_KERNEL == "numba":
+        u = discharge_power_jit(unmet_load, x, p)
+    else:
+        u = discharge_power_impl(unmet_load, x, p)
+
+    # sampled outages, one draw per unit and hour (common random numbers pass pre-sampled availability)
+    if available is not None:
+        u *= available
+    elif storage["efor"] > 0:
+        u *= np.random.random_sample(x.shape)>storage["efor"]
+
+    return u
+
+def charge_storage_batch(additional_capacity, time_to_discharge, storage, available=None):
+# Charge every iteration at once according to the policy proposed by Evans et.al. Returns power of shape(iterations, units)
+    p_d = np.atleast_1d(storage["max discharge rate"])
+    n = np.atleast_1d(storage["roundtrip efficiency"])
+    x_max = storage["max energy"] / p_d
+    x = time_to_discharge
+
+    # time to discharge after charging at the maximum rate
+    z_max = np.minimum(x+n*storage["max charge rate"]/p_d, x_max)
+
+    if STORAGE_KERNEL == "numba":
+        u = charge_power_jit(additional_capacity, x, z_max, p_d/n)
+    else:
+        u = charge_power_impl(additional_capacity, x, z_max, p_d/n)
+
+    if available is not None:
+        u *= available
+    elif storage["efor"] > 0:
+        u *= np.random.random_sample(x.shape)>storage["efor"]
+
+    return u
+
+def discharge_power_impl(unmet_load, x, p):
+# Pre-outage discharge power of each unit, shape(iterations, units)
+    # in t = -z every unit ramps up between t = -x and t = 1-x. Discharge cannot go below z = 0
+    breakpoints = np.minimum(np.hstack((-x, 1-x)), 0)
+    slope_changes = np.broadcast_to(np.concatenate((p, -p)), breakpoints.shape)
+
+    t = solve_piecewise_linear_impl(breakpoints, slope_changes, unmet_load)
+
+    return p*np.clip(x+t[:,np.newaxis],0,1)
+
+def charge_power_impl(additional_capacity, x, z_max, charge_slope):
+# Pre-outage charge power of each unit, shape(iterations, units)
+    # every unit ramps up between its time to discharge and z_max
+    breakpoints = np.hstack((x, z_max))
+    slope_changes = np.broadcast_to(np.concatenate((charge_slope, -charge_slope)), breakpoints.shape)
+
+    z = solve_piecewise_linear_impl(breakpoints, slope_changes, additional_capacity)
+
+    return -1*charge_slope*np.maximum(np.minimum(z[:,np.newaxis],z_max)-x,0)
+
+@jit_impl
+def solve_piecewise_linear_jit(breakpoints, slope_changes, target):
+# Compiled version of solve_piecewise_linear_impl for a single row
+    order = np.argsort(breakpoints)
+
+    # maximum of the function is reached at the last breakpoint
+    value = 0.0
+    slope = 0.0
+    for j in range(1, order.size):
+        slope += slope_changes[order[j-1]]
+        value += slope*(breakpoints[order[j]]-breakpoints[order[j-1]])
+    target = min(target, value)
+
+    # walk segments until target is reached
+    t = breakpoints[order[0]]
+    value = 0.0
+    slope = 0.0
+    for j in range(order.size):
+        next_value = value + slope*(breakpoints[order[j]]-t)
+        if next_value >= target:
+            if slope > 0:
+                return t + (target-value)/slope
+            return t
+        value = next_value
+        t = breakpoints[order[j]]
+        slope += slope_changes[order[j]]
+
+    return t
+
+@jit_impl
+def discharge_power_jit(unmet_load, x, p):
+# Compiled version of discharge_power_impl, one iteration at a time
+    num_rows, num_units = x.shape
+    u = np.empty((num_rows, num_units))
+    breakpoints = np.empty(2*num_units)
+    slope_changes = np.empty(2*num_units)
+
+    for row in range(num_rows):
+        # empty units do not contribute breakpoints
+        m = 0
+        for unit in range(num_units):
+            if x[row,unit] > 0:
+                breakpoints[m] = -x[row,unit]
+                breakpoints[m+1] = min(1.0-x[row,unit], 0.0)
+                slope_changes[m] = p[unit]
+                slope_changes[m+1] = -p[unit]
+                m += 2
+
+        t = -np.inf
+        if m != 0:
+            t = solve_piecewise_linear_jit(breakpoints[:m], slope_changes[:m], unmet_load[row])
+
+        for unit in range(num_units):
+            u[row,unit] = p[unit]*min(max(x[row,unit]+t, 0.0), 1.0)
+
+    return u
+
+@jit_impl
+def charge_power_jit(additional_capacity, x, z_max, charge_slope):
+# Compiled version of charge_power_impl, one iteration at a time
+    num_rows, num_units = x.shape
+    u = np.empty((num_rows, num_units))
+    breakpoints = np.empty(2*num_units)
+    slope_changes = np.empty(2*num_units)
+
+    for row in range(num_rows):
+        # full units do not contribute breakpoints
+        m = 0
+        for unit in range(num_units):
+            if z_max[row,unit] > x[row,unit]:
+                breakpoints[m] = x[row,unit]
+                breakpoints[m+1] = z_max[row,unit]
+                slope_changes[m] = charge_slope[unit]
+                slope_changes[m+1] = -charge_slope[unit]
+                m += 2
+
+        z = -np.inf
+        if m != 0:
+            z = solve_piecewise_linear_jit(breakpoints[:m], slope_changes[:m], additional_capacity[row])
+
+        for unit in range(num_units):
+            u[row,unit] = -charge_slope[unit]*max(min(z, z_max[row,unit])-x[row,unit], 0.0)
+
+    return u
+
+def discharge_storage(unmet_load, storage, available=None):
 # Discharge according to optimal policy proposed by Evans et.al.
     P_r = unmet_load
     p = storage["max discharge rate"]
@@ -476,9 +1327,12 @@ def discharge_storage(unmet_load, storage):
         z = y[i-1] + (P_r - E_min)/(E_max - E_min)*(y[i]-y[i-1])
         
     
-    u = p*np.maximum(np.minimum(x-z,1),0) * (np.random.random_sample(x.shape)>storage["efor"])
+    u = p*np.maximum(np.minimum(x-z,1),0)
 
-    if storage["efor"] > 0:
+    # sampled outages, one draw per unit and hour (common random numbers pass pre-sampled availability)
+    if available is not None:
+        u *= available
+    elif storage["efor"] > 0:
         u *= np.random.random_sample(x.shape)>storage["efor"]
 
     #update storage 
@@ -487,7 +1341,7 @@ def discharge_storage(unmet_load, storage):
 
     return np.sum(storage["power"])
 
-def charge_storage(additional_capacity, storage):
+def charge_storage(additional_capacity, storage, available=None):
 # Charge according to policy proposed by Evans et.al. 
     P_r = -additional_capacity
     p_c = -storage["max charge rate"]
@@ -525,7 +1379,9 @@ def charge_storage(additional_capacity, storage):
     
     u = -1*p_d/n*np.maximum(np.minimum(z,z_max)-x,0)
 
-    if storage["efor"] > 0:
+    if available is not None:
+        u *= available
+    elif storage["efor"] > 0:
         u *= np.random.random_sample(x.shape)>storage["efor"]
         
     #update storage 
@@ -551,37 +1407,32 @@ def update_storage(storage, status):
 
     return
 
-def calculate_fors(total_efor_array, simplified_tech_list, benchmark_fors,hourly_temp_data):  
-# Compute the FOR given an input of temperatures and a specific technology type
-
-    #rounding values to nearest 5 degree due to known for table being given in increments of 5 and rounding to known values
-    hourly_temp_data = (5 * np.round(hourly_temp_data/5))
-    hourly_temp_data = (np.where(hourly_temp_data > 35,35,hourly_temp_data))
-    hourly_temp_data = (np.where(hourly_temp_data < -15,-15,hourly_temp_data))
-    
-    #finds index of where each rounded temperature would be inserted on temperature array(-15 -> 35)
-    temperature_indices = np.searchsorted(benchmark_fors["Temperature"], hourly_temp_data)
+def calculate_fors(total_efor_array, simplified_tech_list, benchmark_fors,temperature_indices):  
+# Compute the FOR given temperature bins and a specific technology type for each row
     
     for tech in np.unique(simplified_tech_list):
         if tech == '0.0':
             benchmark_for_keyword = "Other"
         else:
             benchmark_for_keyword = tech
-        total_efor_array =  np.where(simplified_tech_list == tech,benchmark_fors[benchmark_for_keyword][temperature_indices[:]]/100,total_efor_array)
-    
-    #TESTING
-    #print("Average annual temperature dependent FOR: " + str(np.average(total_efor_array)))
+        rows = simplified_tech_list == tech
+        total_efor_array[rows] = benchmark_fors[benchmark_for_keyword][temperature_indices[rows]]/100
     
     return total_efor_array
 
-def get_tech_efor_round_downs(simplified_tech_list, latitudes, longitudes,temperature_data,benchmark_fors):
-# Create total forced outage rate for all the generators in desired region's fleet    
-    total_efor_array = np.zeros((len(simplified_tech_list),8760))
-    hourly_temp_data = temperature_data[longitudes,latitudes]
+def get_tech_efor_round_downs(simplified_tech_list, latitudes, longitudes,temperature_bins,benchmark_fors):
+# Create forced outage rates for the unique (grid cell, technology) groups of the fleet, of shape (groups, 8760 hrs),
+# and the group of each generator
+    group_keys = np.char.add(np.char.add(longitudes.astype(str),","),np.char.add(latitudes.astype(str),","))
+    group_keys = np.char.add(group_keys,np.asarray(simplified_tech_list).astype(str))
+    _, group_generators, efor_index = np.unique(group_keys, return_index=True, return_inverse=True)
 
-    simplified_tech_list = np.array([simplified_tech_list,]*8760).T
+    total_efor_array = np.zeros((group_generators.size,8760))
+    temperature_indices = np.asarray(temperature_bins[longitudes[group_generators],latitudes[group_generators]])
+
+    total_efor_array = calculate_fors(total_efor_array, np.asarray(simplified_tech_list)[group_generators], benchmark_fors, temperature_indices)
     
-    return calculate_fors(total_efor_array, simplified_tech_list, benchmark_fors, hourly_temp_data)
+    return total_efor_array, efor_index.reshape(-1)
 
 def find_desired_tech_indices(desired_tech_list,generator_technology):
 # Function used to convert technologies of all generators into 6 known for technology relationships
@@ -592,7 +1443,7 @@ def find_desired_tech_indices(desired_tech_list,generator_technology):
         simplified_tech_list = np.where((generator_technology[specific_tech].fillna(0).values).flatten() != 0,tech_type,simplified_tech_list) 
     return simplified_tech_list
 
-def get_temperature_dependent_efor(latitudes,longitudes,technology,temperature_data,benchmark_fors):
+def get_temperature_dependent_efor(latitudes,longitudes,technology,temperature_bins,benchmark_fors):
 # Create main tech list where all the other different types of tech are divided into 6 main known temperature-FOR relatonship 
     total_tech_list = dict()
     total_tech_list["CC"] = np.array(["Natural Gas Fired Combined Cycle"])
@@ -604,9 +1455,9 @@ def get_temperature_dependent_efor(latitudes,longitudes,technology,temperature_d
                    "Hydroelectric Pumped Storage","Solar Thermal with Energy Storage","Wood/Wood Waste Biomass"])
     simplified_tech_list = find_desired_tech_indices(total_tech_list,technology)
 
-    return get_tech_efor_round_downs(simplified_tech_list,latitudes,longitudes,temperature_data,benchmark_fors)
+    return get_tech_efor_round_downs(simplified_tech_list,latitudes,longitudes,temperature_bins,benchmark_fors)
 
-def get_conventional_fleet_impl(plants,active_generators,system_preferences,temperature_data, year,powGen_lats,powGen_lons,benchmark_fors):
+def get_conventional_fleet_impl(plants,active_generators,system_preferences,temperature_bins, year,grid_index,benchmark_fors):
 # Filter generators for operation status, technology, year of simulation
 
     # filtering
@@ -621,9 +1472,7 @@ def get_conventional_fleet_impl(plants,active_generators,system_preferences,temp
                                                     active_generators["Nameplate Capacity (MW)"], inplace=True)
     
     #getting lats and longs correct indices
-    plants.set_index("Plant Code",inplace=True)
-    latitudes = find_nearest_impl(plants["Latitude"][active_generators["Plant Code"]].values,powGen_lats)
-    longitudes = find_nearest_impl(plants["Longitude"][active_generators["Plant Code"]].values,powGen_lons)
+    latitudes, longitudes = lookup_grid_index(grid_index, active_generators["Plant Code"].values)
 
     # Convert Dataframe to Dictionary of numpy arrays
     conventional_generators = dict()
@@ -633,11 +1482,14 @@ def get_conventional_fleet_impl(plants,active_generators,system_preferences,temp
     conventional_generators["winter nameplate"] = active_generators["Winter Capacity (MW)"].values
     conventional_generators["year"] = active_generators["Operating Year"].values
     conventional_generators["technology"] = active_generators["Technology"].values
+    conventional_generators["unit id"] = np.arange(conventional_generators["num units"])
     if(system_preferences["temperature dependent FOR"]):
-        conventional_generators["efor"] = get_temperature_dependent_efor(latitudes,longitudes, active_generators["Technology"].values,temperature_data,benchmark_fors)
+        # generators share rows of "efor" through "efor index"
+        conventional_generators["efor"], conventional_generators["efor index"] = get_temperature_dependent_efor(latitudes,longitudes, active_generators["Technology"].values,temperature_bins,benchmark_fors)
         if not (system_preferences["temperature dependent FOR indpendent of size"]):
             print("Removed temperature dependency FORs for generators smaller then 20 MW")
-            conventional_generators["efor"] = np.where(np.array([conventional_generators["nameplate"],]*8760).T <= 20,system_preferences["conventional efor"],conventional_generators["efor"])
+            conventional_generators["efor"] = np.vstack((conventional_generators["efor"],np.ones((1,8760))*system_preferences["conventional efor"]))
+            conventional_generators["efor index"] = np.where(conventional_generators["nameplate"] <= 20,len(conventional_generators["efor"])-1,conventional_generators["efor index"])
     else:
         conventional_generators["efor"] = np.ones(conventional_generators["nameplate"].size) * system_preferences["conventional efor"]                                  
     # Error Handling
@@ -648,7 +1500,7 @@ def get_conventional_fleet_impl(plants,active_generators,system_preferences,temp
     
     return conventional_generators
 
-def get_conventional_fleet(eia_folder, regions, year, system_preferences,powGen_lats,powGen_lons,temperature_data,benchmark_fors):
+def get_conventional_fleet(eia_folder, regions, year, system_preferences,powGen_lats,powGen_lons,temperature_bins,benchmark_fors,fleet_loader=None):
     """ Retrieve all active conventional generators
 
     ...
@@ -667,28 +1519,22 @@ def get_conventional_fleet(eia_folder, regions, year, system_preferences,powGen_
 
     `powGen_lons` (ndarray): vector of longitudes to map temperature data to
     
-    `temperature_data` (ndarray): array of temperatures in Celsius to map generators to. Dimensions correspond to 'powGen_lats' and 'powGen_lons'
+    `temperature_bins` (ndarray): array of temperature bins from `get_temperature_bins` to map generators to. Dimensions correspond to 'powGen_lons' and 'powGen_lats'
 
     `benchmark_fors` (ndarray): array of temperature-dependent FORs for different generator technologies
 
+    `fleet_loader` (dict): plants of the region(s) from `get_fleet_loader`, read here if not given
+
     """
 
-    # Open files
-    plants = pd.read_excel(eia_folder+"2___Plant_Y"+str(year)+".xlsx",skiprows=1,usecols=["Plant Code","NERC Region","Latitude",
-                                                                                "Longitude","Balancing Authority Code"])
-    all_conventional_generators = pd.read_excel(eia_folder+"3_1_Generator_Y"+str(year)+".xlsx",skiprows=1,\
-                                                    usecols=["Plant Code","Generator ID","Technology","Nameplate Capacity (MW)","Status",
-                                                            "Operating Year", "Summer Capacity (MW)", "Winter Capacity (MW)"])
-    # Sort by NERC Region and Balancing Authority to filter correct plant codes
-    nerc_region_plant_codes = plants["Plant Code"][plants["NERC Region"].isin(regions)].values
-    balancing_authority_plant_codes = plants["Plant Code"][plants["Balancing Authority Code"].isin(regions)].values
-    
-    desired_plant_codes = np.concatenate((nerc_region_plant_codes, balancing_authority_plant_codes))
+    if fleet_loader is None:
+        fleet_loader = get_fleet_loader(eia_folder, regions, year)
+    plants = fleet_loader["plants"]
+    desired_plant_codes = fleet_loader["desired plant codes"]
 
-    # Error Handling
-    if desired_plant_codes.size == 0:
-        error_message = "Invalid region(s): " + str(regions)
-        raise RuntimeError(error_message)
+    # Open files
+    all_conventional_generators = read_eia_table(eia_folder,"3_1_Generator",year,["Plant Code","Generator ID","Technology","Nameplate Capacity (MW)","Status",
+                                                                                  "Operating Year", "Summer Capacity (MW)", "Winter Capacity (MW)"])
 
     # Get operating generators
     active_generators = all_conventional_generators[(all_conventional_generators["Plant Code"].isin(desired_plant_codes))]
@@ -696,9 +1542,11 @@ def get_conventional_fleet(eia_folder, regions, year, system_preferences,powGen_
     # Get partially-owned plants
     active_generators = add_partial_ownership_generators(eia_folder, regions, year, active_generators, all_conventional_generators,True)
     
-    return get_conventional_fleet_impl(plants,active_generators,system_preferences,temperature_data,year,powGen_lats,powGen_lons,benchmark_fors)
+    grid_index = get_plant_grid_index(fleet_loader, powGen_lats, powGen_lons)
+
+    return get_conventional_fleet_impl(plants,active_generators,system_preferences,temperature_bins,year,grid_index,benchmark_fors)
     
-def get_RE_fleet_impl(eia_folder, regions, year, plants, RE_generators, desired_plant_codes, RE_efor, renewable_multiplier):
+def get_RE_fleet_impl(eia_folder, regions, year, plants, RE_generators, desired_plant_codes, RE_efor, renewable_multiplier, grid_index):
 # Filter generators for operation status, and map generators to powGen coordinates
 
     # Get generators in region
@@ -729,11 +1577,13 @@ def get_RE_fleet_impl(eia_folder, regions, year, plants, RE_generators, desired_
     RE_generators["winter nameplate"] = active_generators["Winter Capacity (MW)"].values * renewable_multiplier
     RE_generators["lat"] = latitudes
     RE_generators["lon"] = longitudes
+    RE_generators["lat idx"], RE_generators["lon idx"] = lookup_grid_index(grid_index, active_generators["Plant Code"].values)
     RE_generators["efor"] = np.ones(RE_generators["nameplate"].size) * RE_efor 
+    RE_generators["unit id"] = np.arange(RE_generators["num units"])
 
     return RE_generators
 
-def get_solar_and_wind_fleet(eia_folder, regions, year, RE_efor, powGen_lats, powGen_lons, renewable_multiplier):
+def get_solar_and_wind_fleet(eia_folder, regions, year, RE_efor, powGen_lats, powGen_lons, renewable_multiplier, fleet_loader=None):
     """ Retrieve all active wind and solar generators
 
     ...
@@ -748,41 +1598,36 @@ def get_solar_and_wind_fleet(eia_folder, regions, year, RE_efor, powGen_lats, po
 
     `RE_efor` (float): Forced outage rate for solar and wind generators
     
-    `powGen_lats` (ndarray): vector of latitudes corresponding to capacity factor array
+    `powGen_lats` (ndarray): vector of latitudes corresponding to capacity factor array, or latitude of every cell of an irregular grid
 
-    `powGen_lons` (ndarray): vector of longitudes corresponding to capacity factor array
+    `powGen_lons` (ndarray): vector of longitudes corresponding to capacity factor array, or longitude of every cell of an irregular grid
+
+    `fleet_loader` (dict): plants of the region(s) from `get_fleet_loader`, read here if not given
     """
 
+    if fleet_loader is None:
+        fleet_loader = get_fleet_loader(eia_folder, regions, year)
+    plants = fleet_loader["plants"]
+    desired_plant_codes = fleet_loader["desired plant codes"]
+
     # Open files
-    plants = pd.read_excel(eia_folder+"2___Plant_Y"+str(year)+".xlsx",skiprows=1,usecols=[  "Plant Code","NERC Region","Latitude",
-                                                                                            "Longitude","Balancing Authority Code"])
-    all_solar_generators = pd.read_excel(eia_folder+"3_3_Solar_Y"+str(year)+".xlsx",skiprows=1,\
-                                usecols=["Plant Code","Generator ID","Nameplate Capacity (MW)",
-                                        "Summer Capacity (MW)", "Winter Capacity (MW)",
-                                        "Status","Operating Year"])
-    all_wind_generators = pd.read_excel(eia_folder+"3_2_Wind_Y"+str(year)+".xlsx",skiprows=1,\
-                                usecols=["Plant Code","Generator ID","Nameplate Capacity (MW)",
-                                        "Summer Capacity (MW)", "Winter Capacity (MW)",
-                                        "Status","Operating Year"])
-
-     # Sort by NERC Region and Balancing Authority to filter correct plant codes
-    nerc_region_plant_codes = plants["Plant Code"][plants["NERC Region"].isin(regions)].values
-    balancing_authority_plant_codes = plants["Plant Code"][plants["Balancing Authority Code"].isin(regions)].values
-    
-    desired_plant_codes = np.concatenate((nerc_region_plant_codes, balancing_authority_plant_codes))
+    all_solar_generators = read_eia_table(eia_folder,"3_3_Solar",year,["Plant Code","Generator ID","Nameplate Capacity (MW)",
+                                                                       "Summer Capacity (MW)", "Winter Capacity (MW)",
+                                                                       "Status","Operating Year"])
+    all_wind_generators = read_eia_table(eia_folder,"3_2_Wind",year,["Plant Code","Generator ID","Nameplate Capacity (MW)",
+                                                                     "Summer Capacity (MW)", "Winter Capacity (MW)",
+                                                                     "Status","Operating Year"])
+
+    # lat,lon indices of every plant
+    grid_index = get_plant_grid_index(fleet_loader, powGen_lats, powGen_lons)
 
     # Repeat process for solar and wind
-    plants.set_index("Plant Code",inplace=True)
-    solar_generators = get_RE_fleet_impl(eia_folder,regions,year,plants,all_solar_generators,desired_plant_codes,RE_efor,renewable_multiplier)
-    wind_generators = get_RE_fleet_impl(eia_folder,regions,year,plants,all_wind_generators,desired_plant_codes,RE_efor,renewable_multiplier)
+    solar_generators = get_RE_fleet_impl(eia_folder,regions,year,plants,all_solar_generators,desired_plant_codes,RE_efor,renewable_multiplier,grid_index)
+    wind_generators = get_RE_fleet_impl(eia_folder,regions,year,plants,all_wind_generators,desired_plant_codes,RE_efor,renewable_multiplier,grid_index)
 
     solar_generators["generator type"] = "solar"
     wind_generators["generator type"] = "wind"
 
-    # Process for lat,lon indices
-    solar_generators = get_cf_index(solar_generators,powGen_lats,powGen_lons)
-    wind_generators = get_cf_index(wind_generators,powGen_lats,powGen_lons)
-
     return solar_generators, wind_generators
 
 def add_partial_ownership_generators(eia_folder,regions,year,generators,all_generators,print_utilities=False):
@@ -801,8 +1646,8 @@ def add_partial_ownership_generators(eia_folder,regions,year,generators,all_gene
         return generators
 
     # EIA 860 schedule 4
-    owners = pd.read_excel(eia_folder+"4___Owner_Y"+str(year)+".xlsx",skiprows=1,usecols=[  "Plant Code","Generator ID",
-                                                                                            "Status","Owner Name","Percent Owned"])
+    owners = read_eia_table(eia_folder,"4___Owner",year,["Plant Code","Generator ID",
+                                                         "Status","Owner Name","Percent Owned"])
 
     # filtering
     owners = owners[owners["Owner Name"].isin(utilities)]
@@ -834,16 +1679,107 @@ def add_partial_ownership_generators(eia_folder,regions,year,generators,all_gene
     return generators
 
 def find_nearest_impl(actual_coordinates, discrete_coordinates):
-# Find index of nearest coordinate for vector of coordinates   
-    indices = []
-    for coord in actual_coordinates:
-        indices.append((np.abs(coord-discrete_coordinates)).argmin())
-    return np.array(indices)
+# Find index of nearest coordinate for vector of coordinates. Ties go to the lower index and nan to 0, as with argmin
+    actual_coordinates = np.asarray(actual_coordinates, dtype=float)
+    discrete_coordinates = np.asarray(discrete_coordinates, dtype=float)
+
+    if discrete_coordinates.size == 1:
+        return np.zeros(actual_coordinates.size, dtype=int)
+
+    # the nearest coordinate is one of the two neighbors in the sorted grid
+    order = np.argsort(discrete_coordinates, kind="stable")
+    sorted_coordinates = discrete_coordinates[order]
+    right = np.clip(np.searchsorted(sorted_coordinates, actual_coordinates), 1, sorted_coordinates.size-1)
+    left = right - 1
+
+    left_distance = np.abs(actual_coordinates-sorted_coordinates[left])
+    right_distance = np.abs(actual_coordinates-sorted_coordinates[right])
+
+    indices = np.where(right_distance < left_distance, order[right], order[left])
+    indices = np.where(right_distance == left_distance, np.minimum(order[left], order[right]), indices)
+    indices = np.where(np.isnan(actual_coordinates), 0, indices)
+    return indices
+
+def find_nearest_cells_impl(points, cells):
+# Find index of the nearest cell for each (lat, lon) point, with a KD-tree of the cells when scipy is installed. Points with nan go to 0
+    points = np.asarray(points, dtype=float)
+    indices = np.zeros(points.shape[0], dtype=int)
+    valid = ~np.any(np.isnan(points), axis=1)
+
+    if cKDTree is not None:
+        indices[valid] = cKDTree(cells).query(points[valid])[1]
+        return indices
+
+    # without scipy, compare blocks of points with every cell
+    valid_points = np.flatnonzero(valid)
+    block = max(int(MEMORY_BUDGET // max(cells.size*8,1)), 1)
+    for first in range(0, valid_points.size, block):
+        block_points = valid_points[first:first+block]
+        distance = np.sum((points[block_points,np.newaxis,:] - cells[np.newaxis,:,:])**2, axis=2)
+        indices[block_points] = np.argmin(distance, axis=1)
+    return indices
+
+def get_grid_index_impl(latitudes, longitudes, powGen_lats, powGen_lons):
+# Indices (lat idx, lon idx) of the capacity factor cell nearest to each coordinate. Rectilinear grids (vectors of latitudes and 
+# longitudes) are searched one axis at a time. Irregular grids (latitude and longitude of every cell) search all cell centers
+    if np.ndim(powGen_lats) == 1:
+        return find_nearest_impl(latitudes, powGen_lats).astype(int), find_nearest_impl(longitudes, powGen_lons).astype(int)
+
+    cells = np.column_stack((np.ravel(powGen_lats), np.ravel(powGen_lons))).astype(float)
+    points = np.column_stack((np.ravel(latitudes), np.ravel(longitudes)))
+    lat_idx, lon_idx = np.unravel_index(find_nearest_cells_impl(points, cells), np.shape(powGen_lats))
+    return lat_idx.astype(int), lon_idx.astype(int)
+
+def get_grid_index_cache_file(eia_folder, year, powGen_lats, powGen_lons):
+# Plant grid indices of one EIA year and capacity factor grid, kept in the cache folder beside the workbooks. Grids are told apart
+# by a hash of their coordinates
+    grid_hash = hashlib.sha1()
+    for coordinates in [powGen_lats, powGen_lons]:
+        coordinates = np.ascontiguousarray(coordinates, dtype=float)
+        grid_hash.update(str(coordinates.shape).encode())
+        grid_hash.update(coordinates.tobytes())
+    return path.join(eia_folder, "cache", "grid_index_Y"+str(year)+"_"+grid_hash.hexdigest()[:16]+".npz")
+
+def get_plant_grid_index(fleet_loader, powGen_lats, powGen_lons):
+# Capacity factor cell of every plant of the EIA year, as sorted "plant codes" and their "lat idx" and "lon idx". The mapping is found 
+# once per EIA year and grid, and saved (with the plant workbook's modification time) for later runs
+    plant_file = get_eia_file(fleet_loader["eia folder"], "2___Plant", fleet_loader["year"])
+    cache_file = get_grid_index_cache_file(fleet_loader["eia folder"], fleet_loader["year"], powGen_lats, powGen_lons)
+    source_mtime = path.getmtime(plant_file) if path.exists(plant_file) else None
+
+    if path.exists(cache_file):
+        with np.load(cache_file) as cache:
+            if source_mtime is None or cache["source mtime"] == source_mtime:
+                return {key : cache[key] for key in ["plant codes", "lat idx", "lon idx"]}
+
+    plants = fleet_loader["plants"]
+    order = np.argsort(plants.index.values, kind="stable")
+    grid_index = dict()
+    grid_index["plant codes"] = plants.index.values[order]
+    # some plants of the workbook have no coordinates
+    latitudes = pd.to_numeric(plants["Latitude"], errors="coerce").values[order]
+    longitudes = pd.to_numeric(plants["Longitude"], errors="coerce").values[order]
+    grid_index["lat idx"], grid_index["lon idx"] = get_grid_index_impl(latitudes, longitudes, powGen_lats, powGen_lons)
+
+    # write then rename so concurrent jobs never read a partial mapping. Runs without write access find the mapping each time
+    try:
+        os.makedirs(path.dirname(cache_file), exist_ok=True)
+        with open(cache_file+"."+str(os.getpid()), "wb") as f:
+            np.savez(f, **{"source mtime" : -1.0 if source_mtime is None else source_mtime}, **grid_index)
+        os.replace(cache_file+"."+str(os.getpid()), cache_file)
+    except OSError:
+        print("Could not save plant grid indices:",cache_file)
+
+    return grid_index
+
+def lookup_grid_index(grid_index, plant_codes):
+# Capacity factor cell (lat idx, lon idx) of each plant code, from get_plant_grid_index
+    position = np.searchsorted(grid_index["plant codes"], plant_codes)
+    return grid_index["lat idx"][position], grid_index["lon idx"][position]
 
 def get_cf_index(RE_generators, powGen_lats, powGen_lons):
 # Convert the latitudes and longitudes of the vg into indices for capacity factor matrix
-    RE_generators["lat idx"] = find_nearest_impl(RE_generators["lat"], powGen_lats).astype(int)
-    RE_generators["lon idx"] = find_nearest_impl(RE_generators["lon"], powGen_lons).astype(int)
+    RE_generators["lat idx"], RE_generators["lon idx"] = get_grid_index_impl(RE_generators["lat"], RE_generators["lon"], powGen_lats, powGen_lons)
 
     return RE_generators
 
@@ -856,8 +1792,7 @@ def get_hourly_RE_impl(RE_generators, cf):
     RE_nameplate = np.vstack((RE_winter_nameplate,RE_summer_nameplate,RE_winter_nameplate))
 
     # multiply by variable hourly capacity factor
-    hours = np.tile(np.arange(8760),(RE_generators["nameplate"].size,1)).T # shape(8760 hrs, num generators)
-    RE_capacity = np.multiply(RE_nameplate, cf[RE_generators["lat idx"], RE_generators["lon idx"], hours])
+    RE_capacity = np.multiply(RE_nameplate, get_cf_cells(cf, RE_generators["lat idx"], RE_generators["lon idx"]))
     return RE_capacity
 
 def get_RE_profile_for_storage(cf, *generators):
@@ -867,25 +1802,148 @@ def get_RE_profile_for_storage(cf, *generators):
         renewable_profile = np.add(renewable_profile,np.sum(get_hourly_RE_impl(generator,cf[generator["generator type"]]),axis=1))
     return renewable_profile
 
-def sample_outages_impl(num_iterations, pre_outage_capacity, generators):
-# Get hourly capacity matrix for a generator by sampling outage rates over all hours/iterations. Of shape (8760 hrs, num iterations)
-    hourly_capacity = np.zeros((8760,num_iterations))
-    # otherwise sample outages and add generator contribution
-    max_iterations = 2000 // generators["nameplate"].size # the largest # of iterations to compute at one time (solve memory issues)
-    if max_iterations == 0: 
-        max_iterations = 1
-    for i in range(num_iterations // max_iterations):
-        for_matrix = np.random.random_sample((max_iterations,8760,generators["nameplate"].size))>(generators["efor"].T) # shape(its,hours,generators)
-        capacity = np.sum(np.multiply(pre_outage_capacity,for_matrix),axis=2).T # shape(its,hours).T -> shape(hours,its)
-        hourly_capacity[:,i*max_iterations:(i+1)*max_iterations] = capacity 
-    if num_iterations % max_iterations != 0:
-        remaining_iterations = num_iterations % max_iterations
-        for_matrix = np.random.random_sample((remaining_iterations,8760,generators["nameplate"].size))>(generators["efor"].T)
-        capacity = np.sum(np.multiply(pre_outage_capacity,for_matrix),axis=2).T
-        hourly_capacity[:,-remaining_iterations:] = capacity
+def get_hourly_efor(generators, hours=None):
+# Arrange forced outage rates for broadcasting against a (hours, generators) capacity array. Of shape (8760 hrs or 1, num generators)
+    efor = np.asarray(generators["efor"])
+
+    # temperature dependent forced outage rates are stored as shape(num groups, 8760 hrs), one group per generator in "efor index"
+    if efor.ndim == 2:
+        if hours is not None:
+            efor = efor[:,hours]
+        if "efor index" in generators:
+            efor = efor[generators["efor index"]]
+        return efor.T
+    
+    return efor.reshape(1,-1)
+
+def get_sampling_blocks(num_iterations, num_hours, num_generators):
+# Find the largest (iterations, generators) block of outage draws that fits within the memory budget
+    max_draws = max(int(MEMORY_BUDGET // SAMPLING_BYTES_PER_DRAW), 1)
+    num_hours = max(num_hours, 1)
+
+    # prefer sampling every iteration at once, then split the fleet into generator blocks
+    iteration_block = int(min(num_iterations, max(max_draws // num_hours, 1)))
+    generator_block = int(min(num_generators, max(max_draws // (num_hours * iteration_block), 1)))
+
+    return iteration_block, generator_block
+
+def get_random_stream(generator_type, *keys):
+# Counter-based random stream keyed by seed, generator type, and unit (and day). Identical keys always give identical draws
+    seed_sequence = np.random.SeedSequence([RANDOM_SEED, RANDOM_STREAM_TYPES[generator_type]] + [int(key) for key in keys])
+    return np.random.Generator(np.random.Philox(seed_sequence))
+
+def get_unit_streams(generators, first_generator, last_generator, num_skipped_draws=0):
+# One random stream per generator for common random numbers, advanced past draws of earlier iterations. None if common random numbers are disabled
+    if not COMMON_RANDOM_NUMBERS:
+        return None
+
+    generator_type = generators.get("generator type", "conventional")
+    unit_ids = np.atleast_1d(generators.get("unit id", np.arange(generators["nameplate"].size)))
+
+    streams = [get_random_stream(generator_type, unit_id) for unit_id in unit_ids[first_generator:last_generator]]
+    for stream in streams:
+        skip_draws_impl(stream, num_skipped_draws)
+
+    return streams
+
+def skip_draws_impl(stream, num_draws):
+# Advance a stream as if num_draws doubles had been drawn (Philox produces four per counter step)
+    stream.bit_generator.advance(num_draws // 4)
+    if num_draws % 4:
+        stream.random(num_draws % 4)
+
+    return
+
+def draw_uniform_impl(shape, streams=None):
+# Draw uniform samples of shape(generators, ...) from the global generator or from one stream per generator
+    if streams is None:
+        return np.random.random_sample(shape)
+
+    uniform = np.empty(shape)
+    for unit, stream in enumerate(streams):
+        stream.random(out=uniform[unit])
+    return uniform
+
+def get_biased_efor(efor, generator_capacity):
+# Forced outage rates used to draw outages for importance sampling. Rates are exponentially tilted toward loss-of-load, so the
+# expected outage of the generators grows by IMPORTANCE_SAMPLING_SHIFT standard deviations each hour. Large units are biased the
+# most and small units barely, which keeps the likelihood ratios of large fleets from degenerating. Of shape(generators, hours)
+    outage_std = np.sqrt(np.sum(generator_capacity**2 * efor * (1-efor), axis=0))
+    tilt = IMPORTANCE_SAMPLING_SHIFT / np.maximum(outage_std, 1e-9)
+
+    outage_odds = efor * np.exp(np.minimum(tilt * generator_capacity, 50))
+    biased_efor = outage_odds / (1 - efor + outage_odds)
+
+    return np.maximum(np.minimum(biased_efor, IMPORTANCE_SAMPLING_MAX_EFOR), efor)
+
+def get_log_likelihood_ratios(efor, biased_efor):
+# Log ratio of nominal to biased probability for an outage and for an available unit
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_outage = np.where(efor > 0, np.log(efor/biased_efor), 0)
+        log_available = np.where(efor < 1, np.log((1-efor)/(1-biased_efor)), 0)
+
+    return log_outage, log_available
+
+def sample_outages_impl(num_iterations, pre_outage_capacity, generators, hours=None, log_weights=None, first_iteration=0, out=None, streams=None):
+# Get hourly capacity matrix for a generator by sampling outage rates over all hours/iterations. Of shape (8760 hrs or num hours, num iterations)
+# Capacity is added to out in place when given (any capacity dtype), one block of draws at a time. Optional streams (one per generator,
+# drawn in iteration order) replace the global generator and common random numbers
+    num_hours, num_generators = pre_outage_capacity.shape
+    hourly_efor = get_hourly_efor(generators, hours).T # shape(generators, hours or 1)
+    generator_capacity = np.ascontiguousarray(pre_outage_capacity.T) # shape(generators, hours)
+    hourly_capacity = np.zeros((num_hours,num_iterations)) if out is None else out
+
+    # importance sampling draws outages at biased rates and adds each draw's log likelihood ratio to log_weights in place
+    sampling_efor = hourly_efor
+    if log_weights is not None:
+        sampling_efor = get_biased_efor(hourly_efor, generator_capacity)
+        log_outage, log_available = get_log_likelihood_ratios(hourly_efor, sampling_efor)
+        log_outage = np.broadcast_to(log_outage, (num_generators, num_hours))
+        log_difference = np.ascontiguousarray(np.broadcast_to(log_available, (num_generators, num_hours)) - log_outage)
+
+    iteration_block, generator_block = get_sampling_blocks(num_iterations, num_hours, num_generators)
+
+    # accumulate available capacity one block of draws at a time. Each block of iterations is summed over the fleet in double
+    # precision and added to the (possibly compact) capacity matrix once
+    for block_start in range(0, num_iterations, iteration_block):
+        block_end = min(block_start + iteration_block, num_iterations)
+        block_capacity = np.zeros((block_end-block_start, num_hours))
+
+        for first_generator in range(0, num_generators, generator_block):
+            last_generator = min(first_generator + generator_block, num_generators)
+
+            # with common random numbers each generator draws its iterations in order from its own stream, 
+            # advanced past the draws of all earlier iterations (of this and earlier workers)
+            if streams is None:
+                block_streams = get_unit_streams(generators, first_generator, last_generator, (first_iteration + block_start)*num_hours)
+            else:
+                block_streams = streams[first_generator:last_generator]
+
+            uniform = draw_uniform_impl((last_generator-first_generator, block_end-block_start, num_hours), block_streams)
+            for_matrix = uniform > sampling_efor[first_generator:last_generator,np.newaxis,:] # shape(generators,its,hours)
+            block_capacity += np.einsum('gih,gh->ih', for_matrix, generator_capacity[first_generator:last_generator])
+            
+            if log_weights is not None:
+                log_weights[:,block_start:block_end] += (np.einsum('gih,gh->ih', for_matrix, log_difference[first_generator:last_generator])
+                                                            + np.sum(log_outage[first_generator:last_generator],axis=0)).T
+
+        add_capacity_impl(hourly_capacity[:,block_start:block_end], block_capacity.T)
+
     return hourly_capacity
 
-def get_hourly_capacity(num_iterations, generators, cf=None):
+def get_pre_outage_capacity(generators, cf=None):
+# Find hourly capacity of each generator before sampling outages. Of shape (8760 hrs, num generators)
+
+    # check for conventional
+    if cf is None:
+        pre_outage_winter_capacity = np.tile(generators["winter nameplate"],(8760//4,1)) # shape(8760 hrs, num generators)
+        pre_outage_summer_capacity = np.tile(generators["summer nameplate"],(8760//2,1))
+        return np.vstack((pre_outage_winter_capacity, pre_outage_summer_capacity, pre_outage_winter_capacity))
+
+    # otherwise, renewable source:
+    return get_hourly_RE_impl(generators,cf)
+
+def get_hourly_capacity(num_iterations, generators, cf=None, risk_hours=None, log_weights=None, out=None):
     """ Find the hourly capacity matrix for a set of generators for a given number of iterations.
 
         ...
@@ -903,27 +1961,157 @@ def get_hourly_capacity(num_iterations, generators, cf=None):
         `powGen_lats` (ndarray): vector of latitudes corresponding to capacity factor array
 
         `powGen_lons` (ndarray): vector of longitudes corresponding to capacity factor array
+
+        `risk_hours` (ndarray): OPTIONAL hours of the year to sample. Defaults to all 8760 hours
+
+        `log_weights` (ndarray): OPTIONAL importance sampling log weights of shape(hours, num iterations), updated in place
+
+        `out` (ndarray): OPTIONAL capacity matrix of shape(hours, num iterations) in any capacity dtype (see compact_capacity). 
+        Sampled capacity is added to it in place and it is returned, so no double precision matrix of full size is built
     """
 
     if generators["num units"] == 0:
-        return 0
+        return 0 if out is None else out
 
-    # check for conventional
-    if cf is None:
-        pre_outage_winter_capacity = np.tile(generators["winter nameplate"],(8760//4,1)) # shape(8760 hrs, num generators)
-        pre_outage_summer_capacity = np.tile(generators["summer nameplate"],(8760//2,1))
-        pre_outage_capacity = np.vstack((pre_outage_winter_capacity, pre_outage_summer_capacity, pre_outage_winter_capacity))
+    pre_outage_capacity = get_pre_outage_capacity(generators, cf)
 
-    # otherwise, renewable source:
-    else:
-        pre_outage_capacity = get_hourly_RE_impl(generators,cf)
+    if risk_hours is not None:
+        pre_outage_capacity = pre_outage_capacity[risk_hours]
+
+    # sample outages, splitting iterations across worker processes. Inputs are copied to shared memory once for all workers
+    if WORKERS > 1 and num_iterations > 1:
+        chunks = get_iteration_chunks(num_iterations)
+        shared_memory, inputs = share_inputs([pre_outage_capacity, generators, risk_hours])
+        tasks = [(last-first, inputs, log_weights is not None, first, seed, out is not None)
+                    for (first, last), seed in zip(chunks, get_worker_seeds())]
+        try:
+            results = run_parallel_impl(sample_outages_worker, tasks)
+        finally:
+            release_shared_memory(shared_memory)
+
+        if log_weights is not None:
+            log_weights += np.hstack([result[1] for result in results])
 
-    # sample outages
-    hourly_capacity = sample_outages_impl(num_iterations, pre_outage_capacity, generators)
+        if out is None:
+            return np.hstack([result[0] for result in results])
+
+        # workers return compact chunks, added one chunk at a time
+        for (first, last), result in zip(chunks, results):
+            add_capacity_impl(out[:,first:last], get_capacity_columns(result[0], 0, last-first))
+        return out
+
+    hourly_capacity = sample_outages_impl(num_iterations, pre_outage_capacity, generators, risk_hours, log_weights, out=out)
 
     return hourly_capacity
 
-def get_hourly_fleet_capacity(num_iterations, conventional_generators, solar_generators, wind_generators, cf, storage_units=None, hourly_load=None, renewable_profile=None):
+def sample_outages_worker(task):
+# Sample outages for one range of iterations in a worker process. Returns capacity (compact when requested) and importance sampling log weights
+    num_iterations, inputs, importance_sampling, first_iteration, seed, compact = task
+    np.random.seed(seed)
+
+    shared_memory, (pre_outage_capacity, generators, hours) = attach_inputs(inputs)
+    try:
+        log_weights = np.zeros((pre_outage_capacity.shape[0], num_iterations)) if importance_sampling else None
+        hourly_capacity = sample_outages_impl(num_iterations, pre_outage_capacity, generators, hours, log_weights, first_iteration)
+    finally:
+        del pre_outage_capacity, generators, hours
+        release_shared_memory(shared_memory, unlink=False)
+
+    if compact:
+        hourly_capacity = compact_capacity(hourly_capacity)
+
+    return hourly_capacity, log_weights
+
+def get_iteration_chunks(num_iterations):
+# Split iterations evenly across worker processes. List of (first, last) iteration
+    bounds = np.linspace(0, num_iterations, min(WORKERS, num_iterations)+1).astype(int)
+    return [(int(first), int(last)) for first, last in zip(bounds[:-1], bounds[1:])]
+
+def get_worker_seeds():
+# Seeds for each worker's global random state, drawn from the parent so seeded runs are reproducible
+    return np.random.randint(0, 2**32-1, size=WORKERS)
+
+def run_parallel_impl(worker, tasks):
+# Run tasks in the worker pool, results in task order. Large inputs reach the workers through shared memory (see share_inputs)
+    return get_worker_pool().map(worker, tasks)
+
+def run_forked_impl(worker, tasks):
+# Run tasks in a pool forked for this call only, results in task order. Forked workers inherit everything in this process
+    with multiprocessing.get_context("fork").Pool(len(tasks)) as pool:
+        return pool.map(worker, tasks)
+
+def get_worker_settings():
+# Scalar settings of this module, which pool workers hold as they were when forked
+    return tuple(   (name, value) for name, value in sorted(globals().items()) 
+                    if name.isupper() and isinstance(value, (bool, int, float, str)))
+
+def get_worker_pool():
+# Pool of WORKERS forked processes, created once and reused by every sampling and dispatch call. It is only forked again if
+# the settings of this module change
+    global WORKER_POOL, WORKER_POOL_SETTINGS
+    settings = get_worker_settings()
+
+    if WORKER_POOL is None or WORKER_POOL_SETTINGS != settings:
+        close_worker_pool()
+        WORKER_POOL = multiprocessing.get_context("fork").Pool(WORKERS)
+        WORKER_POOL_SETTINGS = settings
+
+    return WORKER_POOL
+
+def close_worker_pool():
+# Stop the worker processes
+    global WORKER_POOL, WORKER_POOL_SETTINGS
+    if WORKER_POOL is not None:
+        WORKER_POOL.terminate()
+        WORKER_POOL.join()
+    WORKER_POOL, WORKER_POOL_SETTINGS = None, None
+
+atexit.register(close_worker_pool)
+
+def share_inputs(inputs):
+# Copy the numeric arrays of a list of task inputs (and those held in dictionary inputs) to shared memory. Returns the shared memory 
+# blocks and the inputs with each array replaced by a picklable handle, for attach_inputs
+    shared_memory = []
+
+    def share(value):
+        if not isinstance(value, np.ndarray) or value.dtype.kind not in "biuf" or value.size == 0:
+            return value
+        block = multiprocessing.shared_memory.SharedMemory(create=True, size=value.nbytes)
+        np.ndarray(value.shape, value.dtype, buffer=block.buf)[...] = value
+        shared_memory.append(block)
+        return {"shared memory" : block.name, "shape" : value.shape, "dtype" : value.dtype.str}
+
+    shared_inputs = [{key : share(item) for key, item in value.items()} if isinstance(value, dict) else share(value) for value in inputs]
+
+    return shared_memory, shared_inputs
+
+def attach_inputs(shared_inputs):
+# Read only views of inputs shared by share_inputs. Returns the attached shared memory blocks (release them once every view is
+# deleted) and the inputs
+    shared_memory = []
+
+    def attach(value):
+        if not isinstance(value, dict) or "shared memory" not in value:
+            return value
+        block = multiprocessing.shared_memory.SharedMemory(name=value["shared memory"])
+        shared_memory.append(block)
+        array = np.ndarray(value["shape"], np.dtype(value["dtype"]), buffer=block.buf)
+        array.flags.writeable = False
+        return array
+
+    inputs = [{key : attach(item) for key, item in value.items()} if isinstance(value, dict) and "shared memory" not in value 
+                else attach(value) for value in shared_inputs]
+
+    return shared_memory, inputs
+
+def release_shared_memory(shared_memory, unlink=True):
+# Close shared memory blocks, and free them when they belong to this process
+    for block in shared_memory:
+        block.close()
+        if unlink:
+            block.unlink()
+
+def get_hourly_fleet_capacity(num_iterations, conventional_generators, solar_generators, wind_generators, cf, storage_units=None, hourly_load=None, renewable_profile=None, risk_hours=None, log_weights=None, compact=False):
     """ Find the hourly capacity matrix for the entire fleet for a given number of iterations.
 
         ...
@@ -938,57 +2126,333 @@ def get_hourly_fleet_capacity(num_iterations, conventional_generators, solar_gen
 
         `wind_generators` (dict): dictionary of wind generators. Must contain keys 'nameplate', 'summer nameplate', 'winter nameplate', 'lat idx', and 'lon idx'
 
-        `cf` (dict): dictionary containing two numpy arrays for solar and wind capacity factors
+        `cf` (dict): solar and wind capacity factors from `get_powGen`
 
         `storage_units` (dict): OPTIONAL dictionary of storage units. IF INCLUDED: must include hourly_load and renewable_profile
         
         `hourly_load` (ndarray): OPTIONAL vector of hourly load. Only include with storage_units
 
         `renewable_profile` (ndarray): OPTIONAL vector of hourly renewable output. Only include with storage_units
+
+        `risk_hours` (ndarray): OPTIONAL hours of the year to sample (see get_risk_hours). Defaults to all 8760 hours
+
+        `log_weights` (ndarray): OPTIONAL importance sampling log weights of shape(hours, num iterations), updated in place
+
+        `compact` (bool): OPTIONAL store capacity in CAPACITY_DTYPE (see compact_capacity) as it is sampled
     """
 
-    hourly_fleet_capacity = np.zeros((8760,num_iterations))
+    num_hours = 8760 if risk_hours is None else risk_hours.size
+    hourly_fleet_capacity = np.zeros((num_hours,num_iterations), dtype=get_capacity_dtype() if compact else np.float64)
 
     # conventional, solar, and wind
-    hourly_fleet_capacity += get_hourly_capacity(num_iterations,conventional_generators)
-    hourly_fleet_capacity += get_hourly_capacity(num_iterations,solar_generators,cf["solar"])
-    hourly_fleet_capacity += get_hourly_capacity(num_iterations,wind_generators,cf["wind"])
+    get_hourly_capacity(num_iterations,conventional_generators,risk_hours=risk_hours,log_weights=log_weights,out=hourly_fleet_capacity)
+    get_hourly_capacity(num_iterations,solar_generators,cf["solar"],risk_hours,log_weights,out=hourly_fleet_capacity)
+    get_hourly_capacity(num_iterations,wind_generators,cf["wind"],risk_hours,log_weights,out=hourly_fleet_capacity)
 
     if storage_units is not None:
-        hourly_fleet_capacity += get_hourly_storage_contribution(   num_iterations,hourly_fleet_capacity,
-                                                                    hourly_load,storage_units,renewable_profile)
+        if risk_hours is not None:
+            hourly_load = hourly_load[risk_hours]
+            renewable_profile = renewable_profile[risk_hours]
+        hourly_capacity = get_capacity_columns(hourly_fleet_capacity,0,num_iterations) if compact else hourly_fleet_capacity
+        hourly_storage_contribution = get_hourly_storage_contribution(  num_iterations,hourly_capacity,
+                                                                        hourly_load,storage_units,renewable_profile)
+        add_capacity_impl(hourly_fleet_capacity, hourly_storage_contribution)
     
     return hourly_fleet_capacity
 
-def get_lolh(num_iterations, hourly_capacity, hourly_load):
-# Calculate number of expected hours in which load does not meet demand using monte carlo method
+def get_adaptive_lolh(num_iterations, sample_capacity, hourly_load, target_lolh=None, weights=None):
+    """ Find LOLH by sampling batches of iterations until the estimate is precise enough.
 
-    # identify where load exceeds capacity (loss-of-load). Of shape(8760 hrs, num iterations)
-    lol_matrix = np.where(hourly_load > hourly_capacity.T, 1, 0).T
-    hourly_risk = np.sum(lol_matrix,axis=1) / float(num_iterations)
-    lolh = np.sum(hourly_risk)
+        ...
 
-    return lolh, hourly_risk
+        Without adaptive iterations all iterations are evaluated in one batch. Otherwise batches 
+        are added until the confidence interval is narrower than the LOLH tolerance or clearly excludes the target. The 
+        confidence interval is only used once ADAPTIVE_MIN_EVENTS loss-of-load hours are observed (a batch without events has
+        a half-width of zero). Before that, sampling stops only when a Poisson upper bound on the loss-of-load hours is
+        below the target.
 
-def remove_oldest_impl(generators, manual_oldest_year=0):
-# Remove the oldest thermal generators from the conventional system. After all thermal generators are removed, remove the oldest hydro generators.
+        Args:
+        ----------
+        `num_iterations` (int): maximum number of iterations to sample
 
-    # non-hydro plants
-    not_hydro = generators["technology"] != "Conventional Hydroelectric"
+        `sample_capacity` (function): returns total hourly capacity of shape(hours, last-first) for iterations first to last
 
-    # while conventional units still exist, remove those first
-    if len(generators["nameplate"][not_hydro]) != 0:
-        
+        `hourly_load` (ndarray): vector of hourly load
 
-        # find oldest plant
-        oldest_year = np.amin(generators["year"][not_hydro]) 
+        `target_lolh` (float): OPTIONAL stop once the confidence interval excludes the target
 
-        # check for manual removal
-        if manual_oldest_year > oldest_year:
-            oldest_year = manual_oldest_year
+        `weights` (ndarray): OPTIONAL importance sampling weights of shape(hours, num iterations)
 
-        # erase all generators older than that year
-        erase = np.logical_and(generators["year"] <= oldest_year, not_hydro)
+        Returns:
+        ----------
+        `lolh` (float), `hourly_risk` (ndarray), `iterations` (int): number of iterations sampled
+    """
+    batch_size = ADAPTIVE_BATCH_SIZE if ADAPTIVE_ITERATIONS else num_iterations
+
+    hourly_lol = np.zeros(hourly_load.size)
+    annual_lolh = np.zeros(num_iterations)
+    iterations = 0
+    events = 0
+
+    while iterations < num_iterations:
+        first = iterations
+        iterations = min(iterations + batch_size, num_iterations)
+
+        shortfall = hourly_load[:,np.newaxis] > sample_capacity(first, iterations)
+        events += np.count_nonzero(shortfall)
+        if weights is None:
+            hourly_lol += np.count_nonzero(shortfall,axis=1)
+            annual_lolh[first:iterations] = np.count_nonzero(shortfall,axis=0)
+        else:
+            hourly_lol += np.einsum('hi,hi->h', shortfall, weights[:,first:iterations])
+            annual_lolh[first:iterations] = np.einsum('hi,hi->i', shortfall, weights[:,first:iterations])
+
+        # confidence interval of the mean annual loss-of-load hours
+        lolh = np.sum(hourly_lol) / iterations
+
+        # too few events to estimate the variance. Unweighted loss-of-load hours are bounded as a Poisson count
+        if events < ADAPTIVE_MIN_EVENTS:
+            upper_lolh = (events + LOLH_Z_SCORE * math.sqrt(events) + LOLH_Z_SCORE**2) / iterations
+            if weights is None and target_lolh is not None and upper_lolh < target_lolh:
+                break
+            continue
+
+        half_width = LOLH_Z_SCORE * np.std(annual_lolh[:iterations],ddof=1) / math.sqrt(iterations) if iterations > 1 else np.inf
+
+        if half_width <= LOLH_TOLERANCE:
+            break
+        if target_lolh is not None and abs(lolh - target_lolh) > half_width:
+            break
+
+    hourly_risk = hourly_lol / float(iterations)
+
+    return lolh, hourly_risk, iterations
+
+def get_iteration_columns(hourly_capacity, first, last):
+# Capacity of a batch of iterations. Scalar capacity (no units) applies to every iteration
+    if np.ndim(hourly_capacity) == 0:
+        return hourly_capacity
+
+    return hourly_capacity[:,first:last]
+
+def get_capacity_dtype():
+# Storage dtype of capacity matrices
+    return np.dtype(CAPACITY_DTYPE)
+
+def compact_capacity(hourly_capacity):
+# Convert a capacity matrix to the configured storage dtype. int32 capacity is scaled to integer steps of 1/CAPACITY_SCALE MW
+    if hourly_capacity.dtype == np.int32:
+        if CAPACITY_DTYPE == "int32":
+            return hourly_capacity
+        return get_capacity_columns(hourly_capacity, 0, hourly_capacity.shape[1])
+
+    if CAPACITY_DTYPE == "int32":
+        return np.rint(hourly_capacity*CAPACITY_SCALE).astype(np.int32)
+    if CAPACITY_DTYPE == "float32":
+        return hourly_capacity.astype(np.float32, copy=False)
+
+    return hourly_capacity.astype(np.float64, copy=False)
+
+def get_capacity_columns(hourly_capacity, first, last, out=None):
+# MW capacity of a batch of iterations in double precision, written into out when given. Storage dispatch and loss-of-load
+# comparisons are always made in double precision (storage meets shortfalls to within 1 W)
+    columns = hourly_capacity[:,first:last]
+    if out is None:
+        out = np.empty(columns.shape)
+
+    if columns.dtype == np.int32:
+        np.multiply(columns, 1.0/CAPACITY_SCALE, out=out, casting='unsafe')
+    else:
+        out[...] = columns
+
+    return out
+
+def add_capacity_impl(hourly_capacity, added_capacity):
+# Add MW capacity to a stored capacity matrix in place
+    if hourly_capacity.dtype == np.int32:
+        hourly_capacity += np.rint(np.asarray(added_capacity)*CAPACITY_SCALE).astype(np.int32)
+    else:
+        np.add(hourly_capacity, added_capacity, out=hourly_capacity, casting='unsafe')
+
+    return
+
+def get_importance_log_weights(num_hours, num_iterations, storage_units):
+# Empty log weights for importance sampling a fleet. None if importance sampling is disabled or the fleet has storage. Storage
+# carries its state of charge from hour to hour and day to day, so hourly likelihood ratios do not weight its loss-of-load
+    if not IMPORTANCE_SAMPLING:
+        return None
+
+    if storage_units["num units"] != 0:
+        print("Importance sampling does not model storage. Using plain Monte Carlo.")
+        return None
+
+    return np.zeros((num_hours, num_iterations))
+
+def get_importance_weights(log_weights):
+# Likelihood ratio weighting each hour's loss-of-load
+    if log_weights is None:
+        return None
+
+    return np.exp(log_weights)
+
+def get_effective_events(num_iterations, sample_capacity, hourly_load, weights):
+# Effective number of loss-of-load events behind an importance sampled LOLH, (sum of weights)^2 / (sum of squared weights) over
+# the loss-of-load hours. Equal to the number of events without importance sampling, small when a few large weights dominate
+    weight_sum = 0
+    squared_weight_sum = 0
+
+    iteration_block = max(int(MEMORY_BUDGET // max(8*hourly_load.size,1)), 1)
+    for first in range(0, num_iterations, iteration_block):
+        last = min(first + iteration_block, num_iterations)
+        weighted_lol = (hourly_load[:,np.newaxis] > sample_capacity(first, last)) * weights[:,first:last]
+        weight_sum += np.sum(weighted_lol)
+        squared_weight_sum += np.sum(weighted_lol**2)
+
+    if squared_weight_sum == 0:
+        return 0
+
+    return weight_sum**2 / squared_weight_sum
+
+def get_risk_fleet_capacity(num_iterations, conventional_generators, solar_generators, wind_generators, cf, storage_units, 
+                            risk_hours, risk_load, risk_renewable_profile):
+# Fleet capacity of the risk hours and importance sampling weights (None without importance sampling). Falls back to plain
+# Monte Carlo when too few effective loss-of-load events support the weighted LOLH
+    log_weights = get_importance_log_weights(risk_hours.size, num_iterations, storage_units)
+    hourly_fleet_capacity = get_hourly_fleet_capacity(  num_iterations,conventional_generators,solar_generators,wind_generators,cf,
+                                                        risk_hours=risk_hours,log_weights=log_weights,compact=True)
+    hourly_weights = get_importance_weights(log_weights)
+
+    if hourly_weights is None:
+        return hourly_fleet_capacity, hourly_weights
+
+    def sample_fleet_capacity(first, last):
+    # fleet and fleet storage capacity for a batch of iterations
+        hourly_capacity = get_capacity_columns(hourly_fleet_capacity,first,last)
+        hourly_capacity += get_hourly_storage_contribution( last-first,hourly_capacity,risk_load,
+                                                            storage_units,risk_renewable_profile)
+        return hourly_capacity
+
+    effective_events = get_effective_events(num_iterations, sample_fleet_capacity, risk_load, hourly_weights)
+    print("Importance sampling effective loss-of-load events :",round(effective_events,1))
+
+    if effective_events < IMPORTANCE_SAMPLING_MIN_EVENTS:
+        print("Importance sampling weights collapsed. Resampling fleet with plain Monte Carlo.")
+        hourly_fleet_capacity = get_hourly_fleet_capacity(  num_iterations,conventional_generators,solar_generators,wind_generators,cf,
+                                                            risk_hours=risk_hours,compact=True)
+        hourly_weights = None
+
+    print('')
+
+    return hourly_fleet_capacity, hourly_weights
+
+def print_variance_reduction(hourly_capacity, hourly_load, weights):
+# Compare the variance of the importance sampled LOLH with plain Monte Carlo using the same number of iterations
+    weighted_lol = (hourly_load[:,np.newaxis] > hourly_capacity) * weights
+    hourly_risk = np.clip(np.mean(weighted_lol,axis=1),0,1)
+
+    # outages are sampled independently each hour, so plain Monte Carlo variance is the sum of hourly variances
+    plain_variance = np.sum(hourly_risk*(1-hourly_risk))
+    importance_variance = np.var(np.sum(weighted_lol,axis=0),ddof=1)
+
+    print("Importance Sampling :")
+    print("\tLOLH variance (plain) :",plain_variance)
+    print("\tLOLH variance (importance sampling) :",importance_variance)
+    if importance_variance > 0:
+        print("\tVariance reduction :",round(plain_variance/importance_variance,2))
+    if np.any(weighted_lol):
+        print("\tEffective loss-of-load events :",round(np.sum(weighted_lol)**2/np.sum(weighted_lol**2),1))
+    print('')
+
+    return
+
+def get_risk_hours(hourly_load, conventional_generators, solar_generators, wind_generators, cf, storage_units=None):
+    """ Find the hours of the year that can ever be at risk. Hours are kept in whole days, with the days storage needs to recharge.
+
+    An hour is screened out when load plus the screening headroom stays below a conservative bound on available capacity:
+    expected capacity, less a number of standard deviations of sampled outages, less the largest single unit.
+
+    Storage is dispatched over the kept days only, so its state of charge carries across the screened-out days between them.
+    After each risk day, days are kept until storage could recharge from empty at its maximum charge rate, so it enters later
+    risk days full, as it does over the full year. The screened LOLH differs from the full year only if surplus capacity on 
+    the kept days is too small to recharge storage (see tests/test_risk_screening.py).
+
+    ...
+
+    Args:
+    ----------
+    `hourly_load` (ndarray): vector of hourly load
+
+    `conventional_generators` (dict): dictionary of conventional generators
+
+    `solar_generators` (dict): dictionary of solar generators
+
+    `wind_generators` (dict): dictionary of wind generators
+
+    `cf` (dict): solar and wind capacity factors from `get_powGen`
+
+    `storage_units` (dict): OPTIONAL dictionary of storage units. If any exist, the days after each risk day are kept for recharging
+    """
+
+    if not RISK_SCREENING:
+        return np.arange(8760)
+
+    expected_capacity = np.zeros(8760)
+    outage_variance = np.zeros(8760)
+    largest_unit = np.zeros(8760)
+
+    for generators, generator_cf in [   (conventional_generators, None), (solar_generators, cf["solar"]), 
+                                        (wind_generators, cf["wind"])]:
+        if generators["num units"] == 0:
+            continue
+        pre_outage_capacity = get_pre_outage_capacity(generators, generator_cf).astype(float)
+        hourly_efor = get_hourly_efor(generators)
+
+        expected_capacity += np.sum(pre_outage_capacity * (1 - hourly_efor), axis=1)
+        outage_variance += np.sum(pre_outage_capacity**2 * hourly_efor * (1 - hourly_efor), axis=1)
+        largest_unit = np.maximum(largest_unit, np.amax(pre_outage_capacity, axis=1))
+
+    capacity_bound = expected_capacity - RISK_SCREENING_SIGMA * np.sqrt(outage_variance) - largest_unit
+
+    risk_days = np.unique(np.argwhere(hourly_load + RISK_SCREENING_HEADROOM > capacity_bound).flatten() // 24)
+
+    # storage recharges on the days after a risk day
+    if storage_units is not None and storage_units["num units"] != 0:
+        recharge_hours = storage_units["max energy"] / (storage_units["roundtrip efficiency"] * storage_units["max charge rate"])
+        recharge_days = max(int(np.ceil(np.amax(recharge_hours) / 24)), 1)
+        risk_days = np.unique(np.minimum(risk_days[:,np.newaxis] + np.arange(recharge_days + 1), 364))
+
+    risk_hours = (risk_days[:,np.newaxis] * 24 + np.arange(24)).flatten()
+
+    print("Risk hours :",risk_hours.size,"of 8760")
+    print('')
+
+    return risk_hours
+
+def expand_hourly_risk(hourly_risk, risk_hours):
+# Place hourly risk for screened hours back into a vector of 8760 hours
+    all_hourly_risk = np.zeros(8760)
+    all_hourly_risk[risk_hours] = hourly_risk
+    return all_hourly_risk
+
+def remove_oldest_impl(generators, manual_oldest_year=0):
+# Remove the oldest thermal generators from the conventional system. After all thermal generators are removed, remove the oldest hydro generators.
+
+    # non-hydro plants
+    not_hydro = generators["technology"] != "Conventional Hydroelectric"
+
+    # while conventional units still exist, remove those first
+    if len(generators["nameplate"][not_hydro]) != 0:
+        
+
+        # find oldest plant
+        oldest_year = np.amin(generators["year"][not_hydro]) 
+
+        # check for manual removal
+        if manual_oldest_year > oldest_year:
+            oldest_year = manual_oldest_year
+
+        # erase all generators older than that year
+        erase = np.logical_and(generators["year"] <= oldest_year, not_hydro)
 
     # if there are no more conventional units, remove hydro
     else:
@@ -1008,12 +2472,142 @@ def remove_oldest_impl(generators, manual_oldest_year=0):
     generators["winter nameplate"] = generators["winter nameplate"][np.logical_not(erase)]
     generators["year"] = generators["year"][np.logical_not(erase)]
     generators["technology"] = generators["technology"][np.logical_not(erase)]
-    generators["efor"] = generators["efor"][np.logical_not(erase)]
+    if "efor index" in generators:
+        generators["efor index"] = generators["efor index"][np.logical_not(erase)]
+    else:
+        generators["efor"] = generators["efor"][np.logical_not(erase)]
+    generators["unit id"] = generators["unit id"][np.logical_not(erase)]
 
     generators["num units"] = len(generators["nameplate"])
 
     return generators, oldest_year, capacity_removed
 
+def select_generators_impl(generators, selected):
+# Conventional generators for a boolean mask of units. Temperature-dependent efor tables are shared, only their index is selected
+    selected_generators = dict(generators)
+
+    for key in ["nameplate", "summer nameplate", "winter nameplate", "year", "technology", "unit id"]:
+        selected_generators[key] = generators[key][selected]
+    if "efor index" in generators:
+        selected_generators["efor index"] = generators["efor index"][selected]
+    else:
+        selected_generators["efor"] = generators["efor"][selected]
+
+    selected_generators["num units"] = len(selected_generators["nameplate"])
+
+    return selected_generators
+
+def get_retirement_groups_impl(generators):
+# Units retired together by remove_oldest_impl: thermal generators of one operating year, or hydro generators of one nameplate capacity
+    hydro = generators["technology"] == "Conventional Hydroelectric"
+    groups = []
+
+    for year in np.unique(generators["year"][np.logical_not(hydro)]):
+        groups.append(np.logical_and(generators["year"] == year, np.logical_not(hydro)))
+    for nameplate in np.unique(generators["nameplate"][hydro]):
+        groups.append(np.logical_and(generators["nameplate"] == nameplate, hydro))
+
+    return groups
+
+def make_sampler_impl(num_iterations, hours=None):
+# Empty sampler of capacity for the given hours (all 8760 by default). Groups of generators are added and removed with
+# add_sampler_group and remove_sampler_group, and capacity is read with get_sampler_capacity
+    sampler = dict()
+    sampler["num iterations"] = num_iterations
+    sampler["hours"] = hours
+    sampler["capacity"] = np.zeros((8760 if hours is None else hours.size, num_iterations))
+    sampler["sampled iterations"] = 0
+    sampler["groups"] = []
+    return sampler
+
+def sample_group_impl(sampler, group, first, last):
+# Capacity of a sampler group for iterations first to last, drawn from streams keyed by the group's seed so that the same outages
+# are drawn again when it is removed. Common random numbers keep the units' own streams. Groups are sampled in this process, without worker pools
+    generators = group["generators"]
+    hours = sampler["hours"]
+    num_hours = 8760 if hours is None else hours.size
+
+    pre_outage_capacity = get_pre_outage_capacity(generators, group["cf"])
+    if hours is not None:
+        pre_outage_capacity = pre_outage_capacity[hours]
+
+    # streams are advanced past the draws of earlier iterations
+    streams = get_unit_streams(generators, 0, generators["num units"], first*num_hours)
+    if streams is None:
+        streams = [np.random.Generator(np.random.Philox(np.random.SeedSequence([group["seed"], unit])))
+                    for unit in range(generators["num units"])]
+        for stream in streams:
+            skip_draws_impl(stream, first*num_hours)
+
+    return sample_outages_impl(last-first, pre_outage_capacity, generators, hours, streams=streams)
+
+def add_sampler_group(sampler, generators, cf=None, seed=None):
+# Add a group of generators (renewables with their capacity factors) to a sampler, sampled for the iterations already sampled
+    group = dict()
+    group["generators"] = generators
+    group["cf"] = cf
+    group["seed"] = np.random.randint(0, 2**32-1) if seed is None else seed
+
+    sampled = sampler["sampled iterations"]
+    if sampled != 0:
+        sampler["capacity"][:,:sampled] += sample_group_impl(sampler, group, 0, sampled)
+    sampler["groups"].append(group)
+
+    return group
+
+def remove_sampler_group(sampler, group):
+# Subtract the capacity of a group from the iterations already sampled
+    sampled = sampler["sampled iterations"]
+    if sampled != 0:
+        sampler["capacity"][:,:sampled] -= sample_group_impl(sampler, group, 0, sampled)
+    sampler["groups"] = [sampler_group for sampler_group in sampler["groups"] if sampler_group is not group]
+
+    return
+
+def get_sampler_capacity(sampler, first, last):
+# Capacity of iterations first to last (a view of the sampler). Iterations are sampled when first requested
+    sampled = sampler["sampled iterations"]
+    if last > sampled:
+        for group in sampler["groups"]:
+            sampler["capacity"][:,sampled:last] += sample_group_impl(sampler, group, sampled, last)
+        sampler["sampled iterations"] = last
+
+    return sampler["capacity"][:,first:last]
+
+def get_fleet_sampler(num_iterations, conventional_generators, solar_generators, wind_generators, cf):
+# Fleet capacity for all 8760 hours, with conventional generators sampled one retirement group (vintage) at a time. Retiring
+# a group subtracts its contribution (see update_fleet_sampler) instead of resampling the whole fleet. Only the iterations
+# evaluated are sampled, so adaptive iterations sample the batches they need
+    fleet_sampler = make_sampler_impl(num_iterations)
+
+    # solar and wind are never retired
+    for generators, generator_cf in [(solar_generators, cf["solar"]), (wind_generators, cf["wind"])]:
+        if generators["num units"] != 0:
+            add_sampler_group(fleet_sampler, generators, generator_cf)
+
+    for units in get_retirement_groups_impl(conventional_generators):
+        add_sampler_group(fleet_sampler, select_generators_impl(conventional_generators, units))
+
+    return fleet_sampler
+
+def update_fleet_sampler(fleet_sampler, conventional_generators):
+# Remove retirement groups no longer in the conventional fleet
+    for group in list(fleet_sampler["groups"]):
+        if group["cf"] is not None:
+            continue
+
+        active = np.isin(group["generators"]["unit id"], conventional_generators["unit id"])
+
+        if np.all(active):
+            continue
+        elif np.any(active):
+            error_message = "Generators retired from part of a retirement group"
+            raise RuntimeError(error_message)
+        else:
+            remove_sampler_group(fleet_sampler, group)
+
+    return fleet_sampler
+
 def remove_generator_binary_constraints(lolh, target_lolh, generator_size_max, generator_size_min, generator_size):
 # Constraints for the 'remove_generators' binary search    
     convergence_not_met = generator_size_max - generator_size_min > 2
@@ -1040,7 +2634,7 @@ def remove_generators(  num_iterations, conventional_generators, solar_generator
 
         `storage_units` (dict): dictionary of storage units. 
         
-        `cf` (dict): dictionary containing two numpy arrays for solar and wind capacity factors
+        `cf` (dict): solar and wind capacity factors from `get_powGen`
 
         `hourly_load` (ndarray): vector of hourly load. 
 
@@ -1061,6 +2655,7 @@ def remove_generators(  num_iterations, conventional_generators, solar_generator
     # Remove capacity until reliability drops beyond target LOLH/year (low iterations to save time)
  
     low_iterations = min(50,num_iterations)
+    removal_iterations = num_iterations if ADAPTIVE_ITERATIONS else low_iterations
     total_capacity_removed = 0
     oldest_year = np.amin(conventional_generators["year"][conventional_generators["technology"] != "Conventional Hydroelectric"]) 
     
@@ -1069,10 +2664,124 @@ def remove_generators(  num_iterations, conventional_generators, solar_generator
         conventional_generators, oldest_year, capacity_removed = remove_oldest_impl(conventional_generators, oldest_year_manual)
         total_capacity_removed += capacity_removed 
 
+    # the fleet is sampled once and updated as generators retire
+    fleet_sampler = get_fleet_sampler(removal_iterations,conventional_generators,solar_generators,wind_generators,cf)
+
+    def sample_fleet_capacity(first, last):
+    # capacity of the current fleet, including storage
+        hourly_capacity = get_sampler_capacity(fleet_sampler, first, last).copy()
+        hourly_capacity += get_hourly_storage_contribution( last-first,hourly_capacity,hourly_load,
+                                                            storage_units,renewable_profile)
+        return hourly_capacity
+
+    def sample_supplemented_capacity(first, last):
+    # capacity of the screened fleet with the current supplemental unit, including storage
+        hourly_capacity = get_capacity_columns(hourly_fleet_capacity,first,last,capacity_buffer[:,:last-first])
+        hourly_capacity += get_iteration_columns(hourly_supplemental_unit_capacity,first,last)
+        hourly_capacity += get_hourly_storage_contribution( last-first,hourly_capacity,risk_load,
+                                                            storage_units,risk_renewable_profile)
+        return hourly_capacity
+
+    def find_supplemental_capacity(lolh):
+    # bracket the supplemental capacity meeting the target by doubling, then refine it with the Illinois method. Each unit of the
+    # supplemental fleet draws the same outages at every evaluation, so LOLH falls monotonically with supplemental capacity.
+    # Whole units are groups of a sampler over the risk hours (see `add_sampler_group`), added and removed as capacity changes
+        bracket_evaluations, evaluations = 0, 0
+        supplemental_sampler = make_sampler_impl(num_iterations, risk_hours)
+        search_seed = np.random.randint(0, 2**32-1)
+
+        def get_supplemental_unit(unit, capacity=supplemental_generator_unit_size):
+        # one supplemental unit and the seed of its outages, shared by the unit's whole and partial capacity
+            generators = make_conventional_generator(capacity, conventional_efor, temperature_dependent_efor, SUPPLEMENTAL_UNIT_ID+unit)
+            seed = int(np.random.SeedSequence([search_seed, unit]).generate_state(1)[0])
+            return generators, seed
+
+        def get_supplemental_capacity(capacity):
+        # hourly capacity of a supplemental fleet: whole units and one partial unit
+            num_units = int(capacity/supplemental_generator_unit_size)
+
+            # add or remove whole units from the running capacity
+            while len(supplemental_sampler["groups"]) < num_units:
+                generators, seed = get_supplemental_unit(len(supplemental_sampler["groups"]))
+                add_sampler_group(supplemental_sampler, generators, seed=seed)
+            while len(supplemental_sampler["groups"]) > num_units:
+                remove_sampler_group(supplemental_sampler, supplemental_sampler["groups"][-1])
+
+            hourly_capacity = get_sampler_capacity(supplemental_sampler, 0, num_iterations).copy()
+
+            if capacity%supplemental_generator_unit_size != 0:
+                generators, seed = get_supplemental_unit(num_units, capacity%supplemental_generator_unit_size)
+                hourly_capacity += sample_group_impl(supplemental_sampler, {"generators" : generators, "cf" : None, "seed" : seed}, 0, num_iterations)
+            return hourly_capacity
+
+        def get_supplemented_lolh(capacity, stage):
+        # reliability with a supplemental fleet of the given capacity
+            nonlocal hourly_supplemental_unit_capacity
+            hourly_supplemental_unit_capacity = get_supplemental_capacity(capacity)
+            lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_supplemented_capacity, risk_load, target_lolh, hourly_weights)
+
+            print("Supplement Capacity:\t",int(capacity),"\tLOLH:\t", round(lolh,precision),"\tIterations:\t",iterations,"\t"+stage+":\t",
+                    bracket_evaluations if stage == "Bracket" else evaluations,flush=True)
+            return lolh
+
+        # already reliable without supplemental capacity
+        if lolh <= target_lolh:
+            return 0, 0, lolh
+
+        # bracket: capacity_min is under reliable, capacity_max is over reliable. Supplemental capacity never needs to exceed peak load
+        max_supplemental_capacity = np.max(risk_load)
+        capacity_min, lolh_min = 0, lolh
+        capacity_max = supplemental_generator_unit_size
+        bracket_evaluations += 1
+        lolh_max = get_supplemented_lolh(capacity_max, "Bracket")
+
+        while lolh_max > target_lolh:
+
+            # Error Handling
+            if capacity_max > max_supplemental_capacity:
+                error_message = "Supplemental capacity exceeds peak load ("+str(int(max_supplemental_capacity))+" MW) without meeting target LOLH"
+                raise RuntimeError(error_message)
+
+            capacity_min, lolh_min = capacity_max, lolh_max
+            capacity_max *= 2
+            bracket_evaluations += 1
+            lolh_max = get_supplemented_lolh(capacity_max, "Bracket")
+        
+        reliable_lolh = lolh_max
+
+        # Illinois: false position on LOLH, halving the retained end's error when the same end is kept twice
+        retained = None
+        while capacity_max - capacity_min > 1 and abs(lolh_max - target_lolh) > 1e-9 and evaluations < 20:
+
+            error_min, error_max = lolh_min - target_lolh, lolh_max - target_lolh
+            capacity = capacity_max - error_max * (capacity_max - capacity_min) / (error_max - error_min)
+            capacity = int(min(max(round(capacity), capacity_min + 1), capacity_max - 1))
+
+            evaluations += 1
+            lolh = get_supplemented_lolh(capacity, "Evaluation")
+
+            #under reliable, raise lower bound
+            if lolh > target_lolh:
+                capacity_min, lolh_min = capacity, lolh
+                if retained == "max":
+                    lolh_max = target_lolh + (lolh_max - target_lolh) / 2
+                retained = "max"
+
+            # over reliable, lower upper bound
+            else:
+                capacity_max, lolh_max = capacity, lolh
+                reliable_lolh = lolh
+                if retained == "min":
+                    lolh_min = target_lolh + (lolh_min - target_lolh) / 2
+                retained = "min"
+
+        print("Supplemental search evaluations :",bracket_evaluations,"bracketing,",evaluations,"root-finding")
+
+        # keep the smallest over reliable supplemental fleet found
+        return capacity_max, get_supplemental_capacity(capacity_max), reliable_lolh
+
     # Find original reliability
-    hourly_fleet_capacity = get_hourly_fleet_capacity(low_iterations,conventional_generators,solar_generators,
-                                                        wind_generators,cf,storage_units,hourly_load,renewable_profile)
-    lolh, hourly_risk = get_lolh(low_iterations,hourly_fleet_capacity,hourly_load) 
+    lolh, hourly_risk, iterations = get_adaptive_lolh(removal_iterations,sample_fleet_capacity,hourly_load,target_lolh)
     
     # Error Handling: Under Reliable System
     if lolh >= target_lolh:
@@ -1088,56 +2797,54 @@ def remove_generators(  num_iterations, conventional_generators, solar_generator
 
     while conventional_generators["nameplate"].size > 1 and lolh < target_lolh:
         conventional_generators, oldest_year, capacity_removed = remove_oldest_impl(conventional_generators)
-        hourly_fleet_capacity = get_hourly_fleet_capacity(low_iterations,conventional_generators,solar_generators,
-                                                            wind_generators,cf,storage_units,hourly_load,renewable_profile)
-        lolh, hourly_risk = get_lolh(low_iterations,hourly_fleet_capacity,hourly_load) 
+        fleet_sampler = update_fleet_sampler(fleet_sampler, conventional_generators)
+        lolh, hourly_risk, iterations = get_adaptive_lolh(removal_iterations,sample_fleet_capacity,hourly_load,target_lolh)
         total_capacity_removed += capacity_removed
 
-        print("Oldest Year:\t",int(oldest_year),"\tLOLH:\t",round(lolh,2),"\tCapacity Removed:\t",capacity_removed)
+        print("Oldest Year:\t",int(oldest_year),"\tLOLH:\t",round(lolh,2),"\tCapacity Removed:\t",capacity_removed,"\tIterations:\t",iterations)
     
     print('')
 
-    # find reliability of higher iteration simulation
+    # find reliability of higher iteration simulation, only sampling hours that can be at risk
 
-    hourly_fleet_capacity = get_hourly_fleet_capacity(num_iterations,conventional_generators,solar_generators,
-                                                        wind_generators,cf)
+    risk_hours = get_risk_hours(hourly_load,conventional_generators,solar_generators,wind_generators,cf,storage_units)
+    risk_load = hourly_load[risk_hours]
+    risk_renewable_profile = renewable_profile[risk_hours]
 
-    hourly_storage_capacity = get_hourly_storage_contribution(  num_iterations,
-                                                                hourly_fleet_capacity, 
-                                                                hourly_load, 
-                                                                storage_units,
-                                                                renewable_profile)
-                                                                
-    hourly_total_capacity = hourly_fleet_capacity + hourly_storage_capacity 
+    hourly_fleet_capacity, hourly_weights = get_risk_fleet_capacity(num_iterations,conventional_generators,solar_generators,
+                                                                    wind_generators,cf,storage_units,risk_hours,risk_load,
+                                                                    risk_renewable_profile)
+    capacity_buffer = np.empty(hourly_fleet_capacity.shape)
+    hourly_supplemental_unit_capacity = 0
 
-    lolh, hourly_risk = get_lolh(num_iterations, hourly_total_capacity, hourly_load)
+    lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_supplemented_capacity, risk_load, target_lolh, hourly_weights)
 
     # bad sample remove more generators
     if lolh < target_lolh:
 
         low_iterations *= 5
+        removal_iterations = num_iterations if ADAPTIVE_ITERATIONS else low_iterations
+        fleet_sampler = get_fleet_sampler(removal_iterations,conventional_generators,solar_generators,wind_generators,cf)
 
         while conventional_generators["nameplate"].size > 1 and lolh < target_lolh:
             
             conventional_generators, oldest_year, capacity_removed = remove_oldest_impl(conventional_generators)
-            hourly_fleet_capacity = get_hourly_fleet_capacity(low_iterations,conventional_generators,solar_generators,
-                                                                wind_generators,cf,storage_units,hourly_load,renewable_profile)
-            lolh, hourly_risk = get_lolh(low_iterations,hourly_fleet_capacity,hourly_load) 
+            fleet_sampler = update_fleet_sampler(fleet_sampler, conventional_generators)
+            lolh, hourly_risk, iterations = get_adaptive_lolh(removal_iterations,sample_fleet_capacity,hourly_load,target_lolh)
             total_capacity_removed += capacity_removed
-            print("Oldest Year:\t",int(oldest_year),"\tLOLH:\t",round(lolh,2),"\tCapacity Removed:\t",capacity_removed,flush=True)
+            print("Oldest Year:\t",int(oldest_year),"\tLOLH:\t",round(lolh,2),"\tCapacity Removed:\t",capacity_removed,"\tIterations:\t",iterations,flush=True)
         
-        hourly_fleet_capacity = get_hourly_fleet_capacity(num_iterations,conventional_generators,solar_generators,
-                                                        wind_generators,cf)
+        risk_hours = get_risk_hours(hourly_load,conventional_generators,solar_generators,wind_generators,cf,storage_units)
+        risk_load = hourly_load[risk_hours]
+        risk_renewable_profile = renewable_profile[risk_hours]
 
-        hourly_storage_capacity = get_hourly_storage_contribution(  num_iterations,
-                                                                    hourly_fleet_capacity, 
-                                                                    hourly_load, 
-                                                                    storage_units,
-                                                                    renewable_profile)
-                                                                    
-        hourly_total_capacity = hourly_fleet_capacity + hourly_storage_capacity 
+        hourly_fleet_capacity, hourly_weights = get_risk_fleet_capacity(num_iterations,conventional_generators,solar_generators,
+                                                                        wind_generators,cf,storage_units,risk_hours,risk_load,
+                                                                        risk_renewable_profile)
+        capacity_buffer = np.empty(hourly_fleet_capacity.shape)
+        hourly_supplemental_unit_capacity = 0
 
-        lolh, hourly_risk = get_lolh(num_iterations, hourly_total_capacity, hourly_load)
+        lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_supplemented_capacity, risk_load, target_lolh, hourly_weights)
 
     # add supplemental units to match target reliability
 
@@ -1145,85 +2852,68 @@ def remove_generators(  num_iterations, conventional_generators, solar_generator
     supplemental_generator_unit_size = 50
     hourly_supplemental_unit_capacity = 0 # add one unit at a time to adjust generator size if necessary
 
-    # add supplemental generators of constant size until system is over reliable
-    while lolh > target_lolh:
+    if SUPPLEMENTAL_SEARCH == "root":
+        supplemental_capacity, hourly_supplemental_unit_capacity, lolh = find_supplemental_capacity(lolh)
+    
+    else:
+        # add supplemental generators of constant size until system is over reliable
+        while lolh > target_lolh:
 
-        # make new generator
-        supplemental_generator = make_conventional_generator(supplemental_generator_unit_size, 
-                                                            conventional_efor, temperature_dependent_efor)
+            # make new generator
+            supplemental_generator = make_conventional_generator(supplemental_generator_unit_size, 
+                                                                conventional_efor, temperature_dependent_efor,
+                                                                SUPPLEMENTAL_UNIT_ID+int(supplemental_capacity/supplemental_generator_unit_size))
 
-        hourly_supplemental_unit_capacity = get_hourly_capacity( num_iterations, supplemental_generator)
+            hourly_supplemental_unit_capacity = get_hourly_capacity( num_iterations, supplemental_generator, risk_hours=risk_hours)
         
 
-        # find new reliability
-        hourly_storage_capacity = get_hourly_storage_contribution(  num_iterations,
-                                                                    hourly_fleet_capacity+hourly_supplemental_unit_capacity, 
-                                                                    hourly_load, 
-                                                                    storage_units,
-                                                                    renewable_profile)
-        hourly_total_capacity = hourly_fleet_capacity + hourly_supplemental_unit_capacity + hourly_storage_capacity
-
-        lolh, hourly_risk = get_lolh(num_iterations,hourly_total_capacity,hourly_load)        
+            # find new reliability
+            lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_supplemented_capacity, risk_load, target_lolh, hourly_weights)
         
-        # add supplemental capacity fleet in increments
-        if lolh > target_lolh:
-            supplemental_capacity += supplemental_generator_unit_size
-            hourly_fleet_capacity += hourly_supplemental_unit_capacity
-            print("Supplement Capacity:\t",int(supplemental_capacity),"\tLOLH:\t", round(lolh,precision),flush=True)
+            # add supplemental capacity fleet in increments
+            if lolh > target_lolh:
+                supplemental_capacity += supplemental_generator_unit_size
+                add_capacity_impl(hourly_fleet_capacity, hourly_supplemental_unit_capacity)
+                print("Supplement Capacity:\t",int(supplemental_capacity),"\tLOLH:\t", round(lolh,precision),"\tIterations:\t",iterations,flush=True)
     
-    #binary search to find last supplemental generator size
-
-    generator_size_max = supplemental_generator_unit_size
-    generator_size_min = 0
-    generator_size_old = supplemental_generator_unit_size
-    generator_size_new = generator_size_max / 2
-
-    hourly_supplemental_unit_capacity = hourly_supplemental_unit_capacity / generator_size_old * generator_size_new
+        #binary search to find last supplemental generator size
 
-    hourly_storage_capacity = get_hourly_storage_contribution(  num_iterations,
-                                                                hourly_fleet_capacity+hourly_supplemental_unit_capacity, 
-                                                                hourly_load, 
-                                                                storage_units,
-                                                                renewable_profile)
+        generator_size_max = supplemental_generator_unit_size
+        generator_size_min = 0
+        generator_size_old = supplemental_generator_unit_size
+        generator_size_new = generator_size_max / 2
 
-    hourly_total_capacity = hourly_fleet_capacity + hourly_supplemental_unit_capacity + hourly_storage_capacity
+        hourly_supplemental_unit_capacity = hourly_supplemental_unit_capacity / generator_size_old * generator_size_new
 
-    lolh, hourly_risk = get_lolh(num_iterations,hourly_total_capacity,hourly_load)  
+        lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_supplemented_capacity, risk_load, target_lolh, hourly_weights)
 
-    print("Supplement Capacity:\t",int(supplemental_capacity+generator_size_new),"\tLOLH:\t", round(lolh,precision))
+        print("Supplement Capacity:\t",int(supplemental_capacity+generator_size_new),"\tLOLH:\t", round(lolh,precision),"\tIterations:\t",iterations)
 
-    while remove_generator_binary_constraints(lolh, target_lolh, generator_size_max, generator_size_min, generator_size_new):
+        while remove_generator_binary_constraints(lolh, target_lolh, generator_size_max, generator_size_min, generator_size_new):
 
-        generator_size_old = generator_size_new
+            generator_size_old = generator_size_new
 
-        if lolh > target_lolh: #under reliable
-            generator_size_min = generator_size_new
-            generator_size_new = int((generator_size_min + generator_size_max)/2)
-        else: #over reliable
-            generator_size_max = generator_size_new
-            generator_size_new = int((generator_size_min + generator_size_max)/2)
+            if lolh > target_lolh: #under reliable
+                generator_size_min = generator_size_new
+                generator_size_new = int((generator_size_min + generator_size_max)/2)
+            else: #over reliable
+                generator_size_max = generator_size_new
+                generator_size_new = int((generator_size_min + generator_size_max)/2)
 
-        # find new reliability
-        hourly_supplemental_unit_capacity = hourly_supplemental_unit_capacity / generator_size_old * generator_size_new
+            # find new reliability
+            hourly_supplemental_unit_capacity = hourly_supplemental_unit_capacity / generator_size_old * generator_size_new
 
-        hourly_storage_capacity = get_hourly_storage_contribution(  num_iterations,
-                                                                    hourly_fleet_capacity+hourly_supplemental_unit_capacity, 
-                                                                    hourly_load, 
-                                                                    storage_units,
-                                                                    renewable_profile)
+            lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_supplemented_capacity, risk_load, target_lolh, hourly_weights)
 
-        hourly_total_capacity = hourly_fleet_capacity + hourly_supplemental_unit_capacity + hourly_storage_capacity
+            print("Supplement Capacity:\t",int(supplemental_capacity+generator_size_new),"\tLOLH:\t", round(lolh,precision),"\tIterations:\t",iterations,flush=True)
 
-        lolh, hourly_risk = get_lolh(num_iterations,hourly_total_capacity,hourly_load)  
+        supplemental_capacity += generator_size_new
 
-        print("Supplement Capacity:\t",int(supplemental_capacity+generator_size_new),"\tLOLH:\t", round(lolh,precision),flush=True)
-    
     print('')
 
     # add supplemental generators to fleet
 
-    supplemental_capacity += generator_size_new
-    hourly_fleet_capacity += hourly_supplemental_unit_capacity
+    add_capacity_impl(hourly_fleet_capacity, hourly_supplemental_unit_capacity)
 
     supplemental_generators = make_supplemental_generators( supplemental_capacity, conventional_efor, 
                                                             temperature_dependent_efor, supplemental_generator_unit_size)
@@ -1236,20 +2926,21 @@ def remove_generators(  num_iterations, conventional_generators, solar_generator
     print("Capacity removed :",int(total_capacity_removed - supplemental_capacity))
     print("Conventional fleet capacity :",(np.sum(conventional_generators["summer nameplate"])+np.sum(conventional_generators["winter nameplate"]))//2)
     print('Base LOLH :', lolh,flush=True)
-    return conventional_generators, hourly_fleet_capacity
+    return conventional_generators, hourly_fleet_capacity, risk_hours, hourly_weights
 
 def make_supplemental_generators(capacity,efor,temperature_dependent_efor,generator_size):
 # Make fleet of small generators generators to provide supplemental capacity    
-    supplemental_generators = make_conventional_generator(capacity%generator_size,efor,temperature_dependent_efor)
+    supplemental_generators = make_conventional_generator(capacity%generator_size,efor,temperature_dependent_efor,
+                                                            SUPPLEMENTAL_UNIT_ID+int(capacity/generator_size))
 
     for i in range(int(capacity/generator_size)):
 
-        fifty_MW_generator = make_conventional_generator(generator_size,efor,temperature_dependent_efor)
+        fifty_MW_generator = make_conventional_generator(generator_size,efor,temperature_dependent_efor,SUPPLEMENTAL_UNIT_ID+i)
         supplemental_generators = append_conventional_generator(supplemental_generators, fifty_MW_generator)
 
     return supplemental_generators
 
-def make_conventional_generator(capacity,efor,temperature_dependent_efor):
+def make_conventional_generator(capacity,efor,temperature_dependent_efor,unit_id=SUPPLEMENTAL_UNIT_ID):
 # Make a dictionary for a single conventional generator
     new_generator = dict()
 
@@ -1259,9 +2950,11 @@ def make_conventional_generator(capacity,efor,temperature_dependent_efor):
     new_generator["winter nameplate"] = new_generator["nameplate"]
     new_generator["year"] = np.array(9999)
     new_generator["technology"] = np.array("supplemental")
+    new_generator["unit id"] = np.array(unit_id)
 
     if temperature_dependent_efor:
         new_generator["efor"] = np.array([efor,]*8760).reshape(1,8760) #reasonable efor for conventional generator
+        new_generator["efor index"] = np.array([0])
     else:
         new_generator["efor"] = np.array([efor])
 
@@ -1270,8 +2963,15 @@ def make_conventional_generator(capacity,efor,temperature_dependent_efor):
 def append_conventional_generator(fleet_conventional_generators,additional_generator):
 # Combine two generator dictionaries
 
+    # efor rows of the additional generator follow those of the fleet
+    if "efor index" in fleet_conventional_generators:
+        fleet_conventional_generators["efor index"] = np.append(fleet_conventional_generators["efor index"],
+                                                                additional_generator["efor index"]+len(fleet_conventional_generators["efor"]))
+
     for key in fleet_conventional_generators:
-        if key == "efor":
+        if key == "efor index":
+            continue
+        elif key == "efor":
             fleet_conventional_generators[key] = np.concatenate((fleet_conventional_generators[key],additional_generator[key]))
         elif key == "num units":
             fleet_conventional_generators[key] += additional_generator[key]
@@ -1290,6 +2990,7 @@ def make_RE_generator(generator):
     RE_generator["lat"] = np.array([generator["latitude"]])
     RE_generator["lon"] = np.array([generator["longitude"]])
     RE_generator["efor"] = np.array([generator["efor"]])
+    RE_generator["unit id"] = np.array([ADDED_UNIT_ID])
     RE_generator["generator type"] = generator["generator type"]
 
     return RE_generator
@@ -1302,8 +3003,36 @@ def elcc_binary_constraints(binary_trial, lolh, target_lolh, additional_load_max
     
     return trial_limit_not_met and convergence_not_met and reliability_not_met
 
+def get_target_lolh(num_iterations, hourly_fleet_capacity, fleet_storage, hourly_load, fleet_renewable_profile, weights=None):
+# Reliability of the fleet and fleet storage before a generator is added. Shared by every elcc search on the same system
+    
+    # precision for printing lolh
+    precision = int(math.log10(num_iterations))
+
+    capacity_buffer = np.empty(hourly_fleet_capacity.shape)
+
+    def sample_fleet_capacity(first, last):
+    # fleet and fleet storage capacity for a batch of iterations
+        hourly_capacity = get_capacity_columns(hourly_fleet_capacity,first,last,capacity_buffer[:,:last-first])
+        hourly_capacity += get_hourly_storage_contribution( last-first,hourly_capacity,hourly_load,
+                                                            fleet_storage, fleet_renewable_profile)
+        return hourly_capacity
+
+    target_lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_fleet_capacity, hourly_load, weights=weights)
+
+    print("Target LOLH :", round(target_lolh,precision),"Iterations :",iterations,flush=True)
+    print('')
+
+    if weights is not None:
+        print_variance_reduction(sample_fleet_capacity(0, iterations), hourly_load, weights[:,:iterations])
+
+    if DEBUG:
+        np.savetxt(OUTPUT_DIRECTORY+'fleet_hourly_risk',hourly_risk)
+
+    return target_lolh
+
 def get_elcc(num_iterations, hourly_fleet_capacity, hourly_added_generator_capacity, fleet_storage, 
-                added_storage, hourly_load, added_capacity, fleet_renewable_profile, added_renewable_profile):
+                added_storage, hourly_load, added_capacity, fleet_renewable_profile, added_renewable_profile, weights=None, target_lolh=None):
     """ Find the ELCC of a generator by adding it to a system and adjusting load until the original reliability is met.
 
     ...
@@ -1326,60 +3055,57 @@ def get_elcc(num_iterations, hourly_fleet_capacity, hourly_added_generator_capac
         `fleet_renewable_profile` (ndarray): vector of hourly renewable output for the fleet
 
         `added_renewable_profile` (ndarray): vector of hourly renewable output for the added generator     
+
+        `weights` (ndarray): OPTIONAL importance sampling weights for the fleet capacity (must correspond to num_iterations)
+
+        `target_lolh` (float): OPTIONAL original reliability of the fleet, found with `get_target_lolh` if not given
     """
 
     # precision for printing lolh
     precision = int(math.log10(num_iterations))
 
     # find original reliability
-    hourly_storage_capacity = get_hourly_storage_contribution(  num_iterations,hourly_fleet_capacity,hourly_load,
-                                                                fleet_storage, fleet_renewable_profile)
-    hourly_total_capacity = hourly_fleet_capacity + hourly_storage_capacity
-  
-    target_lolh, hourly_risk = get_lolh(num_iterations, hourly_total_capacity, hourly_load)
+    if target_lolh is None:
+        target_lolh = get_target_lolh(num_iterations, hourly_fleet_capacity, fleet_storage, hourly_load, fleet_renewable_profile, weights)
 
-    print("Target LOLH :", round(target_lolh,precision),flush=True)
-    print('')
-
-    if DEBUG:
-        np.savetxt(OUTPUT_DIRECTORY+'fleet_hourly_risk',hourly_risk)
+    # capacity of each trial is accumulated in place in one reusable buffer
+    capacity_buffer = np.empty(hourly_fleet_capacity.shape)
 
-    # combine fleet storage with generator storage
-    all_storage = append_storage(fleet_storage, added_storage)
+    # combine fleet storage with generator storage, leaving the fleet unchanged for the next generator of a sweep
+    all_storage = append_storage(dict(fleet_storage), added_storage)
     combined_renewable_profile = fleet_renewable_profile + added_renewable_profile
 
-    # use binary search to find amount of load needed to match base reliability
-    additional_load_max = added_capacity
-    additional_load_min = 0
-    additional_load = additional_load_max / 2
-
+    def sample_total_capacity(first, last):
+    # fleet, added generator, and all storage capacity for a batch of iterations at the current additional load
+        hourly_capacity = get_capacity_columns(hourly_fleet_capacity,first,last,capacity_buffer[:,:last-first])
+        hourly_capacity += get_iteration_columns(hourly_added_generator_capacity,first,last)
+        hourly_capacity += get_hourly_storage_contribution( last-first,hourly_capacity,hourly_load+additional_load,
+                                                            all_storage, combined_renewable_profile)
+        return hourly_capacity
 
     if DEBUG:
-        # include storage operation
-        hourly_storage_capacity = get_hourly_storage_contribution(  num_iterations,
-                                                                    hourly_fleet_capacity+hourly_added_generator_capacity,
-                                                                    hourly_load,
-                                                                    all_storage, combined_renewable_profile)
-
-        # combine contribution from fleet, RE generator, and added storage
-        hourly_total_capacity = hourly_fleet_capacity + hourly_storage_capacity + hourly_added_generator_capacity
-
-        lolh, hourly_risk = get_lolh(num_iterations, hourly_total_capacity, hourly_load)
+        # include storage operation, combining contribution from fleet, RE generator, and added storage
+        additional_load = 0
+        lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_total_capacity, hourly_load, weights=weights)
 
         np.savetxt(OUTPUT_DIRECTORY+'generator_hourly_risk',hourly_risk)
 
-    # include storage operation
-    hourly_storage_capacity = get_hourly_storage_contribution(  num_iterations,
-                                                                hourly_fleet_capacity+hourly_added_generator_capacity,
-                                                                hourly_load+additional_load,
-                                                                all_storage, combined_renewable_profile)
+    # without storage, the elcc is found directly from the loss-of-load margins
+    if ELCC_SOLVER == "direct" and all_storage["num units"] == 0:
+        elcc, hourly_risk = get_direct_elcc(num_iterations, hourly_fleet_capacity, hourly_added_generator_capacity, hourly_load,
+                                            added_capacity, target_lolh, weights)
+        print('')
+        return elcc, hourly_risk
 
-    # combine contribution from fleet, RE generator, and added storage
-    hourly_total_capacity = hourly_fleet_capacity + hourly_storage_capacity + hourly_added_generator_capacity
+    # use binary search to find amount of load needed to match base reliability
+    additional_load_max = added_capacity
+    additional_load_min = 0
+    additional_load = additional_load_max / 2
 
-    lolh, hourly_risk = get_lolh(num_iterations, hourly_total_capacity, hourly_load + additional_load)
+    # include storage operation and combine contribution from fleet, RE generator, and added storage
+    lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_total_capacity, hourly_load + additional_load, target_lolh, weights)
     
-    print('Additional Load:',additional_load,'LOLH:',round(lolh,precision))
+    print('Additional Load:',additional_load,'LOLH:',round(lolh,precision),'Iterations:',iterations)
 
     if DEBUG:
             print(round(lolh,precision))
@@ -1400,19 +3126,10 @@ def get_elcc(num_iterations, hourly_fleet_capacity, hourly_added_generator_capac
             additional_load_min = additional_load
             additional_load += (additional_load_max - additional_load) / 2.0
         
-        # include storage operation
-        hourly_storage_capacity = get_hourly_storage_contribution(  num_iterations,
-                                                                    hourly_fleet_capacity+hourly_added_generator_capacity,
-                                                                    hourly_load+additional_load,
-                                                                    all_storage, combined_renewable_profile)
-
-        # combine contribution from fleet, RE generator, and added storage
-        hourly_total_capacity = hourly_fleet_capacity + hourly_storage_capacity + hourly_added_generator_capacity
-
-        # find new lolh
-        lolh, hourly_risk = get_lolh(num_iterations, hourly_total_capacity, hourly_load + additional_load)
+        # find new lolh, including storage operation
+        lolh, hourly_risk, iterations = get_adaptive_lolh(num_iterations, sample_total_capacity, hourly_load + additional_load, target_lolh, weights)
     
-        print('Additional Load:',additional_load,'LOLH:',round(lolh,precision), flush=True)
+        print('Additional Load:',additional_load,'LOLH:',round(lolh,precision),'Iterations:',iterations, flush=True)
 
         # print additional debugging information
         if DEBUG:
@@ -1441,96 +3158,688 @@ def get_elcc(num_iterations, hourly_fleet_capacity, hourly_added_generator_capac
 
     return elcc, hourly_risk
 
-################ PRINT/SAVE/LOAD ######################
+def get_direct_elcc(num_iterations, hourly_fleet_capacity, hourly_added_generator_capacity, hourly_load, added_capacity, target_lolh, weights=None):
+    """ Find the ELCC of a generator added to a storage-free system directly, without a binary search.
 
-def print_parameters(*parameters):
-    " Print all parameters."
+    ...
 
-    print("Parameters:")
-    for sub_parameters in parameters:
-        for key, value in sub_parameters.items():
-            print("\t",key,":",value)
+    Loss-of-load occurs in an hour and iteration when additional load exceeds the capacity margin (capacity minus load), so 
+    LOLH is a step function of additional load. Margins below the added capacity are sorted once, and the ELCC is the 
+    largest additional load that keeps loss-of-load (weighted, if importance sampled) within the target. The search 
+    always converges, exactly.
 
-    print('')
+    Args:
+        -------------
+        `num_iterations` (int): number of capacity curves to sample for MCS.
 
-def print_fleet(conventional_generators,solar_generators,wind_generators,storage_units):
-    " Print information about the fleet found, including storage, conventional, solar, and wind generators."
-    # conventional
-    print(  "found",conventional_generators["num units"],
-            "conventional generators ("+str(int(np.sum(conventional_generators["nameplate"])))+" MW)")
+        `hourly_fleet_capacity` (ndarray): array of hourly capacity for a number of samples (must correspond to num_iterations)
 
-    # renewables
-    print(  "found",solar_generators["num units"],"solar generators ("+str(int(np.sum(solar_generators["nameplate"])))+" MW)")
+        `hourly_added_generator_capacity` (ndarray): array of hourly capacity of an added generator for a number of samples (must correspond to num_iterations)
 
-    print(  "found",wind_generators["num units"],"wind generators ("+str(int(np.sum(wind_generators["nameplate"])))+" MW)")
+        `hourly_load` (ndarray): vector of hourly load. 
 
-    # storage
-    print(  "found", storage_units["num units"],"storage units ("+str(int(np.sum(storage_units["max discharge rate"])))+" MW)")
+        `added_capacity` (float): total capacity added. Upper bound of the ELCC
 
-    print(  "Total Installed Capacity :",   np.sum(conventional_generators["nameplate"])+np.sum(solar_generators["nameplate"])+\
-                                            np.sum(wind_generators["nameplate"])+np.sum(storage_units["max discharge rate"]))
+        `target_lolh` (float): original reliability of the fleet (see `get_target_lolh`)
 
-    print('')
+        `weights` (ndarray): OPTIONAL importance sampling weights for the fleet capacity (must correspond to num_iterations)
+    """
 
-def save_active_generators(root_directory, conventional, solar, wind, storage, renewable_profile):
-    " Save active generators to a csv."
+    margins, margin_hours, margin_weights = [], [], []
+
+    # only margins below the added capacity can be reached, a block of iterations at a time
+    iteration_block = max(int(MEMORY_BUDGET // max(hourly_load.size*8,1)), 1)
+    for first in range(0, num_iterations, iteration_block):
+        last = min(first + iteration_block, num_iterations)
+        margin = get_capacity_columns(hourly_fleet_capacity,first,last)
+        margin += get_iteration_columns(hourly_added_generator_capacity,first,last)
+        margin -= hourly_load[:,np.newaxis]
+
+        reachable = margin < added_capacity
+        margins.append(margin[reachable])
+        margin_hours.append(np.nonzero(reachable)[0])
+        if weights is not None:
+            margin_weights.append(weights[:,first:last][reachable])
+
+    margins = np.concatenate(margins)
+    margin_hours = np.concatenate(margin_hours)
+    margin_weights = None if weights is None else np.concatenate(margin_weights)
+
+    # the first margin whose loss-of-load would exceed the target limits the additional load. Each margin is one 
+    # loss-of-load hour, so without weights this is the k-th smallest margin (no sort needed)
+    if weights is None:
+        k = int(math.floor((target_lolh + 1e-9) * num_iterations))
+        elcc = np.partition(margins, k)[k] if k < margins.size else added_capacity
+    else:
+        order = np.argsort(margins)
+        lolh = np.cumsum(margin_weights[order]) / float(num_iterations)
+        k = np.searchsorted(lolh, target_lolh + 1e-9, side='right')
+        elcc = margins[order[k]] if k < margins.size else added_capacity
+    elcc = min(max(elcc, 0), added_capacity)
 
-    #conventional
-    if conventional['num units'] != 0:
-        conventional_generator_array = np.array([   conventional["nameplate"],conventional["summer nameplate"],
-                                                    conventional["winter nameplate"],conventional["year"],
-                                                    conventional["technology"]])
+    # hourly risk at the elcc
+    at_risk = margins < elcc
+    hourly_risk = np.bincount(  margin_hours[at_risk], None if weights is None else margin_weights[at_risk], 
+                                minlength=hourly_load.size) / float(num_iterations)
 
-        conventional_generator_df = pd.DataFrame(   data=conventional_generator_array.T,
-                                                    index=np.arange(conventional["nameplate"].size),
-                                                    columns=["Nameplate Capacity (MW)", "Summer Capacity (MW)", 
-                                                            "Winter Capacity (MW)", "Year", "Technology"])
+    print('Additional Load:',elcc,'LOLH:',round(np.sum(hourly_risk),int(math.log10(num_iterations))),'Iterations:',num_iterations)
 
-        conventional_generator_df.to_csv(root_directory+"active_conventional.csv")
+    return elcc, hourly_risk
 
-    #solar
-    if solar['num units'] != 0:
+def get_batched_elcc(num_iterations, hourly_total_capacity, hourly_load, added_capacity, target_lolh, weights=None):
+    """ Find the ELCC of a block of storage-free generators at once, with the direct or bisection solver (see `ELCC_SOLVER`).
 
-        solar_generator_array = np.array([  solar["nameplate"],solar["summer nameplate"],
-                                            solar["winter nameplate"],solar["lat"],
-                                            solar["lon"]])
+    ...
 
-        solar_generator_df = pd.DataFrame(  data=solar_generator_array.T,
-                                            index=np.arange(solar["nameplate"].size),
-                                            columns=["Nameplate Capacity (MW)","Summer Capacity (MW)",
-                                                    "Winter Capacity (MW)","Latitude",
-                                                    "Longitude"])
-        solar_generator_df.to_csv(root_directory+"active_solar.csv")
+    The direct solver finds every ELCC from the loss-of-load margins of its generator, as in `get_direct_elcc`. The
+    bisection solver steps one binary search per generator together, and evaluates the LOLH of every generator in one
+    broadcast comparison at each step. All iterations are evaluated at each step (iterations are not adaptive), and 
+    searches that have converged keep their additional load.
 
-    #wind
-    if wind['num units'] != 0:
+    Args:
+        -------------
+        `num_iterations` (int): number of capacity curves to sample for MCS.
 
-        wind_generator_array = np.array([   wind["nameplate"],wind["summer nameplate"],
-                                            wind["winter nameplate"],wind["lat"],
-                                            wind["lon"]])
+        `hourly_total_capacity` (ndarray): hourly capacity of the fleet with each added generator, of shape(generators, hours, num_iterations)
 
-        wind_generator_df = pd.DataFrame(   data=wind_generator_array.T,
-                                            index=np.arange(wind["nameplate"].size),
-                                            columns=["Nameplate Capacity (MW)","Summer Capacity (MW)",
-                                                    "Winter Capacity (MW)","Latitude",
-                                                    "Longitude"])
-        wind_generator_df.to_csv(root_directory+"active_wind.csv")
+        `hourly_load` (ndarray): vector of hourly load. 
 
-    #storage
-    if storage['num units'] != 0:
-        storage_array = np.array([storage["max charge rate"],storage["max discharge rate"],
-                                            storage["max energy"]])
-        
-        storage_df = pd.DataFrame(  data=storage_array.T,
-                                    index=np.arange(storage["max charge rate"].size),
-                                    columns=[   "Charge Rate (MW)","Discharge Rate (MW)",
-                                                "Nameplate Energy Capacity (MWh)"])
-        storage_df.to_csv(root_directory+"active_storage.csv")
+        `added_capacity` (ndarray): capacity of each added generator. Bounds the binary search of each generator
 
-    return
+        `target_lolh` (float): original reliability of the fleet (see `get_target_lolh`)
 
-def get_saved_system_name(simulation, files, system, create=False):
-# Find the "Unique" name for this system. !! poorly-implemented and not very flexible.
+        `weights` (ndarray): OPTIONAL importance sampling weights for the fleet capacity (must correspond to num_iterations)
+    """
+
+    if ELCC_SOLVER == "direct":
+        return get_batched_direct_elcc(num_iterations, hourly_total_capacity, hourly_load, added_capacity, target_lolh, weights)
+
+    def get_block_lolh(additional_load):
+    # loss-of-load hours of every generator at its own additional load
+        shortfall = (hourly_load + additional_load[:,np.newaxis])[:,:,np.newaxis] > hourly_total_capacity
+        if weights is None:
+            return np.count_nonzero(shortfall,axis=(1,2)) / float(num_iterations)
+        return np.einsum('ghi,hi->g', shortfall, weights) / float(num_iterations)
+
+    # use binary search to find amount of load needed to match base reliability
+    added_capacity = np.asarray(added_capacity, dtype=float)
+    additional_load_max = added_capacity.copy()
+    additional_load_min = np.zeros(added_capacity.size)
+    additional_load = additional_load_max / 2
+
+    lolh = get_block_lolh(additional_load)
+
+    binary_trial = 0
+    searching = np.abs(lolh - target_lolh) > 1e-9
+
+    while binary_trial < 20:
+
+        searching &= additional_load_max - additional_load_min > 2 * added_capacity / 100
+        if not np.any(searching):
+            break
+
+        #under reliable, remove load
+        under_reliable = searching & (lolh > target_lolh)
+        additional_load_max[under_reliable] = additional_load[under_reliable]
+        additional_load[under_reliable] -= (additional_load[under_reliable] - additional_load_min[under_reliable]) / 2.0
+
+        # over reliable, add load
+        over_reliable = searching & (lolh <= target_lolh)
+        additional_load_min[over_reliable] = additional_load[over_reliable]
+        additional_load[over_reliable] += (additional_load_max[over_reliable] - additional_load[over_reliable]) / 2.0
+
+        # find new lolh of generators still searching
+        lolh[searching] = get_block_lolh(additional_load)[searching]
+        searching &= np.abs(lolh - target_lolh) > 1e-9
+
+        binary_trial += 1
+
+    # Error Handling
+    searching &= additional_load_max - additional_load_min > 2 * added_capacity / 100
+    if np.any(searching):
+        error_message = "Threshold not met in 20 binary trials for "+str(np.count_nonzero(searching))+" generators."
+        print(error_message)
+
+    elcc = additional_load
+
+    return elcc
+
+def get_batched_direct_elcc(num_iterations, hourly_total_capacity, hourly_load, added_capacity, target_lolh, weights=None):
+# Exact elcc of each generator in a block from its loss-of-load margins (see get_direct_elcc). Margins overwrite the capacity
+    added_capacity = np.asarray(added_capacity, dtype=float)
+    margins = hourly_total_capacity
+    margins -= hourly_load[:,np.newaxis]
+    margins = margins.reshape(margins.shape[0], -1)
+
+    # each margin is one loss-of-load hour, so without weights the elcc is the k-th smallest margin of each generator
+    if weights is None:
+        k = int(math.floor((target_lolh + 1e-9) * num_iterations))
+        if k < margins.shape[1]:
+            margins.partition(k, axis=1)
+            elcc = margins[:,k].copy()
+        else:
+            elcc = added_capacity.copy()
+    else:
+        margin_weights = weights.ravel()
+        elcc = added_capacity.copy()
+        for generator in range(margins.shape[0]):
+            order = np.argsort(margins[generator])
+            lolh = np.cumsum(margin_weights[order]) / float(num_iterations)
+            k = np.searchsorted(lolh, target_lolh + 1e-9, side='right')
+            if k < order.size:
+                elcc[generator] = margins[generator,order[k]]
+
+    return np.minimum(np.maximum(elcc, 0), added_capacity)
+
+############ CAPACITY OUTAGE PROBABILITY TABLE ##############
+
+def get_expected_RE_output(cf, *generators):
+# Return expected renewable output after forced outages. Used to net renewables out of load for the COPT engine, which
+# approximates renewable outages by their mean
+    expected_output = np.zeros(8760)
+    for generator in generators:
+        if generator["num units"] == 0:
+            continue
+        RE_capacity = get_hourly_RE_impl(generator,cf[generator["generator type"]])
+        expected_output += np.sum(RE_capacity * (1 - get_hourly_efor(generator)),axis=1)
+    return expected_output
+
+def convolve_outage_impl(outage_probability, capacity_bins, efor):
+# Add one two-state unit to the outage probability tables of each hour group. The last bin collects all larger outages
+    num_bins = outage_probability.shape[1]
+
+    for bins in np.unique(capacity_bins):
+        if bins <= 0:
+            continue
+        groups = np.flatnonzero(capacity_bins == bins)
+        group_efor = efor[groups,np.newaxis]
+
+        # groups are sorted by season, so rows sharing a unit size are usually contiguous and can be updated in place
+        contiguous = groups[-1] - groups[0] + 1 == groups.size
+        if contiguous:
+            table = outage_probability[groups[0]:groups[-1]+1]
+        else:
+            table = outage_probability[groups]
+
+        shift_limit = max(num_bins - 1 - bins, 0)
+        tail = np.sum(table[:,shift_limit:],axis=1) * group_efor[:,0]
+        shifted = table[:,:shift_limit] * group_efor
+        table *= 1 - group_efor
+        table[:,num_bins-1-shift_limit:num_bins-1] += shifted
+        table[:,-1] += tail
+
+        if not contiguous:
+            outage_probability[groups] = table
+
+    return outage_probability
+
+def get_copt_survival_impl(outage_table):
+# Probability that outages are at least as large as each bin. Of shape(num groups, num bins + 1)
+    survival = np.cumsum(outage_table["probability"][:,::-1],axis=1)[:,::-1]
+    outage_table["survival"] = np.hstack((survival,np.zeros((survival.shape[0],1))))
+    return outage_table
+
+def get_copt_units_impl(generators, step):
+# Hour groups and per-group unit sizes (in steps) and forced outage rates shared by the outage tables of a conventional fleet.
+# Hours are grouped by season and by COPT_EFOR_BINS quantiles of the fleet's capacity-weighted forced outage rate, and each unit
+# takes its mean forced outage rate over the hours of a group
+    # seasons follow the nameplate tiling in get_hourly_capacity
+    season = np.zeros(8760,dtype=int)
+    season[8760//4:8760//4+8760//2] = 1
+
+    seasonal_nameplate = np.vstack((generators["winter nameplate"], generators["summer nameplate"])).astype(float)
+    hourly_efor = np.broadcast_to(get_hourly_efor(generators), (8760, seasonal_nameplate.shape[1]))
+
+    # temperature bins of the fleet forced outage rate, quantiles within each season
+    fleet_efor = np.dot(hourly_efor, generators["nameplate"]) / max(np.sum(generators["nameplate"]), 1)
+    efor_bin = np.zeros(8760,dtype=int)
+    for s in range(2):
+        edges = np.quantile(fleet_efor[season == s], np.linspace(0, 1, COPT_EFOR_BINS + 1)[1:-1])
+        efor_bin[season == s] = np.searchsorted(edges, fleet_efor[season == s], side="right")
+
+    group_keys, hourly_group = np.unique(np.column_stack((season, efor_bin)), axis=0, return_inverse=True)
+    hourly_group = hourly_group.flatten()
+    group_season = group_keys[:,0]
+
+    group_efor = np.zeros((group_keys.shape[0], seasonal_nameplate.shape[1]))
+    for group in range(group_keys.shape[0]):
+        group_efor[group] = np.mean(hourly_efor[hourly_group == group], axis=0)
+
+    copt_units = dict()
+    copt_units["step"] = step
+    copt_units["group"] = hourly_group
+    copt_units["season"] = season
+    copt_units["seasonal nameplate"] = seasonal_nameplate
+    copt_units["capacity bins"] = np.rint(seasonal_nameplate[group_season] / step).astype(int) # shape(num groups, num generators)
+    copt_units["efor"] = group_efor
+
+    # outages beyond the mean plus 8 standard deviations and the largest unit share the last bin
+    capacity_bins = copt_units["capacity bins"]
+    mean_outage = np.sum(capacity_bins * group_efor, axis=1)
+    std_outage = np.sqrt(np.sum(capacity_bins**2 * group_efor * (1 - group_efor), axis=1))
+    copt_units["num bins"] = int(min(np.amax(np.sum(capacity_bins, axis=1)), np.amax(mean_outage + 8 * std_outage) + np.amax(capacity_bins))) + 1
+
+    return copt_units
+
+def get_empty_copt_impl(copt_units):
+# Outage table of a fleet without units
+    outage_table = dict()
+    outage_table["step"] = copt_units["step"]
+    outage_table["group"] = copt_units["group"]
+    outage_table["capacity"] = np.zeros(8760)
+    outage_table["num units"] = 0
+    outage_table["probability"] = np.zeros((copt_units["efor"].shape[0], copt_units["num bins"]))
+    outage_table["probability"][:,0] = 1
+    return outage_table
+
+def add_units_to_copt_impl(outage_table, copt_units, units):
+# Convolve units (indices into copt_units) into an outage table in place
+    for unit in units:
+        convolve_outage_impl(outage_table["probability"], copt_units["capacity bins"][:,unit], copt_units["efor"][:,unit])
+
+    outage_table["capacity"] = outage_table["capacity"] + np.sum(copt_units["seasonal nameplate"][:,units], axis=1)[copt_units["season"]]
+    outage_table["num units"] += len(units)
+
+    return outage_table
+
+def get_copt(generators, step):
+    """ Build capacity outage probability tables (COPT) for a set of independent two-state generators.
+
+    Hours are grouped by season (summer/winter nameplate) and by temperature bin of the fleet forced outage rate, so each group
+    shares one table of outage probabilities in increments of `step` MW. The convolution is exact for each group, but units take
+    their mean forced outage rate over a group's hours, so tables of temperature-dependent fleets are approximate.
+
+    ...
+
+    Args:
+    ----------
+    `generators` (dict): dictionary of conventional generators. Must contain keys 'summer nameplate', 'winter nameplate', and 'efor'
+
+    `step` (float): capacity increment (MW) that unit sizes are rounded to
+    """
+
+    copt_units = get_copt_units_impl(generators, step)
+    outage_table = get_empty_copt_impl(copt_units)
+    add_units_to_copt_impl(outage_table, copt_units, np.arange(copt_units["efor"].shape[1]))
+
+    return get_copt_survival_impl(outage_table)
+
+def get_retirement_copts(generators, step):
+# Outage tables of the fleet remaining after each retirement of remove_oldest_impl. Retirement groups are convolved newest first
+# and the partial table is saved every few groups, as many as fit in MEMORY_BUDGET. Table i (groups i onward) is completed from the
+# nearest saved table (see get_remaining_copt)
+    copt_units = get_copt_units_impl(generators, step)
+    groups = [np.flatnonzero(units) for units in get_retirement_groups_impl(generators)]
+
+    outage_table = get_empty_copt_impl(copt_units)
+    table_bytes = outage_table["probability"].nbytes
+    stride = max(int(np.ceil((len(groups) + 1) * table_bytes / MEMORY_BUDGET)), 1)
+
+    retirement_copts = dict()
+    retirement_copts["units"] = copt_units
+    retirement_copts["groups"] = groups
+    retirement_copts["stride"] = stride
+    retirement_copts["tables"] = {len(groups) : outage_table}
+
+    for index in range(len(groups)-1, -1, -1):
+        outage_table = add_units_to_copt_impl(dict(outage_table, probability=outage_table["probability"].copy()), copt_units, groups[index])
+        if index % stride == 0:
+            retirement_copts["tables"][index] = outage_table
+
+    return retirement_copts
+
+def get_remaining_copt(retirement_copts, num_retired, generators):
+# Outage table of the fleet after the oldest `num_retired` retirement groups are removed
+    num_groups = len(retirement_copts["groups"])
+    saved = min(-(-num_retired // retirement_copts["stride"]) * retirement_copts["stride"], num_groups)
+
+    saved_table = retirement_copts["tables"][saved]
+    outage_table = dict(saved_table, probability=saved_table["probability"].copy())
+    for index in range(num_retired, saved):
+        add_units_to_copt_impl(outage_table, retirement_copts["units"], retirement_copts["groups"][index])
+
+    # saved tables are no longer needed once the fleet retires past them
+    for index in [index for index in retirement_copts["tables"] if index < num_retired]:
+        del retirement_copts["tables"][index]
+
+    if outage_table["num units"] != generators["nameplate"].size:
+        error_message = "Outage table has "+str(outage_table["num units"])+" units, fleet has "+str(generators["nameplate"].size)
+        raise RuntimeError(error_message)
+
+    return get_copt_survival_impl(outage_table)
+
+def add_unit_to_copt(outage_table, capacity, efor):
+# Return a new outage table including one unit of constant capacity and forced outage rate
+    bins = int(np.rint(capacity / outage_table["step"]))
+    num_groups = outage_table["probability"].shape[0]
+
+    new_table = dict(outage_table)
+    new_table["capacity"] = outage_table["capacity"] + capacity
+    new_table["probability"] = outage_table["probability"].copy()
+    convolve_outage_impl(new_table["probability"], np.ones(num_groups,dtype=int) * bins, np.ones(num_groups) * efor)
+
+    return get_copt_survival_impl(new_table)
+
+def get_copt_risk_impl(outage_table, margin):
+# Probability that outages exceed the hourly capacity margin
+    outage_bins = np.floor(margin / outage_table["step"]).astype(int) + 1 # smallest outage exceeding the margin
+    outage_bins = np.clip(outage_bins, 0, outage_table["survival"].shape[1] - 1)
+    return outage_table["survival"][outage_table["group"], outage_bins]
+
+def get_lolh_copt(outage_table, net_load, hourly_added_capacity=None, added_efor=0):
+# Calculate expected loss-of-load hours from outage tables. An added generator is included as one more two-state unit
+    margin = outage_table["capacity"] - net_load
+
+    if hourly_added_capacity is None:
+        hourly_risk = get_copt_risk_impl(outage_table, margin)
+    else:
+        hourly_risk = (1 - added_efor) * get_copt_risk_impl(outage_table, margin + hourly_added_capacity) +\
+                        added_efor * get_copt_risk_impl(outage_table, margin)
+
+    lolh = np.sum(hourly_risk)
+
+    return lolh, hourly_risk
+
+def remove_generators_copt( conventional_generators, net_load, oldest_year_manual, target_lolh, 
+                            temperature_dependent_efor, conventional_efor, step):
+    """ Remove generators to meet reliability target using outage tables instead of sampling.
+
+    ...
+
+    Args:
+        ----------
+        `conventional_generators` (dict): dictionary of conventional generators. Must contain keys 'nameplate', 'summer nameplate', 'winter nameplate', and 'efor'
+
+        `net_load` (ndarray): vector of hourly load less expected renewable output
+
+        `oldest_year_manual` (int): year before which thermal generators will manually be removed 
+
+        `target_LOLH` (float): reliability target
+
+        `temperature_dependent_efor` (bool): indicates whether or not to temperature dependent forced outage rates were used.
+
+        `conventional_efor` (float): forced outage rate to use for the supplemental generators
+
+        `step` (float): capacity increment (MW) for outage tables
+    """
+
+    total_capacity_removed = 0
+    oldest_year = np.amin(conventional_generators["year"][conventional_generators["technology"] != "Conventional Hydroelectric"]) 
+
+    # manual removal
+    if oldest_year_manual > oldest_year:
+        conventional_generators, oldest_year, capacity_removed = remove_oldest_impl(conventional_generators, oldest_year_manual)
+        total_capacity_removed += capacity_removed 
+
+    # Find original reliability
+    retirement_copts = get_retirement_copts(conventional_generators, step)
+    num_retired = 0
+    outage_table = get_remaining_copt(retirement_copts, num_retired, conventional_generators)
+    lolh, hourly_risk = get_lolh_copt(outage_table, net_load)
+
+    # Error Handling: Under Reliable System
+    if lolh >= target_lolh:
+        print("LOLH:", round(lolh,2))
+        print("LOLH already greater than target. Under reliable system.")
+
+    while conventional_generators["nameplate"].size > 1 and lolh < target_lolh:
+        conventional_generators, oldest_year, capacity_removed = remove_oldest_impl(conventional_generators)
+        num_retired += 1
+        outage_table = get_remaining_copt(retirement_copts, num_retired, conventional_generators)
+        lolh, hourly_risk = get_lolh_copt(outage_table, net_load)
+        total_capacity_removed += capacity_removed
+
+        print("Oldest Year:\t",int(oldest_year),"\tLOLH:\t",round(lolh,2),"\tCapacity Removed:\t",capacity_removed)
+    
+    print('')
+
+    # add supplemental units of constant size until system is over reliable
+    supplemental_capacity = 0
+    supplemental_generator_unit_size = 50
+
+    while lolh > target_lolh:
+        supplemental_table = add_unit_to_copt(outage_table, supplemental_generator_unit_size, conventional_efor)
+        lolh, hourly_risk = get_lolh_copt(supplemental_table, net_load)
+
+        if lolh > target_lolh:
+            supplemental_capacity += supplemental_generator_unit_size
+            outage_table = supplemental_table
+            print("Supplement Capacity:\t",int(supplemental_capacity),"\tLOLH:\t", round(lolh,6),flush=True)
+
+    #binary search to find last supplemental generator size
+    generator_size_max = supplemental_generator_unit_size
+    generator_size_min = 0
+    generator_size_new = generator_size_max / 2
+
+    supplemental_table = add_unit_to_copt(outage_table, generator_size_new, conventional_efor)
+    lolh, hourly_risk = get_lolh_copt(supplemental_table, net_load)
+
+    print("Supplement Capacity:\t",int(supplemental_capacity+generator_size_new),"\tLOLH:\t", round(lolh,6))
+
+    while remove_generator_binary_constraints(lolh, target_lolh, generator_size_max, generator_size_min, generator_size_new):
+
+        if lolh > target_lolh: #under reliable
+            generator_size_min = generator_size_new
+        else: #over reliable
+            generator_size_max = generator_size_new
+        generator_size_new = int((generator_size_min + generator_size_max)/2)
+
+        supplemental_table = add_unit_to_copt(outage_table, generator_size_new, conventional_efor)
+        lolh, hourly_risk = get_lolh_copt(supplemental_table, net_load)
+
+        print("Supplement Capacity:\t",int(supplemental_capacity+generator_size_new),"\tLOLH:\t", round(lolh,6),flush=True)
+    
+    print('')
+
+    # add supplemental generators to fleet
+    supplemental_capacity += generator_size_new
+    outage_table = supplemental_table
+
+    supplemental_generators = make_supplemental_generators( supplemental_capacity, conventional_efor, 
+                                                            temperature_dependent_efor, supplemental_generator_unit_size)
+    conventional_generators = append_conventional_generator(conventional_generators,supplemental_generators)
+
+    # print out
+    print("Oldest operating year :",int(oldest_year))
+    print("Number of active generators :",conventional_generators["nameplate"].size)
+    print("Supplemental capacity :",supplemental_capacity)
+    print("Capacity removed :",int(total_capacity_removed - supplemental_capacity))
+    print("Conventional fleet capacity :",(np.sum(conventional_generators["summer nameplate"])+np.sum(conventional_generators["winter nameplate"]))//2)
+    print('Base LOLH :', lolh,flush=True)
+    return conventional_generators, outage_table
+
+def get_elcc_copt(outage_table, net_load, hourly_added_capacity, added_efor, added_capacity):
+    """ Find the ELCC of a generator from outage tables by adjusting load until the original reliability is met.
+
+    ...
+    Args:
+        -------------
+        `outage_table` (dict): capacity outage probability tables for the conventional fleet (see get_copt)
+
+        `net_load` (ndarray): vector of hourly load less expected fleet renewable output
+
+        `hourly_added_capacity` (ndarray): vector of hourly capacity of the added generator before outages
+
+        `added_efor` (float): forced outage rate of the added generator
+
+        `added_capacity` (float): total capacity added. Used to bound the binary search for the ELCC calculation
+    """
+
+    # find original reliability
+    target_lolh, hourly_risk = get_lolh_copt(outage_table, net_load)
+
+    print("Target LOLH :", round(target_lolh,6),flush=True)
+    print('')
+
+    # use binary search to find amount of load needed to match base reliability
+    additional_load_max = added_capacity
+    additional_load_min = 0
+    additional_load = additional_load_max / 2
+
+    lolh, hourly_risk = get_lolh_copt(outage_table, net_load + additional_load, hourly_added_capacity, added_efor)
+
+    print('Additional Load:',additional_load,'LOLH:',round(lolh,6))
+
+    binary_trial = 0
+
+    while elcc_binary_constraints(binary_trial, lolh, target_lolh, additional_load_max, additional_load_min, added_capacity):
+        
+        #under reliable, remove load
+        if lolh > target_lolh: 
+            additional_load_max = additional_load
+            additional_load -= (additional_load - additional_load_min) / 2.0
+        
+        # over reliable, add load
+        else: 
+            additional_load_min = additional_load
+            additional_load += (additional_load_max - additional_load) / 2.0
+
+        lolh, hourly_risk = get_lolh_copt(outage_table, net_load + additional_load, hourly_added_capacity, added_efor)
+
+        print('Additional Load:',additional_load,'LOLH:',round(lolh,6), flush=True)
+
+        binary_trial += 1
+
+    # Error Handling
+    if binary_trial == 20:
+        error_message = "Threshold not met in 20 binary trials. LOLH: "+str(lolh)
+        print(error_message)
+
+    elcc = additional_load
+
+    print('')
+
+    return elcc, hourly_risk
+
+def main_copt(simulation, files, system, generator, powGen_lats, powGen_lons, cf, hourly_load, temperature_bins, benchmark_fors, fleet_loader):
+# Calculate elcc of a storage-free system with capacity outage probability tables. An approximation of the Monte Carlo engine:
+# conventional units take one mean forced outage rate per temperature bin (see get_copt_units_impl), and fleet renewables are
+# netted from load at their expected output instead of being convolved as hourly capacity, which ignores their outage variance
+    fleet_conventional_generators = get_conventional_fleet(files["eia folder"], simulation["all regions"],
+                                                            2018, system, powGen_lats, powGen_lons,
+                                                            temperature_bins, benchmark_fors, fleet_loader)
+    fleet_solar_generators, fleet_wind_generators = get_solar_and_wind_fleet(files["eia folder"],simulation["all regions"],
+                                                                            2018, system["renewable efor"],
+                                                                            powGen_lats, powGen_lons,system["renewable multiplier"],
+                                                                            fleet_loader)
+    
+    print("COPT engine (approximate). Renewables are netted from load at their expected output.")
+    print('')
+
+    # renewables are netted from load
+    net_load = hourly_load - get_expected_RE_output(cf, fleet_solar_generators, fleet_wind_generators)
+
+    # remove generators to find a target reliability level
+    fleet_conventional_generators, outage_table = remove_generators_copt(fleet_conventional_generators, net_load, system["oldest year"],
+                                                                        simulation["target reliability"], system["temperature dependent FOR"],
+                                                                        system["conventional efor"], simulation["copt step"])
+
+    # format RE generator 
+    RE_generator = make_RE_generator(generator)
+    get_cf_index(RE_generator,powGen_lats,powGen_lons)
+    hourly_added_capacity = np.sum(get_hourly_RE_impl(RE_generator,cf[generator["generator type"]]),axis=1)
+
+    # calculate elcc
+    elcc, hourlyRisk = get_elcc_copt(outage_table, net_load, hourly_added_capacity, generator["efor"], generator["nameplate"])
+
+    print('**********!!!!!!!!!!!!*********** ELCC :', int(elcc/generator["nameplate"]*100),'\n')
+
+    if DEBUG:
+        np.savetxt(OUTPUT_DIRECTORY+'hourly_risk.csv',hourlyRisk,delimiter=',')
+
+    print("End Main :\t",str(datetime.datetime.now().time()))
+    return elcc
+
+################ PRINT/SAVE/LOAD ######################
+
+def print_parameters(*parameters):
+    " Print all parameters."
+
+    print("Parameters:")
+    for sub_parameters in parameters:
+        for key, value in sub_parameters.items():
+            print("\t",key,":",value)
+
+    print('')
+
+def print_fleet(conventional_generators,solar_generators,wind_generators,storage_units):
+    " Print information about the fleet found, including storage, conventional, solar, and wind generators."
+    # conventional
+    print(  "found",conventional_generators["num units"],
+            "conventional generators ("+str(int(np.sum(conventional_generators["nameplate"])))+" MW)")
+
+    # renewables
+    print(  "found",solar_generators["num units"],"solar generators ("+str(int(np.sum(solar_generators["nameplate"])))+" MW)")
+
+    print(  "found",wind_generators["num units"],"wind generators ("+str(int(np.sum(wind_generators["nameplate"])))+" MW)")
+
+    # storage
+    print(  "found", storage_units["num units"],"storage units ("+str(int(np.sum(storage_units["max discharge rate"])))+" MW)")
+
+    print(  "Total Installed Capacity :",   np.sum(conventional_generators["nameplate"])+np.sum(solar_generators["nameplate"])+\
+                                            np.sum(wind_generators["nameplate"])+np.sum(storage_units["max discharge rate"]))
+
+    print('')
+
+def save_active_generators(root_directory, conventional, solar, wind, storage, renewable_profile):
+    " Save active generators to a csv."
+
+    #conventional
+    if conventional['num units'] != 0:
+        conventional_generator_array = np.array([   conventional["nameplate"],conventional["summer nameplate"],
+                                                    conventional["winter nameplate"],conventional["year"],
+                                                    conventional["technology"]])
+
+        conventional_generator_df = pd.DataFrame(   data=conventional_generator_array.T,
+                                                    index=np.arange(conventional["nameplate"].size),
+                                                    columns=["Nameplate Capacity (MW)", "Summer Capacity (MW)", 
+                                                            "Winter Capacity (MW)", "Year", "Technology"])
+
+        conventional_generator_df.to_csv(root_directory+"active_conventional.csv")
+
+    #solar
+    if solar['num units'] != 0:
+
+        solar_generator_array = np.array([  solar["nameplate"],solar["summer nameplate"],
+                                            solar["winter nameplate"],solar["lat"],
+                                            solar["lon"]])
+
+        solar_generator_df = pd.DataFrame(  data=solar_generator_array.T,
+                                            index=np.arange(solar["nameplate"].size),
+                                            columns=["Nameplate Capacity (MW)","Summer Capacity (MW)",
+                                                    "Winter Capacity (MW)","Latitude",
+                                                    "Longitude"])
+        solar_generator_df.to_csv(root_directory+"active_solar.csv")
+
+    #wind
+    if wind['num units'] != 0:
+
+        wind_generator_array = np.array([   wind["nameplate"],wind["summer nameplate"],
+                                            wind["winter nameplate"],wind["lat"],
+                                            wind["lon"]])
+
+        wind_generator_df = pd.DataFrame(   data=wind_generator_array.T,
+                                            index=np.arange(wind["nameplate"].size),
+                                            columns=["Nameplate Capacity (MW)","Summer Capacity (MW)",
+                                                    "Winter Capacity (MW)","Latitude",
+                                                    "Longitude"])
+        wind_generator_df.to_csv(root_directory+"active_wind.csv")
+
+    #storage
+    if storage['num units'] != 0:
+        storage_array = np.array([storage["max charge rate"],storage["max discharge rate"],
+                                            storage["max energy"]])
+        
+        storage_df = pd.DataFrame(  data=storage_array.T,
+                                    index=np.arange(storage["max charge rate"].size),
+                                    columns=[   "Charge Rate (MW)","Discharge Rate (MW)",
+                                                "Nameplate Energy Capacity (MWh)"])
+        storage_df.to_csv(root_directory+"active_storage.csv")
+
+    return
+
+def get_saved_system_name(simulation, files, system, create=False):
+# Find the "Unique" name for this system. !! poorly-implemented and not very flexible.
 
     root_directory = files['saved systems folder']
 
@@ -1575,11 +3884,23 @@ def get_saved_system_name(simulation, files, system, create=False):
 
         saved_system_directory += '__'+key_short[i]+'__'+str(parameters[key_words[i]])
 
+    # screened systems only cover elcc searches within the screening headroom
+    if simulation['risk screening']:
+        saved_system_directory += '__risk__'+str(simulation['risk screening headroom'])
+
+    # importance sampled systems carry likelihood ratio weights
+    if simulation['importance sampling']:
+        saved_system_directory += '__is__'+str(simulation['importance sampling shift'])
+
+    # outages drawn with common random numbers depend on the seed
+    if simulation['common random numbers']:
+        saved_system_directory += '__crn__'+str(simulation['random seed'])
+
     saved_system_directory += '/'
     return saved_system_directory
 
 def save_hourly_fleet_capacity( hourly_capacity, conventional_generators, solar_generators,
-                                wind_generators, storage, renewable_profile, simulation, files, system):
+                                wind_generators, storage, renewable_profile, risk_hours, hourly_weights, simulation, files, system):
     "Save hourly fleet capacity to a unique system csv." 
 
     saved_system_directory = get_saved_system_name(simulation,files,system,True)
@@ -1587,9 +3908,12 @@ def save_hourly_fleet_capacity( hourly_capacity, conventional_generators, solar_
     if not path.exists(saved_system_directory):
         os.system('mkdir '+saved_system_directory)
 
-    # save components
-    np.save(saved_system_directory+'fleet_capacity',hourly_capacity)
+    # save components. Capacity is column-major so that each batch of iterations is contiguous when memory-mapped
+    np.save(saved_system_directory+'fleet_capacity',np.asfortranarray(hourly_capacity))
     np.save(saved_system_directory+'fleet_renewable_profile', renewable_profile)
+    np.save(saved_system_directory+'fleet_risk_hours', risk_hours)
+    if hourly_weights is not None:
+        np.save(saved_system_directory+'fleet_weights', hourly_weights)
     save_active_generators( saved_system_directory,conventional_generators,
                             solar_generators,wind_generators, storage, renewable_profile)
 
@@ -1599,18 +3923,242 @@ def save_hourly_fleet_capacity( hourly_capacity, conventional_generators, solar_
     return 
 
 def load_hourly_fleet_capacity(simulation,files,system):
-    "Load hourly fleet capacity from a unique system csv. If system setting is not \"save\" then return None values."
+    "Load hourly fleet capacity from a unique system folder, memory-mapped read-only. If system setting is not \"save\" then return None values."
     saved_system_name = get_saved_system_name(simulation,files,system)
 
     if not path.exists(saved_system_name) or not system["system setting"] == "save":
-        return None, None
+        return None, None, None, None
     else:
-        hourly_capacity = np.load(saved_system_name+'fleet_capacity.npy',allow_pickle=True)
-        renewable_profile = np.load(saved_system_name+'fleet_renewable_profile.npy',allow_pickle=True)
+        hourly_capacity = np.load(get_node_local_file(saved_system_name+'fleet_capacity.npy'),mmap_mode='r')
+        renewable_profile = np.load(saved_system_name+'fleet_renewable_profile.npy')
+
+        # systems saved before risk screening cover every hour
+        risk_hours = np.arange(8760)
+        if path.exists(saved_system_name+'fleet_risk_hours.npy'):
+            risk_hours = np.load(saved_system_name+'fleet_risk_hours.npy')
+
+        # importance sampled systems must be weighted
+        hourly_weights = None
+        if path.exists(saved_system_name+'fleet_weights.npy'):
+            hourly_weights = np.load(saved_system_name+'fleet_weights.npy')
         print("System Loaded:\t",str(datetime.datetime.now().time()),flush=True)
         print('')
 
-    return hourly_capacity, renewable_profile
+    return hourly_capacity, renewable_profile, risk_hours, hourly_weights
+
+###################### SWEEP ############################
+
+def get_added_capacity(generator):
+# Total capacity added by a generator and its storage. Bounds the elcc search
+    return generator["nameplate"] + generator["generator storage"]*generator["generator storage power capacity"]
+
+def get_site_elcc(  num_iterations, generator, system, powGen_lats, powGen_lons, cf, hourly_load, hourly_fleet_capacity,
+                    fleet_storage, fleet_renewable_profile, risk_hours, weights=None, target_lolh=None):
+# Elcc of one generator (and its storage) added to a system. Hourly risk is returned for all 8760 hours
+
+    # format RE generator 
+    RE_generator = make_RE_generator(generator)
+
+    # get cf index
+    get_cf_index(RE_generator,powGen_lats,powGen_lons)
+
+    # get hourly capacity matrix
+    hourly_RE_generator_capacity = get_hourly_capacity(num_iterations,RE_generator,cf[generator["generator type"]],risk_hours)
+    
+    # new generator profile for storage arbitrage
+    added_renewable_profile = get_RE_profile_for_storage(cf,RE_generator)
+
+    # get added storage
+    added_storage = make_storage(   generator["generator storage"],generator["generator storage energy capacity"],
+                                    generator["generator storage power capacity"],generator["generator storage power capacity"], 
+                                    system["storage efficiency"],system["storage efor"],system["dispatch strategy"])
+
+    # Error Handling: likelihood ratios of importance sampled systems do not weight storage loss-of-load
+    if weights is not None and added_storage["num units"] != 0:
+        error_message = "Importance sampled systems cannot add storage. Resample the system without importance sampling."
+        raise RuntimeError(error_message)
+
+    elcc, hourly_risk = get_elcc(   num_iterations,hourly_fleet_capacity,hourly_RE_generator_capacity, 
+                                    fleet_storage,added_storage, hourly_load[risk_hours], get_added_capacity(generator), 
+                                    fleet_renewable_profile[risk_hours], added_renewable_profile[risk_hours], weights, target_lolh)
+
+    return elcc, expand_hourly_risk(hourly_risk, risk_hours)
+
+def get_sweep_sites(sweep_file, generator, powGen_lats, powGen_lons, stride):
+    """ List the generators of an elcc sweep. 
+    
+    Sites are read from a csv with one row per generator, and any generator parameter (e.g. `latitude`, `longitude`, 
+    `generator type`, `nameplate`, `generator storage`) as a column. Parameters without a column are taken from `generator`. 
+    Without a sweep file, every `stride`-th capacity factor grid cell is swept with the `generator` parameters.
+
+    ...
+
+    Args:
+    ----------
+    `sweep_file` (str): csv of generator parameters, one row per site. Empty string sweeps the capacity factor grid
+
+    `generator` (dict): default generator parameters
+
+    `powGen_lats` (ndarray): latitudes of the capacity factor grid
+
+    `powGen_lons` (ndarray): longitudes of the capacity factor grid
+
+    `stride` (int): grid cells between swept sites (2 is half resolution)
+    """
+
+    if sweep_file == "":
+        if np.ndim(powGen_lats) == 1:
+            powGen_lons, powGen_lats = np.meshgrid(powGen_lons, powGen_lats)
+        cells = (slice(1,None,stride), slice(1,None,stride))
+        sites = pd.DataFrame(np.column_stack((powGen_lats[cells].ravel(), powGen_lons[cells].ravel())),
+                                columns=["latitude","longitude"])
+    else:
+        # Error Handling
+        if not path.exists(sweep_file):
+            error_message = "Invalid sweep file: "+sweep_file
+            raise RuntimeError(error_message)
+        sites = pd.read_csv(sweep_file)
+
+    # Error Handling
+    unknown_parameters = [column for column in sites.columns if column not in generator]
+    if len(unknown_parameters) != 0:
+        error_message = "Unknown generator parameters in sweep file: "+', '.join(unknown_parameters)
+        raise RuntimeError(error_message)
+
+    for key in generator:
+        if key not in sites.columns:
+            sites[key] = [generator[key]]*len(sites)
+
+    return sites[list(generator)].to_dict("records")
+
+def get_sweep_elcc(sites):
+# Elcc of sweep sites added to SWEEP_SYSTEM. Storage-free sites (no fleet or generator storage) are solved together in blocks 
+# that fit the memory budget, with either elcc solver. Sites with storage are searched one at a time
+    num_iterations = SWEEP_SYSTEM["num_iterations"]
+    risk_hours = SWEEP_SYSTEM["risk_hours"]
+    hourly_load = SWEEP_SYSTEM["hourly_load"][risk_hours]
+
+    elcc = np.zeros(len(sites))
+    storage_free = np.array([SWEEP_SYSTEM["fleet_storage"]["num units"] == 0 and not site["generator storage"] for site in sites], dtype=bool)
+    batched = np.flatnonzero(storage_free)
+
+    # each generator in a block holds float64 capacity, and a float64 work array (shortfall, weighted shortfall, or partition) 
+    # for every hour and iteration
+    capacity_size = hourly_load.size * num_iterations
+    block_size = max(int(MEMORY_BUDGET // (capacity_size*16)), 1)
+
+    for first in range(0, batched.size, block_size):
+        block = batched[first:first+block_size]
+
+        # fleet capacity with each added generator
+        hourly_total_capacity = np.empty((block.size, hourly_load.size, num_iterations))
+        for j, i in enumerate(block):
+            RE_generator = get_cf_index(make_RE_generator(sites[i]),SWEEP_SYSTEM["powGen_lats"],SWEEP_SYSTEM["powGen_lons"])
+            get_capacity_columns(SWEEP_SYSTEM["hourly_fleet_capacity"],0,num_iterations,hourly_total_capacity[j])
+            hourly_total_capacity[j] += get_hourly_capacity(num_iterations,RE_generator,SWEEP_SYSTEM["cf"][sites[i]["generator type"]],risk_hours)
+
+        elcc[block] = get_batched_elcc( num_iterations, hourly_total_capacity, hourly_load, 
+                                        [get_added_capacity(sites[i]) for i in block], SWEEP_SYSTEM["target_lolh"], SWEEP_SYSTEM["weights"])
+
+        print('Sites:',first+block.size,'/',batched.size,'(storage-free)',flush=True)
+
+    for i in np.setdiff1d(np.arange(len(sites)), batched):
+        elcc[i] = get_site_elcc(**SWEEP_SYSTEM, generator=sites[i])[0]
+        print('Site:',i+1,'/',len(sites),'ELCC:',int(elcc[i]/get_added_capacity(sites[i])*100),flush=True)
+
+    return elcc
+
+def sweep_worker(task):
+# Elcc of a share of the sweep sites in a worker process. The system is inherited from the parent through SWEEP_SYSTEM
+    global WORKERS
+    sites, seed = task
+    np.random.seed(seed)
+
+    # each worker samples its own sites serially
+    WORKERS = 1
+
+    return get_sweep_elcc(sites)
+
+def run_sweep(  num_iterations, sites, system, powGen_lats, powGen_lons, cf, hourly_load, hourly_fleet_capacity,
+                fleet_storage, fleet_renewable_profile, risk_hours, weights=None):
+    """ Find the elcc of many generators added, one at a time, to the same system and save the results to one table.
+
+    The system and its original reliability are found once for all sites. With more than one worker, sites are split
+    across worker processes instead of iterations. Results are saved to `sweep_results.csv` in the output directory.
+
+    ...
+
+    Args:
+    ----------
+    `num_iterations` (int): number of capacity curves to sample for MCS.
+
+    `sites` (list): generator parameter dictionaries (see `get_sweep_sites`)
+
+    `system` (dict): system parameters
+
+    `powGen_lats` (ndarray): latitudes of the capacity factor grid
+
+    `powGen_lons` (ndarray): longitudes of the capacity factor grid
+
+    `cf` (dict): capacity factors of solar and wind
+
+    `hourly_load` (ndarray): vector of hourly load
+
+    `hourly_fleet_capacity` (ndarray): hourly capacity of the fleet for the risk hours (must correspond to num_iterations)
+
+    `fleet_storage` (dict): dictionary of storage unit(s)
+
+    `fleet_renewable_profile` (ndarray): vector of hourly renewable output for the fleet
+
+    `risk_hours` (ndarray): hours of the year sampled in the fleet capacity
+
+    `weights` (ndarray): OPTIONAL importance sampling weights for the fleet capacity (must correspond to num_iterations)
+    """
+    global SWEEP_SYSTEM
+
+    # Error Handling
+    added_capacity = np.array([get_added_capacity(site) for site in sites])
+    if RISK_SCREENING and np.any(added_capacity > RISK_SCREENING_HEADROOM):
+        error_message = "Added capacity exceeds risk screening headroom: "+str(RISK_SCREENING_HEADROOM)+" MW"
+        raise RuntimeError(error_message)
+
+    print("Sweep Sites :",len(sites))
+    print('')
+
+    # original reliability is shared by every site
+    target_lolh = get_target_lolh(  num_iterations, hourly_fleet_capacity, fleet_storage, hourly_load[risk_hours], 
+                                    fleet_renewable_profile[risk_hours], weights)
+
+    SWEEP_SYSTEM = dict(num_iterations=num_iterations, system=system, powGen_lats=powGen_lats, powGen_lons=powGen_lons, cf=cf,
+                        hourly_load=hourly_load, hourly_fleet_capacity=hourly_fleet_capacity, fleet_storage=fleet_storage,
+                        fleet_renewable_profile=fleet_renewable_profile, risk_hours=risk_hours, weights=weights, 
+                        target_lolh=target_lolh)
+
+    if WORKERS > 1 and len(sites) > 1:
+        # interleave sites so that each worker gets a similar mix of sizes
+        num_workers = min(WORKERS, len(sites))
+        tasks = [(sites[worker::num_workers], seed) for worker, seed in zip(range(num_workers), get_worker_seeds())]
+        results = run_forked_impl(sweep_worker, tasks)
+
+        elcc = np.zeros(len(sites))
+        for worker, result in enumerate(results):
+            elcc[worker::num_workers] = result
+    else:
+        elcc = get_sweep_elcc(sites)
+
+    SWEEP_SYSTEM = dict()
+
+    # one row per site
+    results = pd.DataFrame(sites)
+    results["added capacity"] = added_capacity
+    results["elcc"] = elcc
+    results["elcc percent"] = elcc/added_capacity*100
+    results.to_csv(OUTPUT_DIRECTORY+'sweep_results.csv',index=False)
+
+    print("Sweep Saved:\t",str(datetime.datetime.now().time()),flush=True)
+    print('')
+
+    return results
 
 ###################### MAIN ############################
 
@@ -1623,6 +4171,68 @@ def main(simulation,files,system,generator):
     # initialize output 
     global OUTPUT_DIRECTORY
     OUTPUT_DIRECTORY = files["output directory"]
+
+    # initialize sampling memory
+    global MEMORY_BUDGET
+    MEMORY_BUDGET = simulation["memory budget"]
+
+    # initialize reliability engine
+    global ENGINE, COPT_EFOR_BINS
+    ENGINE = simulation["engine"]
+    COPT_EFOR_BINS = simulation["copt efor bins"]
+
+    # initialize random numbers
+    global COMMON_RANDOM_NUMBERS, RANDOM_SEED
+    COMMON_RANDOM_NUMBERS = simulation["common random numbers"]
+    RANDOM_SEED = simulation["random seed"]
+    if COMMON_RANDOM_NUMBERS:
+        np.random.seed(RANDOM_SEED)
+
+    # initialize risk hour screening
+    global RISK_SCREENING, RISK_SCREENING_HEADROOM, RISK_SCREENING_SIGMA
+    RISK_SCREENING = simulation["risk screening"]
+    RISK_SCREENING_HEADROOM = simulation["risk screening headroom"]
+    RISK_SCREENING_SIGMA = simulation["risk screening sigma"]
+
+    # initialize adaptive iterations
+    global ADAPTIVE_ITERATIONS, LOLH_TOLERANCE, ADAPTIVE_BATCH_SIZE, ADAPTIVE_MIN_EVENTS
+    ADAPTIVE_ITERATIONS = simulation["adaptive iterations"]
+    LOLH_TOLERANCE = simulation["lolh tolerance"]
+    ADAPTIVE_BATCH_SIZE = simulation["adaptive batch size"]
+    ADAPTIVE_MIN_EVENTS = simulation["adaptive min events"]
+
+    # initialize importance sampling
+    global IMPORTANCE_SAMPLING, IMPORTANCE_SAMPLING_SHIFT, IMPORTANCE_SAMPLING_MIN_EVENTS
+    IMPORTANCE_SAMPLING = simulation["importance sampling"]
+    IMPORTANCE_SAMPLING_SHIFT = simulation["importance sampling shift"]
+    IMPORTANCE_SAMPLING_MIN_EVENTS = simulation["importance sampling min events"]
+
+    # initialize worker processes
+    global WORKERS
+    WORKERS = simulation["workers"]
+
+    # initialize capacity matrix precision
+    global CAPACITY_DTYPE
+    CAPACITY_DTYPE = simulation["capacity dtype"]
+
+    # initialize elcc solver
+    global ELCC_SOLVER
+    ELCC_SOLVER = simulation["elcc solver"]
+
+    # initialize supplemental capacity search
+    global SUPPLEMENTAL_SEARCH
+    SUPPLEMENTAL_SEARCH = simulation["supplemental search"]
+
+    # initialize node-local input cache
+    global NODE_CACHE_DIRECTORY
+    NODE_CACHE_DIRECTORY = files["node cache directory"]
+
+    # initialize storage kernel
+    global STORAGE_KERNEL
+    STORAGE_KERNEL = simulation["storage kernel"]
+    if STORAGE_KERNEL == "numba" and numba is None:
+        print("numba is not installed. Using NumPy storage kernel.")
+        STORAGE_KERNEL = "numpy"
     
     # display parameters
     print_parameters(simulation,files,system,generator)
@@ -1630,28 +4240,52 @@ def main(simulation,files,system,generator):
     # get file data
     powGen_lats, powGen_lons, cf = get_powGen(files["solar cf file"],files["wind cf file"])
     hourly_load = get_hourly_load(simulation["year"],simulation["all regions"],simulation["shift load"])
-    temperature_data = get_temperature_data(files["temperature file"])
     benchmark_fors = get_benchmark_fors(files["benchmark FORs file"])
+    temperature_bins = get_temperature_bins(files["temperature file"],benchmark_fors)
 
     # implements imports/exports for balancing authority
     if system["enable total interchange"]:
         hourly_load += get_total_interchange(simulation["year"],simulation["all regions"],files["total interchange folder"],simulation["shift load"]).astype(np.int64)
     
+    # plant table is read once for all fleets
+    fleet_loader = get_fleet_loader(files["eia folder"],simulation["all regions"],2018)
+
     # always get storage
     fleet_storage = get_storage_fleet(  files["eia folder"],simulation["all regions"],2018,
-                                        system["storage efficiency"],system["storage efor"],system["dispatch strategy"])
+                                        system["storage efficiency"],system["storage efor"],system["dispatch strategy"],
+                                        fleet_loader)
+
+    # outage tables for storage-free systems
+    if ENGINE == "copt":
+        if simulation["sweep"]:
+            print("COPT engine does not sweep sites. Using Monte Carlo engine.")
+        elif fleet_storage["num units"] == 0 and not system["supplemental storage"] and not generator["generator storage"]:
+            return main_copt(simulation, files, system, generator, powGen_lats, powGen_lons, cf, hourly_load, temperature_bins, benchmark_fors, fleet_loader)
+        else:
+            print("COPT engine does not model storage. Using Monte Carlo engine.")
+        print('')
 
-    # try loading system
-    hourly_fleet_capacity, fleet_renewable_profile = load_hourly_fleet_capacity(simulation, files, system)
+    # hourly likelihood ratios do not weight storage loss-of-load (saved systems are then found without importance sampling)
+    if IMPORTANCE_SAMPLING and (fleet_storage["num units"] != 0 or system["supplemental storage"] or generator["generator storage"]):
+        print("Importance sampling does not model storage. Using plain Monte Carlo.")
+        print('')
+        IMPORTANCE_SAMPLING = False
+        simulation["importance sampling"] = False
+
+    # try loading system (memory-mapped, copied only if saved with a different capacity dtype)
+    hourly_fleet_capacity, fleet_renewable_profile, risk_hours, hourly_fleet_weights = load_hourly_fleet_capacity(simulation, files, system)
+    if hourly_fleet_capacity is not None:
+        hourly_fleet_capacity = compact_capacity(hourly_fleet_capacity)
 
     if hourly_fleet_capacity is None:
         # system 
         fleet_conventional_generators = get_conventional_fleet(files["eia folder"], simulation["all regions"],
                                                                 2018, system, powGen_lats, powGen_lons,
-                                                                temperature_data, benchmark_fors)
+                                                                temperature_bins, benchmark_fors, fleet_loader)
         fleet_solar_generators, fleet_wind_generators = get_solar_and_wind_fleet(files["eia folder"],simulation["all regions"],
                                                                                 2018, system["renewable efor"],
-                                                                                powGen_lats, powGen_lons,system["renewable multiplier"])
+                                                                                powGen_lats, powGen_lons,system["renewable multiplier"],
+                                                                                fleet_loader)
         
         print_fleet(fleet_conventional_generators,fleet_solar_generators,fleet_wind_generators,fleet_storage)
 
@@ -1665,7 +4299,8 @@ def main(simulation,files,system,generator):
         fleet_renewable_profile = get_RE_profile_for_storage(cf,fleet_solar_generators,fleet_wind_generators)
 
         # remove generators to find a target reliability level (2.4 loss of load hours per year) and get hourly fleet capacity
-        fleet_conventional_generators, hourly_fleet_capacity = remove_generators(   simulation["iterations"],fleet_conventional_generators,
+        fleet_conventional_generators, hourly_fleet_capacity, risk_hours, hourly_fleet_weights = remove_generators(
+                                                                                    simulation["iterations"],fleet_conventional_generators,
                                                                                     fleet_solar_generators,fleet_wind_generators,fleet_storage,
                                                                                     cf,hourly_load,system["oldest year"],simulation["target reliability"],
                                                                                     system["temperature dependent FOR"],system["conventional efor"], fleet_renewable_profile)
@@ -1674,31 +4309,27 @@ def main(simulation,files,system,generator):
         # filename contains simulation parameters
         if system["system setting"] == "save":
             save_hourly_fleet_capacity( hourly_fleet_capacity, fleet_conventional_generators, fleet_solar_generators,
-                                        fleet_wind_generators, fleet_storage, fleet_renewable_profile, simulation, files, system)  
+                                        fleet_wind_generators, fleet_storage, fleet_renewable_profile, risk_hours, hourly_fleet_weights,
+                                        simulation, files, system)
             return 0
 
-    # format RE generator 
-    RE_generator = make_RE_generator(generator)
+    # evaluate every site of the sweep against the same system
+    if simulation["sweep"]:
+        sites = get_sweep_sites(files["sweep file"], generator, powGen_lats, powGen_lons, simulation["sweep stride"])
+        run_sweep(  simulation["iterations"], sites, system, powGen_lats, powGen_lons, cf, hourly_load, hourly_fleet_capacity,
+                    fleet_storage, fleet_renewable_profile, risk_hours, hourly_fleet_weights)
+        print("End Main :\t",str(datetime.datetime.now().time()))
+        return
 
-    # get cf index
-    get_cf_index(RE_generator,powGen_lats,powGen_lons)
-
-    # get hourly capacity matrix
-    hourly_RE_generator_capacity = get_hourly_capacity(simulation["iterations"],RE_generator,cf[generator["generator type"]])
-    
-    # new generator profile for storage arbitrage
-    added_renewable_profile = get_RE_profile_for_storage(cf,RE_generator)
-
-    # get added storage
-    added_storage = make_storage(   generator["generator storage"],generator["generator storage energy capacity"],
-                                    generator["generator storage power capacity"],generator["generator storage power capacity"], 
-                                    system["storage efficiency"],system["storage efor"],system["dispatch strategy"])
+    # Error Handling
+    added_capacity = get_added_capacity(generator)
+    if RISK_SCREENING and added_capacity > RISK_SCREENING_HEADROOM:
+        error_message = "Added capacity exceeds risk screening headroom: "+str(RISK_SCREENING_HEADROOM)+" MW"
+        raise RuntimeError(error_message)
 
     # calculate elcc
-    added_capacity = generator["nameplate"] + generator["generator storage"]*generator["generator storage power capacity"]
-    elcc, hourlyRisk = get_elcc(    simulation["iterations"],hourly_fleet_capacity,hourly_RE_generator_capacity, 
-                                    fleet_storage,added_storage, hourly_load, added_capacity, 
-                                    fleet_renewable_profile, added_renewable_profile)
+    elcc, hourlyRisk = get_site_elcc(   simulation["iterations"], generator, system, powGen_lats, powGen_lons, cf, hourly_load,
+                                        hourly_fleet_capacity, fleet_storage, fleet_renewable_profile, risk_hours, hourly_fleet_weights)
 
     print('**********!!!!!!!!!!!!*********** ELCC :', int(elcc/added_capacity*100),'\n')
 
@@ -0,0 +1,28 @@
+import os
+import sys
+from os import path
+
+from elcc_impl import cache_eia_folder, cache_demand_folder, cache_interchange_folder, get_benchmark_fors, get_temperature_bins
+
+# Parse Form EIA-860 workbooks, demand files, total interchange, and temperature files once so that jobs read the cached data
+#   python elcc_ingest.py ../eia8602018/ [../eia8602019/ ...] ../demand/ ../total_interchange/ ../efor/
+
+if len(sys.argv) < 2:
+    print("Usage: python elcc_ingest.py folder [folder ...]")
+    sys.exit(1)
+
+for folder in sys.argv[1:]:
+    names = os.listdir(folder)
+    if any(name.startswith("2___Plant") for name in names):
+        cache_eia_folder(folder)
+    if "WECC_TI.csv" in names:
+        cache_interchange_folder(path.join(folder,""))
+    elif any(name.endswith(".csv") for name in names):
+        cache_demand_folder(folder)
+    if any(name.startswith("temperatureDataset") for name in names):
+        benchmark_fors = get_benchmark_fors(path.join(folder,"Temperature_dependent_for_realtionships.xlsx"))
+        for name in sorted(names):
+            if name.startswith("temperatureDataset") and name.endswith(".nc"):
+                print("Caching",path.join(folder,name))
+                sys.stdout.flush()
+                get_temperature_bins(path.join(folder,name),benchmark_fors)
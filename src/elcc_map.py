@@ -7,6 +7,9 @@ root_directory = sys.argv[1]
 
 LAUNCH_FILE = 'elcc_job_0.txt'
 
+# one sweep job per map instead of one job per site
+SWEEP = len(sys.argv) > 4 and sys.argv[4] == 'sweep'
+
 def init():
 
     global root_directory 
@@ -72,8 +75,25 @@ def run_job():
         # start new file for running
         new_job()
 
+def run_sweep(parameters):
+# call single job script on one sweep of the capacity factor grid 
+
+    global LAUNCH_FILE
+
+    parameters['sweep'] = 'True'
+    parameters['sweep stride'] = 2 # half resolution
+    add_job(parameters)
+
+    os.system('sbatch elcc_single_job.sbat '+LAUNCH_FILE)
+
+    new_job()
+
 def run_map(lats,lons,parameters):
 
+    if SWEEP:
+        run_sweep(parameters)
+        return
+
     i = 0 # keep track of job num
     for lat in lats[1::2]: # half resolution
         parameters['latitude'] = lat
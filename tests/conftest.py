@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIRECTORY)
+
+import elcc_impl
+
+
+def get_driver_parameters():
+# Default simulation, files, system, and generator parameters of elcc_driver.py, read without running the driver
+    with open(os.path.join(SRC_DIRECTORY, "elcc_driver.py")) as driver_file:
+        source = driver_file.read()
+
+    namespace = dict()
+    exec(source[:source.index("# handle arguments")], namespace)
+
+    return namespace["simulation"], namespace["files"], namespace["system"], namespace["generator"]
+
+
+def make_renewable_generators(generator_type, num_units, rng):
+# Renewable generators of 100 MW placed on a 5x5 capacity factor grid
+    generators = dict()
+    generators["num units"] = num_units
+    generators["nameplate"] = np.full(num_units, 100.0)
+    generators["summer nameplate"] = np.full(num_units, 100.0)
+    generators["winter nameplate"] = np.full(num_units, 100.0)
+    generators["efor"] = np.full(num_units, 0.05)
+    generators["unit id"] = np.arange(num_units)
+    generators["generator type"] = generator_type
+    generators["lat idx"] = rng.integers(0, 5, num_units)
+    generators["lon idx"] = rng.integers(0, 5, num_units)
+    return generators
+
+
+def make_fleet(num_units=60, temperature_dependent=False, seed=0):
+# Synthetic conventional, solar, and wind fleet with capacity factors and a load that peaks near the fleet capacity
+    rng = np.random.default_rng(seed)
+    nameplate = rng.integers(20, 400, num_units).astype(float)
+
+    conventional_generators = dict()
+    conventional_generators["num units"] = num_units
+    conventional_generators["nameplate"] = nameplate
+    conventional_generators["summer nameplate"] = nameplate * 0.97
+    conventional_generators["winter nameplate"] = nameplate.copy()
+    conventional_generators["year"] = rng.integers(1950, 2015, num_units)
+    conventional_generators["technology"] = np.where(rng.random(num_units) < 0.1, "Conventional Hydroelectric", 
+                                                    "Natural Gas Fired Combined Cycle")
+    conventional_generators["unit id"] = np.arange(num_units)
+    if temperature_dependent:
+        conventional_generators["efor"] = np.where(rng.random((num_units, 8760)) < 0.5, 0.05, 0.09)
+    else:
+        conventional_generators["efor"] = np.full(num_units, 0.06)
+
+    hours = np.arange(8760)
+    cf = dict()
+    cf["solar"] = rng.random((5, 5, 8760)) * np.clip(np.sin(hours % 24 / 24 * np.pi), 0, 1)
+    cf["wind"] = rng.random((5, 5, 8760))
+
+    fleet = dict()
+    fleet["conventional"] = conventional_generators
+    fleet["solar"] = make_renewable_generators("solar", 5, rng)
+    fleet["wind"] = make_renewable_generators("wind", 5, rng)
+    fleet["cf"] = cf
+    fleet["load"] = np.sum(nameplate) * (0.45 + 0.2 * np.sin(hours / 8760 * 2 * np.pi)**2 + 0.08 * np.sin(hours % 24 / 24 * np.pi))
+    fleet["renewable profile"] = elcc_impl.get_RE_profile_for_storage(cf, fleet["solar"], fleet["wind"])
+
+    return fleet
+
+
+@pytest.fixture
+def fleet():
+    np.random.seed(0)
+    return make_fleet()
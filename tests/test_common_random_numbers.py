@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+import elcc_impl
+from conftest import get_driver_parameters
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+@pytest.mark.parametrize("memory_budget", [1e12, 24*elcc_impl.SAMPLING_BYTES_PER_DRAW, 5000*elcc_impl.SAMPLING_BYTES_PER_DRAW])
+def test_outages_independent_of_workers_and_blocks(fleet, monkeypatch, workers, memory_budget):
+    monkeypatch.setattr(elcc_impl, "COMMON_RANDOM_NUMBERS", True)
+    hours = np.arange(24)
+    num_iterations = 8
+
+    monkeypatch.setattr(elcc_impl, "WORKERS", 1)
+    monkeypatch.setattr(elcc_impl, "MEMORY_BUDGET", 1e12)
+    reference = elcc_impl.get_hourly_capacity(num_iterations, fleet["conventional"], risk_hours=hours)
+
+    monkeypatch.setattr(elcc_impl, "WORKERS", workers)
+    monkeypatch.setattr(elcc_impl, "MEMORY_BUDGET", memory_budget)
+    hourly_capacity = elcc_impl.get_hourly_capacity(num_iterations, fleet["conventional"], risk_hours=hours)
+
+    np.testing.assert_allclose(hourly_capacity, reference, rtol=0, atol=1e-6)
+
+
+def test_outages_repeat_across_calls(fleet, monkeypatch):
+    monkeypatch.setattr(elcc_impl, "COMMON_RANDOM_NUMBERS", True)
+    hours = np.arange(48)
+
+    first = elcc_impl.get_hourly_capacity(10, fleet["conventional"], risk_hours=hours)
+    np.random.seed(1)
+    second = elcc_impl.get_hourly_capacity(10, fleet["conventional"], risk_hours=hours)
+
+    np.testing.assert_array_equal(first, second)
+
+
+@pytest.mark.parametrize("common_random_numbers", [False, True])
+def test_storage_outage_rate(monkeypatch, common_random_numbers):
+    monkeypatch.setattr(elcc_impl, "COMMON_RANDOM_NUMBERS", common_random_numbers)
+    np.random.seed(0)
+    num_iterations, num_units, efor = 2000, 4, 0.3
+    storage = {"num units" : 0}
+    for unit in range(num_units):
+        storage = elcc_impl.append_storage(storage, elcc_impl.make_storage(True, 400, 100, 100, 0.85, efor, "reliability"))
+
+    # full storage discharging into a large shortfall is limited only by outages
+    available = elcc_impl.get_daily_storage_availability(storage, num_iterations, day=0)
+    for hour in range(24):
+        time_to_discharge = np.full((num_iterations, num_units), 4.0)
+        hour_available = None if available is None else available[:,hour]
+        power = elcc_impl.discharge_storage_batch(np.full(num_iterations, 1e4), time_to_discharge, storage, hour_available)
+        assert abs(np.mean(power == 0) - efor) < 0.03
+
+
+def test_saved_system_name_with_common_random_numbers(tmp_path):
+    simulation, files, system, generator = get_driver_parameters()
+    files["saved systems folder"] = str(tmp_path) + "/"
+
+    simulation["common random numbers"] = False
+    plain_name = elcc_impl.get_saved_system_name(simulation, files, system)
+    simulation["common random numbers"] = True
+    simulation["random seed"] = 7
+    crn_name = elcc_impl.get_saved_system_name(simulation, files, system)
+    simulation["random seed"] = 8
+
+    assert crn_name != plain_name
+    assert crn_name != elcc_impl.get_saved_system_name(simulation, files, system)
+
+
+@pytest.mark.parametrize("dispatch_strategy", ["reliability", "arbitrage"])
+def test_storage_dispatch_independent_of_workers(fleet, monkeypatch, dispatch_strategy):
+    monkeypatch.setattr(elcc_impl, "COMMON_RANDOM_NUMBERS", True)
+    hours = np.arange(24*14)
+    # load near the fleet's available capacity, so storage discharges and charges
+    hourly_load = np.sum(fleet["conventional"]["nameplate"]) * (0.88 + 0.06 * np.sin(hours % 24 / 24 * np.pi))
+    storage = elcc_impl.make_storage(True, 2000, 500, 500, 0.85, 0.1, dispatch_strategy)
+
+    contributions = []
+    for workers in [1, 3]:
+        monkeypatch.setattr(elcc_impl, "WORKERS", workers)
+        hourly_capacity = elcc_impl.get_hourly_capacity(12, fleet["conventional"], risk_hours=hours)
+        contributions.append(elcc_impl.get_hourly_storage_contribution( 12, hourly_capacity, hourly_load, storage, 
+                                                                        fleet["renewable profile"][hours]))
+
+    assert np.any(contributions[0])
+    np.testing.assert_allclose(contributions[1], contributions[0], rtol=0, atol=1e-6)
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import elcc_impl
+
+
+def make_workbook(eia_folder):
+# Plant schedule with numeric, text, and mixed columns (blank capacities are " " in Form EIA-860)
+    table = pd.DataFrame({  "Plant Code" : [3, 7, 11, 15],
+                            "Generator ID" : [1, "GT2", "3", 4],
+                            "Summer Capacity (MW)" : [50.5, " ", 12, np.nan],
+                            "Technology" : ["Natural Gas Fired Combined Cycle", "Batteries", None, "Onshore Wind Turbine"],
+                            "Latitude" : [41.5, 39.25, 44.0, 35.75]})
+    eia_file = os.path.join(eia_folder, "2___Plant_Y2018.xlsx")
+    with pd.ExcelWriter(eia_file) as writer:
+        pd.DataFrame(["Form EIA-860 Data - Schedule 2 - Plant Data"]).to_excel(writer, index=False, header=False)
+        table.to_excel(writer, startrow=1, index=False)
+    return eia_file
+
+
+def test_cached_columns_match_workbook(tmp_path):
+    eia_folder = str(tmp_path) + "/"
+    eia_file = make_workbook(eia_folder)
+    workbook = pd.read_excel(eia_file, skiprows=1)
+
+    elcc_impl.cache_eia_folder(eia_folder)
+    cache_file = elcc_impl.get_eia_cache_file(eia_file)
+    assert cache_file.endswith(".npz")
+
+    # the cache holds plain arrays, so it loads without unpickling
+    with np.load(cache_file, allow_pickle=False) as cache:
+        assert all(cache[key].dtype != object for key in cache.files)
+
+    usecols = ["Latitude", "Plant Code", "Generator ID", "Summer Capacity (MW)", "Technology"]
+    table = elcc_impl.read_eia_table(eia_folder, "2___Plant", 2018, usecols)
+    pd.testing.assert_frame_equal(table, workbook[[column for column in workbook.columns if column in usecols]])
+    for column in ["Generator ID", "Summer Capacity (MW)"]:
+        assert [type(value) for value in table[column]] == [type(value) for value in workbook[column]]
+
+
+def test_stale_cache_reads_workbook(tmp_path, capsys):
+    eia_folder = str(tmp_path) + "/"
+    eia_file = make_workbook(eia_folder)
+    elcc_impl.cache_eia_folder(eia_folder)
+
+    os.utime(eia_file, (0, 0))
+    capsys.readouterr()
+    table = elcc_impl.read_eia_table(eia_folder, "2___Plant", 2018, ["Plant Code"])
+
+    assert "Reading" in capsys.readouterr().out
+    assert table["Plant Code"].tolist() == [3, 7, 11, 15]
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import elcc_impl
+
+
+def test_fleet_sampler_batches_match_direct_sampling(fleet, monkeypatch):
+    monkeypatch.setattr(elcc_impl, "COMMON_RANDOM_NUMBERS", True)
+    monkeypatch.setattr(elcc_impl, "WORKERS", 1)
+    num_iterations = 6
+
+    reference = (elcc_impl.get_hourly_capacity(num_iterations, fleet["conventional"])
+                + elcc_impl.get_hourly_capacity(num_iterations, fleet["solar"], fleet["cf"]["solar"])
+                + elcc_impl.get_hourly_capacity(num_iterations, fleet["wind"], fleet["cf"]["wind"]))
+
+    # batches are sampled when requested, as with adaptive iterations
+    fleet_sampler = elcc_impl.get_fleet_sampler(num_iterations, fleet["conventional"], fleet["solar"], fleet["wind"], fleet["cf"])
+    first_batch = elcc_impl.get_sampler_capacity(fleet_sampler, 0, 2).copy()
+    second_batch = elcc_impl.get_sampler_capacity(fleet_sampler, 2, num_iterations).copy()
+
+    np.testing.assert_allclose(np.hstack((first_batch, second_batch)), reference, rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize("common_random_numbers", [False, True])
+def test_retired_groups_leave_remaining_fleet(fleet, monkeypatch, common_random_numbers):
+    monkeypatch.setattr(elcc_impl, "COMMON_RANDOM_NUMBERS", common_random_numbers)
+    monkeypatch.setattr(elcc_impl, "WORKERS", 1)
+    np.random.seed(0)
+    num_iterations = 6
+    conventional_generators = fleet["conventional"]
+
+    fleet_sampler = elcc_impl.get_fleet_sampler(num_iterations, conventional_generators, fleet["solar"], fleet["wind"], fleet["cf"])
+    elcc_impl.get_sampler_capacity(fleet_sampler, 0, 3)
+
+    # retire the oldest group after the first batch, then sample the remaining iterations
+    retired = elcc_impl.get_retirement_groups_impl(conventional_generators)[0]
+    remaining_generators = elcc_impl.select_generators_impl(conventional_generators, np.logical_not(retired))
+    elcc_impl.update_fleet_sampler(fleet_sampler, remaining_generators)
+    hourly_capacity = elcc_impl.get_sampler_capacity(fleet_sampler, 0, num_iterations)
+
+    assert len(fleet_sampler["groups"]) == len(elcc_impl.get_retirement_groups_impl(remaining_generators)) + 2
+    reference = sum(elcc_impl.sample_group_impl(fleet_sampler, group, 0, num_iterations) for group in fleet_sampler["groups"])
+    np.testing.assert_allclose(hourly_capacity, reference, rtol=0, atol=1e-6)
+
+    if common_random_numbers:
+        direct = (elcc_impl.get_hourly_capacity(num_iterations, remaining_generators)
+                    + elcc_impl.get_hourly_capacity(num_iterations, fleet["solar"], fleet["cf"]["solar"])
+                    + elcc_impl.get_hourly_capacity(num_iterations, fleet["wind"], fleet["cf"]["wind"]))
+        np.testing.assert_allclose(hourly_capacity, direct, rtol=0, atol=1e-6)
+
+
+def test_supplemental_units_added_and_removed(monkeypatch):
+    monkeypatch.setattr(elcc_impl, "COMMON_RANDOM_NUMBERS", False)
+    hours = np.arange(100)
+    sampler = elcc_impl.make_sampler_impl(50, hours)
+
+    units = [elcc_impl.make_conventional_generator(50, 0.2, False, elcc_impl.SUPPLEMENTAL_UNIT_ID+unit) for unit in range(3)]
+    groups = [elcc_impl.add_sampler_group(sampler, units[0], seed=0), elcc_impl.add_sampler_group(sampler, units[1], seed=1)]
+    two_units = elcc_impl.get_sampler_capacity(sampler, 0, 50).copy()
+
+    # a unit added and removed after sampling leaves the same outages of the others
+    elcc_impl.add_sampler_group(sampler, units[2], seed=2)
+    assert np.all(elcc_impl.get_sampler_capacity(sampler, 0, 50) >= two_units)
+    elcc_impl.remove_sampler_group(sampler, sampler["groups"][-1])
+    np.testing.assert_allclose(elcc_impl.get_sampler_capacity(sampler, 0, 50), two_units, rtol=0, atol=1e-9)
+
+    elcc_impl.remove_sampler_group(sampler, groups[1])
+    assert set(np.unique(elcc_impl.get_sampler_capacity(sampler, 0, 50))) <= {0, 50}
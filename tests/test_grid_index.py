@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import elcc_impl
+
+
+def get_nearest_cells(latitudes, longitudes, cell_lats, cell_lons):
+# Brute force nearest cell of each coordinate
+    distance = (latitudes[:,np.newaxis] - cell_lats.ravel())**2 + (longitudes[:,np.newaxis] - cell_lons.ravel())**2
+    return np.unravel_index(np.argmin(distance, axis=1), cell_lats.shape)
+
+
+def make_plants(rng, num_plants=500):
+    plants = pd.DataFrame({ "Plant Code" : rng.permutation(np.arange(1, 3*num_plants, 3))[:num_plants],
+                            "Latitude" : rng.uniform(30, 50, num_plants),
+                            "Longitude" : rng.uniform(-125, -100, num_plants)})
+    return plants.set_index("Plant Code")
+
+
+def test_rectilinear_grid_searches_each_axis():
+    rng = np.random.default_rng(0)
+    powGen_lats, powGen_lons = np.arange(30, 50.5, 0.5), np.arange(-125, -99.375, 0.625)[::-1]
+    latitudes, longitudes = rng.uniform(29, 51, 1000), rng.uniform(-126, -99, 1000)
+
+    lat_idx, lon_idx = elcc_impl.get_grid_index_impl(latitudes, longitudes, powGen_lats, powGen_lons)
+
+    np.testing.assert_array_equal(lat_idx, np.argmin(np.abs(latitudes[:,np.newaxis] - powGen_lats), axis=1))
+    np.testing.assert_array_equal(lon_idx, np.argmin(np.abs(longitudes[:,np.newaxis] - powGen_lons), axis=1))
+
+
+@pytest.mark.parametrize("memory_budget", [1e9, 1000])
+def test_irregular_grid_finds_nearest_cell(monkeypatch, memory_budget):
+    monkeypatch.setattr(elcc_impl, "cKDTree", None)
+    monkeypatch.setattr(elcc_impl, "MEMORY_BUDGET", memory_budget)
+    rng = np.random.default_rng(1)
+
+    # curvilinear grid, rotated and perturbed
+    rows, columns = np.meshgrid(np.arange(40), np.arange(50), indexing="ij")
+    cell_lats = 30 + 0.5*rows + 0.1*columns + rng.uniform(-0.05, 0.05, rows.shape)
+    cell_lons = -125 + 0.5*columns - 0.1*rows + rng.uniform(-0.05, 0.05, rows.shape)
+    latitudes, longitudes = rng.uniform(32, 48, 300), rng.uniform(-120, -105, 300)
+    latitudes[0] = np.nan
+
+    lat_idx, lon_idx = elcc_impl.get_grid_index_impl(latitudes, longitudes, cell_lats, cell_lons)
+    expected_lat_idx, expected_lon_idx = get_nearest_cells(latitudes[1:], longitudes[1:], cell_lats, cell_lons)
+
+    np.testing.assert_array_equal(lat_idx[1:], expected_lat_idx)
+    np.testing.assert_array_equal(lon_idx[1:], expected_lon_idx)
+    assert (lat_idx[0], lon_idx[0]) == (0, 0)
+
+
+def test_plant_grid_index_is_saved_per_year_and_grid(tmp_path, monkeypatch):
+    rng = np.random.default_rng(2)
+    eia_folder = str(tmp_path) + "/"
+    fleet_loader = {"eia folder" : eia_folder, "year" : 2018, "plants" : make_plants(rng)}
+    powGen_lats, powGen_lons = np.arange(30, 50.5, 0.5), np.arange(-125, -99.375, 0.625)
+
+    grid_index = elcc_impl.get_plant_grid_index(fleet_loader, powGen_lats, powGen_lons)
+    plant_codes = fleet_loader["plants"].index.values[::7]
+    lat_idx, lon_idx = elcc_impl.lookup_grid_index(grid_index, plant_codes)
+    expected = elcc_impl.get_grid_index_impl(   fleet_loader["plants"]["Latitude"][plant_codes].values, 
+                                                fleet_loader["plants"]["Longitude"][plant_codes].values, powGen_lats, powGen_lons)
+    np.testing.assert_array_equal(lat_idx, expected[0])
+    np.testing.assert_array_equal(lon_idx, expected[1])
+
+    # later runs read the saved mapping (without pickles)
+    assert len(os.listdir(os.path.join(eia_folder, "cache"))) == 1
+    monkeypatch.setattr(elcc_impl, "get_grid_index_impl", None)
+    saved_grid_index = elcc_impl.get_plant_grid_index(fleet_loader, powGen_lats, powGen_lons)
+    for key in grid_index:
+        np.testing.assert_array_equal(saved_grid_index[key], grid_index[key])
+
+    # another grid has its own mapping
+    assert (elcc_impl.get_grid_index_cache_file(eia_folder, 2018, powGen_lats, powGen_lons) 
+            != elcc_impl.get_grid_index_cache_file(eia_folder, 2018, powGen_lats[1:], powGen_lons))
+
+
+def test_sweep_sites_of_irregular_grid():
+    from conftest import get_driver_parameters
+    simulation, files, system, generator = get_driver_parameters()
+    rows, columns = np.meshgrid(np.arange(6), np.arange(4), indexing="ij")
+    cell_lats, cell_lons = 30 + 0.5*rows + 0.1*columns, -125 + 0.5*columns
+
+    sites = elcc_impl.get_sweep_sites("", generator, cell_lats, cell_lons, 2)
+    rectilinear_sites = elcc_impl.get_sweep_sites("", generator, np.arange(6.0), np.arange(4.0), 2)
+
+    assert [(site["latitude"], site["longitude"]) for site in sites] == [(cell_lats[i,j], cell_lons[i,j]) for i in [1,3,5] for j in [1,3]]
+    assert [(site["latitude"], site["longitude"]) for site in rectilinear_sites] == [(i, j) for i in [1.0,3.0,5.0] for j in [1.0,3.0]]
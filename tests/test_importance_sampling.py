@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pytest
+
+import elcc_impl
+from conftest import get_driver_parameters, make_fleet
+
+
+def test_saved_system_name_with_importance_sampling(tmp_path):
+    simulation, files, system, generator = get_driver_parameters()
+    simulation["importance sampling"] = True
+    files["saved systems folder"] = str(tmp_path) + "/"
+
+    saved_system_name = elcc_impl.get_saved_system_name(simulation, files, system)
+
+    assert "__is__" + str(simulation["importance sampling shift"]) in saved_system_name
+
+
+def test_importance_sampled_elcc(monkeypatch, capsys):
+    monkeypatch.setattr(elcc_impl, "IMPORTANCE_SAMPLING", True)
+    monkeypatch.setattr(elcc_impl, "RISK_SCREENING", True)
+    np.random.seed(1)
+    fleet = make_fleet(num_units=150)
+    no_storage = {"num units" : 0}
+    num_iterations = 1000
+
+    conventional_generators, hourly_fleet_capacity, risk_hours, weights = elcc_impl.remove_generators(
+        num_iterations, fleet["conventional"], fleet["solar"], fleet["wind"], no_storage, fleet["cf"], fleet["load"], 0, 2.4,
+        False, 0.05, fleet["renewable profile"])
+
+    assert weights is not None
+    assert "weights collapsed" not in capsys.readouterr().out
+
+    risk_load = fleet["load"][risk_hours]
+    target_lolh = elcc_impl.get_target_lolh(num_iterations, hourly_fleet_capacity, no_storage, risk_load, 
+                                            fleet["renewable profile"][risk_hours], weights)
+    assert abs(target_lolh - 2.4) < 0.1
+
+    added_generator = elcc_impl.make_conventional_generator(300, 0, False, elcc_impl.ADDED_UNIT_ID)
+    hourly_added_capacity = elcc_impl.get_hourly_capacity(num_iterations, added_generator, risk_hours=risk_hours)
+    elcc, hourly_risk = elcc_impl.get_elcc(num_iterations, hourly_fleet_capacity, hourly_added_capacity, no_storage, no_storage,
+                                            risk_load, 300, fleet["renewable profile"][risk_hours], np.zeros(risk_hours.size),
+                                            weights, target_lolh)
+
+    # a perfectly available unit is worth nearly its nameplate
+    assert 250 < elcc <= 300
+
+
+def test_importance_sampling_disabled_with_storage(monkeypatch):
+    monkeypatch.setattr(elcc_impl, "IMPORTANCE_SAMPLING", True)
+    storage = elcc_impl.make_storage(True, 400, 100, 100, 0.85, 0, "reliability")
+    no_storage = {"num units" : 0}
+
+    assert elcc_impl.get_importance_log_weights(24, 10, storage) is None
+    assert elcc_impl.get_importance_log_weights(24, 10, no_storage).shape == (24, 10)
+
+
+@pytest.mark.parametrize("num_units", [100, 1000])
+def test_importance_sampled_lolh_matches_exact_outage_tables(monkeypatch, num_units):
+    monkeypatch.setattr(elcc_impl, "IMPORTANCE_SAMPLING", True)
+    np.random.seed(0)
+    generators = make_fleet(num_units, temperature_dependent=True)["conventional"]
+    num_hours, num_iterations, lolp = 24, 2000, 1e-3
+    hours = np.arange(num_hours)
+
+    # load of each hour is set so that outages exceed the margin with probability near lolp
+    load = np.zeros(num_hours)
+    exact_lolh = 0
+    for hour in hours:
+        hour_generators = dict(generators)
+        hour_generators.pop("efor index", None)
+        hour_generators["efor"] = elcc_impl.get_hourly_efor(generators, [hour])[0]
+
+        outage_table = elcc_impl.get_copt(hour_generators, 1)
+        survival = outage_table["survival"][outage_table["group"][hour]]
+        outage_bin = np.argmax(survival <= lolp)
+        exact_lolh += survival[outage_bin]
+        load[hour] = outage_table["capacity"][hour] - (outage_bin - 0.5)
+
+    log_weights = np.zeros((num_hours, num_iterations))
+    hourly_capacity = elcc_impl.get_hourly_capacity(num_iterations, generators, risk_hours=hours, log_weights=log_weights)
+    weights = np.exp(log_weights)
+
+    annual_lolh = np.sum((load[:,np.newaxis] > hourly_capacity) * weights, axis=0)
+    standard_error = np.std(annual_lolh, ddof=1) / math.sqrt(num_iterations)
+    effective_events = elcc_impl.get_effective_events(num_iterations, lambda first, last: hourly_capacity[:,first:last], 
+                                                        load, weights)
+
+    assert effective_events >= elcc_impl.IMPORTANCE_SAMPLING_MIN_EVENTS
+    assert abs(np.mean(annual_lolh) - exact_lolh) <= 4*standard_error + 0.1*exact_lolh
@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+import time
+
+import elcc_impl
+
+
+def make_input(tmp_path):
+    source = tmp_path / "inputs" / "load.csv"
+    source.parent.mkdir()
+    source.write_text("hour,load\n0,100\n")
+    return str(source)
+
+
+def get_node_file(cache_directory, source):
+    return os.path.join(cache_directory, os.path.abspath(source).strip("/").replace("/","__"))
+
+
+def get_dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_copies_input_once(tmp_path, monkeypatch):
+    cache_directory = str(tmp_path / "cache")
+    monkeypatch.setattr(elcc_impl, "NODE_CACHE_DIRECTORY", cache_directory)
+    source = make_input(tmp_path)
+
+    node_file = elcc_impl.get_node_local_file(source)
+
+    assert node_file == get_node_file(cache_directory, source)
+    assert open(node_file).read() == open(source).read()
+    assert sorted(os.listdir(cache_directory)) == [os.path.basename(node_file)]
+    assert elcc_impl.get_node_local_file(source) == node_file
+
+
+def test_lock_of_dead_job_is_taken_over(tmp_path, monkeypatch):
+    cache_directory = str(tmp_path / "cache")
+    monkeypatch.setattr(elcc_impl, "NODE_CACHE_DIRECTORY", cache_directory)
+    monkeypatch.setattr(elcc_impl, "NODE_CACHE_WAIT", 30)
+    source = make_input(tmp_path)
+    node_file = get_node_file(cache_directory, source)
+
+    # a job killed mid-copy leaves its lock and partial copy behind
+    os.makedirs(cache_directory)
+    dead_pid = get_dead_pid()
+    with open(node_file+".lock", "w") as lock:
+        lock.write(str(dead_pid))
+    with open(node_file+"."+str(dead_pid), "w") as partial_copy:
+        partial_copy.write("hour")
+
+    start = time.time()
+    assert elcc_impl.get_node_local_file(source) == node_file
+    assert time.time() - start < 10
+    assert open(node_file).read() == open(source).read()
+    assert sorted(os.listdir(cache_directory)) == [os.path.basename(node_file)]
+
+
+def test_old_lock_is_taken_over(tmp_path, monkeypatch):
+    cache_directory = str(tmp_path / "cache")
+    monkeypatch.setattr(elcc_impl, "NODE_CACHE_DIRECTORY", cache_directory)
+    monkeypatch.setattr(elcc_impl, "NODE_CACHE_WAIT", 2)
+    source = make_input(tmp_path)
+    node_file = get_node_file(cache_directory, source)
+
+    # the lock holder is alive (this process), but the lock is older than a copy can take
+    os.makedirs(cache_directory)
+    with open(node_file+".lock", "w") as lock:
+        lock.write(str(os.getpid()))
+    os.utime(node_file+".lock", (time.time()-60, time.time()-60))
+
+    assert elcc_impl.get_node_local_file(source) == node_file
+    assert not os.path.exists(node_file+".lock")
+
+
+def test_live_lock_is_kept(tmp_path):
+    node_file = str(tmp_path / "load.csv")
+    with open(node_file+".lock", "w") as lock:
+        lock.write(str(os.getpid()))
+
+    assert not elcc_impl.acquire_node_lock(node_file+".lock", node_file)
+    assert os.path.exists(node_file+".lock")
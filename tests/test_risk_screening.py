@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+import pytest
+
+import elcc_impl
+from conftest import make_fleet
+
+
+def make_storage_fleet(total_power):
+# Four-hour storage units that together discharge total_power
+    storage = {"num units" : 0}
+    for power in total_power * np.array([0.4, 0.35, 0.25]):
+        unit_storage = elcc_impl.make_storage(True, 4*power, power, power, 0.85, 0.02, "reliability")
+        storage = elcc_impl.append_storage(storage, unit_storage)
+    return storage
+
+
+@pytest.mark.parametrize("load_scale", [1.2, 1.25])
+def test_screened_lolh_with_storage_matches_full_year(monkeypatch, load_scale):
+    monkeypatch.setattr(elcc_impl, "RISK_SCREENING", True)
+    np.random.seed(0)
+    fleet = make_fleet()
+    conventional, solar, wind, cf = fleet["conventional"], fleet["solar"], fleet["wind"], fleet["cf"]
+    hourly_load = fleet["load"] * load_scale
+    storage = make_storage_fleet(0.05 * np.sum(conventional["nameplate"]))
+    num_iterations = 300
+
+    risk_hours = elcc_impl.get_risk_hours(hourly_load, conventional, solar, wind, cf, storage)
+    assert risk_hours.size < 8760
+
+    # both evaluations share the sampled fleet capacity
+    hourly_capacity = elcc_impl.get_hourly_fleet_capacity(num_iterations, conventional, solar, wind, cf)
+    screened_capacity = hourly_capacity[risk_hours]
+
+    hourly_capacity += elcc_impl.get_hourly_storage_contribution(   num_iterations, hourly_capacity, hourly_load,
+                                                                    storage, fleet["renewable profile"])
+    screened_capacity += elcc_impl.get_hourly_storage_contribution( num_iterations, screened_capacity, hourly_load[risk_hours],
+                                                                    storage, fleet["renewable profile"][risk_hours])
+
+    annual_lolh = np.count_nonzero(hourly_load[:,np.newaxis] > hourly_capacity, axis=0)
+    screened_annual_lolh = np.count_nonzero(hourly_load[risk_hours,np.newaxis] > screened_capacity, axis=0)
+    assert np.mean(annual_lolh) > 0
+
+    # storage outages are drawn separately in each evaluation, so differences are compared with their standard error
+    difference = annual_lolh - screened_annual_lolh
+    standard_error = np.std(difference, ddof=1) / math.sqrt(num_iterations)
+    assert abs(np.mean(difference)) <= 4*standard_error + 1e-9
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import elcc_impl
+
+
+def make_storage_fleet(num_units, rng):
+# Storage units of random power, energy, and efficiency
+    storage = {"num units" : 0}
+    for unit in range(num_units):
+        power = rng.uniform(50, 500)
+        unit_storage = elcc_impl.make_storage(True, power*rng.uniform(1, 8), power, power, rng.uniform(0.7, 0.95), 0, "reliability")
+        storage = elcc_impl.append_storage(storage, unit_storage)
+    return storage
+
+
+def get_reference_power(status, target, x, storage):
+# Power of each unit from the per-state policy (discharge_storage/charge_storage) for every trial
+    p = np.atleast_1d(storage["max discharge rate"])
+    reference = np.zeros(x.shape)
+
+    for trial in range(x.shape[0]):
+        storage["time to discharge"] = x[trial]
+        storage["extractable energy"] = x[trial]*p
+        storage["energy"] = storage["extractable energy"] / storage["one way efficiency"]
+        if status == "discharge":
+            elcc_impl.discharge_storage(target[trial], storage)
+        else:
+            elcc_impl.charge_storage(target[trial], storage)
+        reference[trial] = storage["power"]
+
+    return reference
+
+
+@pytest.mark.parametrize("status", ["discharge", "charge"])
+@pytest.mark.parametrize("kernel", ["numba", "numpy"])
+@pytest.mark.parametrize("num_units", [1, 3, 8])
+def test_storage_kernel_matches_policy(status, kernel, num_units):
+    if kernel == "numba" and elcc_impl.numba is None:
+        pytest.skip("numba is not installed")
+
+    rng = np.random.default_rng(num_units)
+    storage = make_storage_fleet(num_units, rng)
+    num_trials = 500
+
+    p = np.atleast_1d(storage["max discharge rate"])
+    n = np.atleast_1d(storage["roundtrip efficiency"])
+    x_max = storage["max energy"] / p
+    x = rng.random((num_trials, num_units))*x_max
+    z_max = np.minimum(x+n*storage["max charge rate"]/p, x_max)
+    target = rng.random(num_trials)*np.sum(p)*1.2
+
+    if status == "discharge":
+        kernel_function = elcc_impl.discharge_power_jit if kernel == "numba" else elcc_impl.discharge_power_impl
+        u = kernel_function(target, x, p)
+    else:
+        kernel_function = elcc_impl.charge_power_jit if kernel == "numba" else elcc_impl.charge_power_impl
+        u = kernel_function(target, x, z_max, p/n)
+
+    np.testing.assert_allclose(u, get_reference_power(status, target, x, storage), rtol=1e-9, atol=1e-6)
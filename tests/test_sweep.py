@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import elcc_impl
+from conftest import get_driver_parameters, make_fleet
+
+
+def make_sweep_system(num_iterations, importance_sampling):
+# Storage-free system on the synthetic 5x5 capacity factor grid, as run_sweep shares it with get_sweep_elcc
+    fleet = make_fleet(num_units=60)
+    simulation, files, system, generator = get_driver_parameters()
+    powGen_lats, powGen_lons = np.arange(5.0), np.arange(5.0)
+    risk_hours = np.arange(8760)
+    hourly_load = fleet["load"] * 1.2
+
+    log_weights = np.zeros((risk_hours.size, num_iterations)) if importance_sampling else None
+    hourly_fleet_capacity = elcc_impl.get_hourly_fleet_capacity(num_iterations, fleet["conventional"], fleet["solar"], 
+                                                                fleet["wind"], fleet["cf"], risk_hours=risk_hours, log_weights=log_weights)
+    weights = None if log_weights is None else np.exp(log_weights)
+    fleet_storage = {"num units" : 0}
+    target_lolh = elcc_impl.get_target_lolh(num_iterations, hourly_fleet_capacity, fleet_storage, hourly_load, 
+                                            fleet["renewable profile"], weights)
+
+    sweep_system = dict(num_iterations=num_iterations, system=system, powGen_lats=powGen_lats, powGen_lons=powGen_lons, 
+                        cf=fleet["cf"], hourly_load=hourly_load, hourly_fleet_capacity=hourly_fleet_capacity, 
+                        fleet_storage=fleet_storage, fleet_renewable_profile=fleet["renewable profile"], risk_hours=risk_hours, 
+                        weights=weights, target_lolh=target_lolh)
+
+    generator["nameplate"] = 300
+    sites = elcc_impl.get_sweep_sites("", generator, powGen_lats, powGen_lons, 2)
+    sites[1]["generator type"] = "wind"
+
+    return sweep_system, sites
+
+
+@pytest.mark.parametrize("importance_sampling", [False, True])
+@pytest.mark.parametrize("memory_budget", [1e12, 1])
+def test_batched_sweep_matches_site_elcc(monkeypatch, capsys, importance_sampling, memory_budget):
+    # common random numbers give every site the same outages in both paths
+    monkeypatch.setattr(elcc_impl, "COMMON_RANDOM_NUMBERS", True)
+    monkeypatch.setattr(elcc_impl, "IMPORTANCE_SAMPLING", importance_sampling)
+    monkeypatch.setattr(elcc_impl, "ELCC_SOLVER", "direct")
+    sweep_system, sites = make_sweep_system(200, importance_sampling)
+    monkeypatch.setattr(elcc_impl, "SWEEP_SYSTEM", sweep_system)
+
+    site_elcc = np.array([elcc_impl.get_site_elcc(**sweep_system, generator=site)[0] for site in sites])
+    monkeypatch.setattr(elcc_impl, "MEMORY_BUDGET", memory_budget)
+    sweep_elcc = elcc_impl.get_sweep_elcc(sites)
+
+    assert "(storage-free)" in capsys.readouterr().out
+    assert np.all(site_elcc > 0)
+    np.testing.assert_allclose(sweep_elcc, site_elcc, rtol=0, atol=1e-6)
+
+
+def test_batched_bisection_brackets_direct_elcc(monkeypatch, capsys):
+    monkeypatch.setattr(elcc_impl, "COMMON_RANDOM_NUMBERS", True)
+    sweep_system, sites = make_sweep_system(200, False)
+    monkeypatch.setattr(elcc_impl, "SWEEP_SYSTEM", sweep_system)
+
+    monkeypatch.setattr(elcc_impl, "ELCC_SOLVER", "direct")
+    direct_elcc = elcc_impl.get_sweep_elcc(sites)
+    monkeypatch.setattr(elcc_impl, "ELCC_SOLVER", "bisection")
+    bisection_elcc = elcc_impl.get_sweep_elcc(sites)
+
+    # bisection stops within 2% of the added capacity
+    assert np.all(np.abs(bisection_elcc - direct_elcc) <= 0.02 * 300 + 1e-6)